@@ -0,0 +1,232 @@
+"""
+Modul Index adm4 - Pencarian kode wilayah adm4 BMKG terdekat dari koordinat
+
+Dokumentasi Bahasa Indonesia:
+- Katalog adm4 (desa/kelurahan Kemendagri beserta titik tengahnya, puluhan
+  ribu baris) dimuat sekali ke array NumPy ringkas: kode (bytes 13 karakter),
+  lat/lng float64 dan nama
+- Baris diurutkan per sel grid lat/lng sehingga isi satu sel adalah potongan
+  array yang berurutan; dict sel -> (awal, akhir) menjadi index-nya
+- nearest() memeriksa sel asal lalu cincin sel di sekitarnya, berhenti begitu
+  jarak terdekat yang ditemukan lebih kecil dari jarak minimum ke cincin
+  berikutnya; jarak tepat dihitung dengan haversine pada kandidat saja
+- Tanpa file katalog, app membangun index dari kode adm4 per kota
+  (BMKG_CITY_CODES) sehingga query koordinat tetap bekerja dengan resolusi kota
+
+Format katalog (CSV, boleh .csv.gz), baris header wajib:
+    kode,nama,lat,lng
+    31.71.01.1001,Gambir,-6.1767,106.8231
+  (nama kolom alternatif: code/adm4, name, latitude, lon/longitude)
+
+Konfigurasi (environment):
+- ADM4_CATALOG_PATH: file katalog (default data/adm4_centroids.csv di
+  folder backend)
+- ADM4_CELL_DEG: ukuran sel grid dalam derajat (default 0.1, ~11 km)
+- ADM4_MAX_DISTANCE_KM: titik yang lebih jauh dari ini ke adm4 terdekat
+  dianggap di luar cakupan (default 25)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import csv
+import gzip
+import math
+import time
+import threading
+
+import numpy as np
+
+from geo_utils import KM_PER_DEG_LAT, haversine_km
+
+ADM4_CATALOG_PATH = os.getenv(
+    'ADM4_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'adm4_centroids.csv')
+)
+ADM4_CELL_DEG = float(os.getenv('ADM4_CELL_DEG', '0.1'))
+ADM4_MAX_DISTANCE_KM = float(os.getenv('ADM4_MAX_DISTANCE_KM', '25'))
+
+# Nama kolom yang diterima per field
+CATALOG_COLUMNS = {
+    'code': ('kode', 'code', 'adm4'),
+    'name': ('nama', 'name'),
+    'lat': ('lat', 'latitude'),
+    'lng': ('lng', 'lon', 'longitude'),
+}
+
+
+def read_catalog(path):
+    """
+    Baca katalog CSV adm4.
+
+    Returns:
+        list: Tuple (kode, nama, lat, lng); baris tanpa koordinat valid dilewati
+
+    Raises:
+        ValueError: Jika kolom kode/lat/lng tidak ditemukan di header
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    rows = []
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        columns = {}
+        for field, aliases in CATALOG_COLUMNS.items():
+            columns[field] = next((fields[alias] for alias in aliases if alias in fields), None)
+        if not (columns['code'] and columns['lat'] and columns['lng']):
+            raise ValueError(f"kolom kode, lat dan lng wajib ada (header: {reader.fieldnames})")
+        for record in reader:
+            try:
+                lat = float(record[columns['lat']])
+                lng = float(record[columns['lng']])
+            except (TypeError, ValueError):
+                continue
+            name = record[columns['name']].strip() if columns['name'] else ''
+            rows.append((record[columns['code']].strip(), name, lat, lng))
+    return rows
+
+
+class Adm4Index:
+    """
+    Grid index titik tengah adm4 untuk query tetangga terdekat.
+
+    Args:
+        cell_deg (float): Ukuran sel grid (derajat)
+        max_distance_km (float): Jarak maksimum hasil nearest()
+
+    Usage:
+        adm4_index.load()
+        location = adm4_index.nearest(-6.2, 106.8)
+        # {'adm4': '31.71.01.1001', 'name': 'Gambir', 'lat': ..., 'lng': ..., 'distance_km': 1.3}
+    """
+
+    def __init__(self, cell_deg=ADM4_CELL_DEG, max_distance_km=ADM4_MAX_DISTANCE_KM):
+        self.cell_deg = float(cell_deg)
+        self.max_distance_km = max_distance_km
+        self.source = None
+        self._lng_cells = int(math.ceil(360.0 / self.cell_deg))
+        # (codes, names, lat, lng, cells) swapped as one tuple so readers never see a half-built index
+        self._data = (np.empty(0, dtype='S13'), [], np.empty(0), np.empty(0), {})
+        self._build_ms = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def _cell(self, lat, lng):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor((lng + 180.0) / self.cell_deg)) % self._lng_cells)
+
+    def build(self, rows, source=None):
+        """
+        Bangun ulang index dari baris (kode, nama, lat, lng).
+
+        Returns:
+            int: Jumlah lokasi di index
+        """
+        start = time.perf_counter()
+        rows = [row for row in rows if not (math.isnan(row[2]) or math.isnan(row[3]))]
+        lat = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        lng = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        cell_rows = np.floor(lat / self.cell_deg).astype(np.int64)
+        cell_cols = np.floor((lng + 180.0) / self.cell_deg).astype(np.int64) % self._lng_cells
+        order = np.lexsort((cell_cols, cell_rows))
+
+        codes = np.array([rows[i][0] for i in order], dtype='S13')
+        names = [rows[i][1] for i in order]
+        lat, lng = lat[order], lng[order]
+        cell_rows, cell_cols = cell_rows[order], cell_cols[order]
+        cells = {}
+        if len(order):
+            _, starts = np.unique(cell_rows * self._lng_cells + cell_cols, return_index=True)
+            ends = np.append(starts[1:], len(order))
+            for begin, end in zip(starts.tolist(), ends.tolist()):
+                cells[(int(cell_rows[begin]), int(cell_cols[begin]))] = (begin, end)
+
+        with self._lock:
+            self._data = (codes, names, lat, lng, cells)
+            self.source = source
+            self._build_ms = (time.perf_counter() - start) * 1000
+        return len(codes)
+
+    def load(self, path=ADM4_CATALOG_PATH):
+        """
+        Muat katalog adm4 dari file.
+
+        Returns:
+            int: Jumlah lokasi dimuat (0 jika file tidak ada atau tidak valid)
+        """
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            rows = read_catalog(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading adm4 catalog {path}: {e}")
+            return 0
+        count = self.build(rows, source=path)
+        print(f"adm4 catalog loaded: {count} locations in {self._build_ms:.0f} ms")
+        return count
+
+    def nearest(self, lat, lng, max_distance_km=None):
+        """
+        Lokasi adm4 terdekat dari (lat, lng).
+
+        Args:
+            lat (float): Lintang (derajat)
+            lng (float): Bujur (derajat)
+            max_distance_km (float): Batas jarak (default self.max_distance_km)
+
+        Returns:
+            dict: adm4, name, lat, lng, distance_km; None jika tidak ada
+                  lokasi dalam batas jarak
+        """
+        codes, names, lats, lngs, cells = self._data
+        if not cells:
+            return None
+        max_distance_km = self.max_distance_km if max_distance_km is None else max_distance_km
+        row0, col0 = self._cell(lat, lng)
+        # A ring of cells k steps out is at least (k - 1) cells away in either axis
+        cell_km = self.cell_deg * KM_PER_DEG_LAT * max(math.cos(math.radians(min(abs(lat) + self.cell_deg, 89.9))), 0.01)
+        max_ring = int(max_distance_km / cell_km) + 1
+
+        best, best_km = None, math.inf
+        for ring in range(max_ring + 1):
+            if best is not None and best_km <= (ring - 1) * cell_km:
+                break
+            spans = []
+            for row in range(row0 - ring, row0 + ring + 1):
+                edge = abs(row - row0) == ring
+                for col in (range(col0 - ring, col0 + ring + 1) if edge else (col0 - ring, col0 + ring)):
+                    span = cells.get((row, col % self._lng_cells))
+                    if span:
+                        spans.append(span)
+            if not spans:
+                continue
+            candidates = np.concatenate([np.arange(begin, end) for begin, end in spans])
+            distances = haversine_km(lat, lng, lats[candidates], lngs[candidates])
+            i = int(np.argmin(distances))
+            if distances[i] < best_km:
+                best, best_km = int(candidates[i]), float(distances[i])
+
+        if best is None or best_km > max_distance_km:
+            return None
+        return {
+            'adm4': codes[best].decode('ascii'),
+            'name': names[best],
+            'lat': float(lats[best]),
+            'lng': float(lngs[best]),
+            'distance_km': round(best_km, 3)
+        }
+
+    def stats(self):
+        codes, _, _, _, cells = self._data
+        return {
+            "locations": len(codes),
+            "cells": len(cells),
+            "cell_deg": self.cell_deg,
+            "source": self.source,
+            "build_ms": round(self._build_ms, 1)
+        }
+
+
+adm4_index = Adm4Index()
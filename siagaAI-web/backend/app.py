@@ -20,16 +20,38 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import re
+import math
+import atexit
 import json
+import hashlib
 import random
-import requests
-import xml.etree.ElementTree as ET
+import threading
+import time
 from datetime import datetime
 from datetime import timedelta
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 # Import auth module
 from auth import register_auth_routes
 from admin import register_admin_routes
+from jobs import register_job_routes
+from batching import MicroBatcher
+from shm_ring import CLASSIFIER_PROCESSES, CLASSIFIER_RESULT_TIMEOUT, ProcessClassifierPool, RingFull, WorkerLost
+from bmkg_cache import bmkg_cache
+from bmkg_snapshot import BMKG_SNAPSHOT_INTERVAL, bmkg_snapshot
+from earthquake_store import earthquake_store
+from forecast_store import forecast_store
+from early_warnings import WarningCityIndex, early_warnings
+from quake_impact import QuakeImpactIndex
+from circuit_breaker import CircuitOpen, breakers
+from singleflight import flights
+from http_client import HTTP_CONNECT_TIMEOUT, HTTP_MAX_RETRIES, http_client
+from bmkg_scheduler import BMKG_SCHEDULER_ENABLED, REFRESH_INTERVALS, bmkg_scheduler
+from refresh_priority import FEED_PRIORITY, QUAKE_HAZARD_SECONDS, refresh_priority
+from adm4_index import adm4_index
+from geo_catalog import GeoCatalog
 
 # Load environment variables
 load_dotenv()
@@ -87,6 +109,51 @@ BMKG_CITY_CODES = {
     "pekanbaru": "14.71.01.1001",
 }
 
+# Nama lain dan kabupaten sekitar kota yang dipakai teks peringatan dini BMKG
+# (kabupaten yang namanya sama dengan kotanya, mis. Kab. Bogor, sudah cocok lewat nama kota)
+CITY_REGION_ALIASES = {
+    "jakarta": ["Kepulauan Seribu"],
+    "yogyakarta": ["Jogja", "Jogjakarta", "Sleman", "Bantul"],
+    "solo": ["Surakarta", "Sukoharjo", "Karanganyar"],
+    "denpasar": ["Badung", "Gianyar"],
+    "medan": ["Deli Serdang", "Binjai"],
+    "makassar": ["Gowa", "Maros"],
+    "palembang": ["Banyuasin"],
+    "pontianak": ["Kubu Raya", "Mempawah"],
+    "banjarmasin": ["Banjarbaru", "Barito Kuala"],
+    "pekanbaru": ["Kampar", "Siak"],
+    "padang": ["Pesisir Selatan"],
+    "depok": ["Cimanggis"],
+}
+
+# Index kota -> peringatan dini aktif, diperbarui setiap RSS nowcast di-ingest
+warning_index = WarningCityIndex(INDONESIAN_CITIES, CITY_REGION_ALIASES)
+early_warnings.add_listener(warning_index.update)
+
+# Kode adm4 untuk kota yang tidak ada di BMKG_CITY_CODES (Jakarta)
+DEFAULT_BMKG_CODE = "31.71.01.1001"
+
+def group_cities_by_bmkg_code():
+    """Kode adm4 -> daftar ID kota (beberapa kota bisa berbagi satu kode)."""
+    groups = {}
+    for city in INDONESIAN_CITIES:
+        groups.setdefault(BMKG_CITY_CODES.get(city['id'], DEFAULT_BMKG_CODE), []).append(city['id'])
+    return groups
+
+BMKG_CODE_CITIES = group_cities_by_bmkg_code()
+
+# Fetch paralel untuk /api/weather/bulk
+WEATHER_BULK_WORKERS = int(os.getenv('WEATHER_BULK_WORKERS', '20'))
+weather_bulk_executor = ThreadPoolExecutor(max_workers=WEATHER_BULK_WORKERS, thread_name_prefix='weather-bulk')
+
+# Kode adm4 dari query koordinat tanpa job scheduler: cache dan prakiraannya dibatasi (LRU)
+BMKG_ADHOC_MAX_CODES = int(os.getenv('BMKG_ADHOC_MAX_CODES', '1000'))
+
+# Base URL sumber data BMKG; arahkan ke bmkg_standin.py untuk uji beban/latensi offline
+BMKG_API_BASE_URL = os.getenv('BMKG_API_BASE_URL', 'https://api.bmkg.go.id').rstrip('/')
+BMKG_DATA_BASE_URL = os.getenv('BMKG_DATA_BASE_URL', 'https://data.bmkg.go.id').rstrip('/')
+BMKG_ALERTS_BASE_URL = os.getenv('BMKG_ALERTS_BASE_URL', 'https://www.bmkg.go.id').rstrip('/')
+
 # BMKG API Headers
 BMKG_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -98,6 +165,41 @@ BMKG_HEADERS = {
 
 # ==================== BMKG API Functions ====================
 
+def fetch_bmkg_url(url, breaker_name, parse_fn, **kwargs):
+    """
+    Fetch satu URL BMKG melalui single-flight, circuit breaker dan conditional GET.
+    
+    Args:
+        url (str): URL feed BMKG
+        breaker_name (str): Nama circuit breaker endpoint ini
+        parse_fn (callable): Parser response 200 -> data (None jika tidak valid)
+        **kwargs: Diteruskan ke http_client (mis. stream=True)
+    
+    Returns:
+        Data hasil parse, atau None jika gagal / breaker sedang open
+    
+    Notes:
+        - Request bersamaan untuk URL yang sama digabung menjadi satu fetch
+          (singleflight.py); semua pemanggil menerima hasil atau error yang sama
+        - Jika BMKG menjawab 304, hasil parse sebelumnya dipakai ulang
+        - Breaker hanya menghitung error koneksi/timeout dan 5xx; 4xx atau
+          hasil parse None (mis. kode wilayah tidak dikenal) berarti BMKG
+          tetap menjawab, sehingga tidak membuka breaker untuk kota lain
+    """
+    def fetch():
+        # Wrapped so a None parse result reads as "BMKG answered" to the breaker
+        return (http_client.get_conditional(url, parse_fn, headers=BMKG_HEADERS, **kwargs),)
+    
+    try:
+        return flights.do(url, lambda: breakers.get(breaker_name).call(fetch))[0]
+    except CircuitOpen:
+        # Fail fast while BMKG is known to be down; callers serve stale data
+        pass
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+    
+    return None
+
 def fetch_bmkg_weather(city_id):
     """
     Mengambil data cuaca langsung dari API BMKG.
@@ -110,25 +212,136 @@ def fetch_bmkg_weather(city_id):
     
     Notes:
         - Menggunakan endpoint API BMKG untuk prakiraan cuaca
+        - Data dibaca dari snapshot yang disegarkan scheduler background
+          (bmkg_scheduler.py), atau dari cache TTL jika scheduler mati;
+          ditambah field fetched_at, expires_at dan cache_age
+        - Setiap request menaikkan popularitas lokasi sehingga scheduler
+          menyegarkannya lebih sering (refresh_priority.py)
         - Jika API gagal, akan mengembalikan data cuaca simulasi (fallback)
         - Data mencakup: suhu, kelembaban, kecepatan angin, arah angin, deskripsi cuaca
     """
-    bmkg_code = BMKG_CITY_CODES.get(city_id, "31.71.01.1001")
-    url = f"https://api.bmkg.go.id/publik/prakiraan-cuaca?adm4={bmkg_code}"
+    bmkg_code = BMKG_CITY_CODES.get(city_id, DEFAULT_BMKG_CODE)
+    refresh_priority.record(bmkg_code)
     
-    try:
-        response = requests.get(url, headers=BMKG_HEADERS, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            result = parse_bmkg_weather_data(data)
-            if result:
-                return result
-    except Exception as e:
-        print(f"Error fetching BMKG weather: {e}")
+    entry = read_bmkg_feed('weather', bmkg_code, lambda: fetch_bmkg_weather_live(bmkg_code))
+    if entry:
+        return {**entry.value, **entry.freshness()}
     
     # Fallback: return simulated weather data if BMKG fails
     return get_fallback_weather(city_id)
 
+def fetch_bmkg_weather_at(bmkg_code):
+    """
+    Mengambil data cuaca untuk kode adm4 sembarang (hasil adm4_index).
+    
+    Args:
+        bmkg_code (str): Kode wilayah adm4 BMKG
+    
+    Returns:
+        dict: Data cuaca dengan info kesegaran, atau None jika belum tersedia
+    
+    Notes:
+        - Kode yang punya job scheduler dibaca dari snapshot seperti
+          fetch_bmkg_weather; kode lain memakai cache TTL (stale-while-
+          revalidate), sehingga hanya request pertama per kode yang menunggu BMKG
+        - Kode tanpa job disimpan paling banyak BMKG_ADHOC_MAX_CODES (LRU) di
+          cache dan forecast_store, dan tidak ikut snapshot
+    """
+    if bmkg_scheduler.has_job(f"weather:{bmkg_code}"):
+        refresh_priority.record(bmkg_code)
+        entry = read_bmkg_feed('weather', bmkg_code, partial(fetch_bmkg_weather_live, bmkg_code))
+    else:
+        entry = bmkg_cache.get_or_fetch('weather', bmkg_code, partial(fetch_bmkg_weather_live, bmkg_code))
+    return {**entry.value, **entry.freshness()} if entry else None
+
+def is_scheduled_bmkg_code(bmkg_code):
+    """True jika kode adm4 punya job refresh di scheduler (kode per kota)."""
+    return bmkg_scheduler.has_job(f"weather:{bmkg_code}")
+
+def city_adm4_rows():
+    """
+    Baris katalog adm4 dari kode per kota, pengganti jika tidak ada file katalog.
+    
+    Notes:
+        - Kota tanpa kode di BMKG_CITY_CODES tidak dimasukkan; kode default
+          (Jakarta) bukan cuaca kota tersebut, jadi koordinat di sana lebih
+          baik dianggap di luar cakupan (404)
+    """
+    return [(BMKG_CITY_CODES[city['id']], city['name'], city['lat'], city['lng'])
+            for city in INDONESIAN_CITIES if city['id'] in BMKG_CITY_CODES]
+
+def fetch_bmkg_weather_bulk(city_ids):
+    """
+    Mengambil data cuaca banyak kota sekaligus.
+    
+    Args:
+        city_ids (list): Daftar ID kota
+    
+    Returns:
+        dict: {city_id: data cuaca} dengan format sama seperti fetch_bmkg_weather
+    
+    Notes:
+        - Kode adm4 yang sama hanya diambil sekali
+        - Data yang sudah ada di cache/snapshot langsung dipakai; sisanya
+          di-fetch ke BMKG secara paralel (maks WEATHER_BULK_WORKERS), sehingga
+          waktu total kira-kira sama dengan satu fetch paling lambat
+        - Kota yang gagal di-fetch mendapat data fallback masing-masing
+    """
+    codes = {city_id: BMKG_CITY_CODES.get(city_id, DEFAULT_BMKG_CODE) for city_id in city_ids}
+    
+    entries = {}
+    missing = []
+    for bmkg_code in dict.fromkeys(codes.values()):
+        if bmkg_scheduler.running:
+            entries[bmkg_code] = bmkg_cache.peek('weather', bmkg_code)
+        else:
+            entries[bmkg_code] = bmkg_cache.get('weather', bmkg_code)
+            if entries[bmkg_code] is None:
+                missing.append(bmkg_code)
+    
+    futures = {
+        bmkg_code: weather_bulk_executor.submit(
+            bmkg_cache.get_or_fetch, 'weather', bmkg_code, partial(fetch_bmkg_weather_live, bmkg_code)
+        )
+        for bmkg_code in missing
+    }
+    for bmkg_code, future in futures.items():
+        entries[bmkg_code] = future.result()
+    
+    results = {}
+    for city_id, bmkg_code in codes.items():
+        entry = entries.get(bmkg_code)
+        results[city_id] = {**entry.value, **entry.freshness()} if entry else get_fallback_weather(city_id)
+    return results
+
+def fetch_bmkg_weather_live(bmkg_code):
+    """
+    Mengambil prakiraan cuaca langsung dari BMKG tanpa cache.
+    
+    Args:
+        bmkg_code (str): Kode wilayah adm4 BMKG
+    
+    Returns:
+        dict: Data cuaca yang sudah diparse, atau None jika gagal
+    """
+    url = f"{BMKG_API_BASE_URL}/publik/prakiraan-cuaca?adm4={bmkg_code}"
+    
+    return fetch_bmkg_url(url, 'bmkg_weather', partial(parse_bmkg_weather_response, bmkg_code))
+
+def parse_bmkg_weather_response(bmkg_code, response):
+    """
+    Parse response prakiraan BMKG dan perbarui deret prakiraan lokasinya.
+    
+    Returns:
+        dict: Data cuaca saat ini (parse_bmkg_weather_data), atau None
+    
+    Notes:
+        - JSON hanya diparse sekali per fetch; 304 tidak memanggil fungsi ini
+    """
+    data = response.json()
+    forecast_store.update(bmkg_code, extract_bmkg_cuaca(data))
+    return parse_bmkg_weather_data(data)
+
 def get_fallback_weather(city_id):
     """
     Mengembalikan data cuaca alternatif ketika BMKG tidak tersedia.
@@ -146,7 +359,7 @@ def get_fallback_weather(city_id):
         - Sore: Musim hujan, hujan sedang
         - Malam/Malam hari: Berawan
     """
-    city_name = next((c['name'] for c in INDONESIAN_CITIES if c['id'] == city_id), 'Unknown')
+    city_name = geo_catalog.city(city_id, {'name': 'Unknown'})['name']
     
     # Get realistic weather based on time of day (Indonesia timezone)
     import random
@@ -217,6 +430,57 @@ def get_fallback_weather(city_id):
         'city': city_name
     }
 
+def extract_bmkg_cuaca(data):
+    """
+    Mencari daftar prakiraan (cuaca) di dalam response BMKG.
+    
+    Args:
+        data (dict/list): Response dari API BMKG
+    
+    Returns:
+        list: Field cuaca (list per hari berisi slot 3 jam), atau list kosong
+    
+    Notes:
+        - Menangani berbagai format response dari BMKG
+    """
+    if not data:
+        return []
+    
+    # BMKG API response may have different structures
+    # Try to find the cuaca (weather) data in the response
+    cuaca_data = []
+    
+    # Handle various response formats from BMKG
+    if isinstance(data, dict):
+        # Try different keys
+        if 'data' in data and isinstance(data['data'], list):
+            for item in data['data']:
+                if isinstance(item, dict) and 'cuaca' in item:
+                    cuaca_data = item['cuaca']
+                    break
+                elif isinstance(item, list):
+                    # Check if it's a list of cuaca data
+                    for sub_item in item:
+                        if isinstance(sub_item, dict) and 'cuaca' in sub_item:
+                            cuaca_data = sub_item['cuaca']
+                            break
+                    if cuaca_data:
+                        break
+        elif 'cuaca' in data:
+            cuaca_data = data['cuaca']
+    elif isinstance(data, list):
+        # Data is directly a list
+        for item in data:
+            if isinstance(item, dict):
+                if 'cuaca' in item:
+                    cuaca_data = item['cuaca']
+                    break
+                elif 'weather' in item:
+                    cuaca_data = item['weather']
+                    break
+    
+    return cuaca_data
+
 def parse_bmkg_weather_data(data):
     """
     Mem-parse data cuaca BMKG ke format aplikasi kita.
@@ -230,46 +494,12 @@ def parse_bmkg_weather_data(data):
     
     Notes:
         - Menangani berbagai format response dari BMKG
-        - Mencoba beberapa struktur data yang berbeda
+        - Mencoba beberapa struktur data yang berbeda (extract_bmkg_cuaca)
         - Mengambil data cuaca (cuaca) dari respons
+        - Deret prakiraan lengkap disimpan terpisah di forecast_store
     """
     try:
-        if not data:
-            return None
-        
-        # BMKG API response may have different structures
-        # Try to find the cuaca (weather) data in the response
-        cuaca_data = []
-        
-        # Handle various response formats from BMKG
-        if isinstance(data, dict):
-            # Try different keys
-            if 'data' in data and isinstance(data['data'], list):
-                for item in data['data']:
-                    if isinstance(item, dict) and 'cuaca' in item:
-                        cuaca_data = item['cuaca']
-                        break
-                    elif isinstance(item, list):
-                        # Check if it's a list of cuaca data
-                        for sub_item in item:
-                            if isinstance(sub_item, dict) and 'cuaca' in sub_item:
-                                cuaca_data = sub_item['cuaca']
-                                break
-                        if cuaca_data:
-                            break
-            elif 'cuaca' in data:
-                cuaca_data = data['cuaca']
-        elif isinstance(data, list):
-            # Data is directly a list
-            for item in data:
-                if isinstance(item, dict):
-                    if 'cuaca' in item:
-                        cuaca_data = item['cuaca']
-                        break
-                    elif 'weather' in item:
-                        cuaca_data = item['weather']
-                        break
-        
+        cuaca_data = extract_bmkg_cuaca(data)
         if not cuaca_data:
             return None
             
@@ -317,19 +547,107 @@ def fetch_bmkg_earthquake():
     Notes:
         - Menggunakan endpoint TEWS (Tsunami Early Warning System) BMKG
         - Mengambil data gempa bumi terbaru
+        - Dibaca dari snapshot feed 'autogempa'
     """
-    url = "https://data.bmkg.go.id/DataMKG/TEWS/autogempa.json"
+    entry = read_bmkg_feed('autogempa', 'latest', fetch_bmkg_earthquake_live)
+    if entry:
+        return {**entry.value, **entry.freshness()}
     
-    try:
-        response = requests.get(url, headers=BMKG_HEADERS, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return parse_bmkg_earthquake_data(data)
-    except Exception as e:
-        print(f"Error fetching BMKG earthquake: {e}")
+    return None
+
+def fetch_bmkg_earthquake_live():
+    """Mengambil autogempa.json langsung dari BMKG tanpa cache (None jika gagal) dan mencatatnya ke riwayat."""
+    url = f"{BMKG_DATA_BASE_URL}/DataMKG/TEWS/autogempa.json"
+    
+    quake = fetch_bmkg_url(url, 'bmkg_autogempa', lambda r: parse_bmkg_earthquake_data(r.json()))
+    if quake:
+        ingest_earthquakes([quake])
+    return quake
+
+def ingest_earthquakes(quakes):
+    """
+    Mencatat gempa ke riwayat dan menghitung dampak untuk gempa yang baru.
+    
+    Returns:
+        list: Gempa baru (record earthquake_store)
+    """
+    new_events = earthquake_store.ingest(quakes)
+    if new_events:
+        quake_impacts.ingest(new_events)
+        mark_quake_hazards(new_events)
+    return new_events
+
+def mark_quake_hazards(events):
+    """
+    Tandai lokasi cuaca yang merasakan gempa baru sebagai kritis.
     
+    Notes:
+        - Hanya gempa yang terjadi dalam QUAKE_HAZARD_SECONDS terakhir
+          (riwayat lama yang baru di-ingest tidak dihitung)
+        - Lokasi yang baru menjadi kritis langsung dijadwalkan refresh
+    """
+    now = time.time()
+    for event in events:
+        if not event.get('epoch') or now - event['epoch'] > QUAKE_HAZARD_SECONDS:
+            continue
+        impact = quake_impacts.get(event)
+        if not impact:
+            continue
+        remaining = QUAKE_HAZARD_SECONDS - (now - event['epoch'])
+        for city in impact['cities']:
+            bmkg_code = BMKG_CITY_CODES.get(city['id'], DEFAULT_BMKG_CODE)
+            reason = f"gempa M{event.get('magnitude')} {city['distance_km']} km"
+            if refresh_priority.mark_hazard(bmkg_code, remaining, reason):
+                bmkg_scheduler.run_now(f"weather:{bmkg_code}")
+
+def warning_hazard(bmkg_code):
+    """Judul peringatan dini aktif untuk kota-kota di kode adm4 ini, atau None."""
+    for city_id in BMKG_CODE_CITIES.get(bmkg_code, ()):
+        warnings = warning_index.get(city_id)
+        if warnings:
+            return f"peringatan dini: {warnings[0]['title']}"
     return None
 
+def refresh_warned_locations(added, removed):
+    """Listener early_warnings: segarkan cuaca kota yang baru mendapat peringatan."""
+    for warning in added:
+        for city_id in warning_index.cities_for(warning['id']):
+            bmkg_scheduler.run_now(f"weather:{BMKG_CITY_CODES.get(city_id, DEFAULT_BMKG_CODE)}")
+
+def unwrap_bmkg_gempa(data):
+    """
+    Mengambil isi 'gempa' dari response TEWS BMKG.
+    
+    Returns:
+        dict/list: Satu gempa (autogempa) atau daftar gempa (gempadirasakan),
+                   None jika struktur tidak dikenali
+    
+    Notes:
+        - Format BMKG: {"Infogempa": {"gempa": ...}}; format lama tanpa
+          pembungkus Infogempa ('gempa' / 'Gempa') juga diterima
+    """
+    if not isinstance(data, dict):
+        return None
+    data = data.get('Infogempa', data)
+    if not isinstance(data, dict):
+        return None
+    return data.get('gempa', data.get('Gempa'))
+
+def parse_bmkg_quake_coordinates(g):
+    """
+    Mengambil (latitude, longitude) sebagai string dari satu record gempa BMKG.
+    
+    Notes:
+        - 'Coordinates' berformat "lat,lng" (format BMKG saat ini)
+        - 'point.coordinates' berformat "lng,lat" (format lama)
+    """
+    if g.get('Coordinates'):
+        parts = g['Coordinates'].split(',')
+        if len(parts) == 2:
+            return parts[0].strip(), parts[1].strip()
+    coords = g.get('point', {}).get('coordinates', '0,0').split(',')
+    return (coords[1].strip() if len(coords) > 1 else '0', coords[0].strip() if coords else '0')
+
 def parse_bmkg_earthquake_data(data):
     """
     Mem-parse data gempa bumi BMKG ke format aplikasi.
@@ -349,11 +667,12 @@ def parse_bmkg_earthquake_data(data):
               - shakemap: URL peta guncangan
     """
     try:
-        if not data or 'Gempa' not in data:
+        gempa = unwrap_bmkg_gempa(data)
+        g = gempa[0] if isinstance(gempa, list) and gempa else gempa
+        if not isinstance(g, dict):
             return None
-            
-        g = data['Gempa']
-        coords = g.get('point', {}).get('coordinates', '0,0').split(',')
+        
+        latitude, longitude = parse_bmkg_quake_coordinates(g)
         
         return {
             'source': 'BMKG',
@@ -362,8 +681,8 @@ def parse_bmkg_earthquake_data(data):
             'time': g.get('Jam', ''),
             'magnitude': g.get('Magnitude', 'N/A'),
             'depth': g.get('Kedalaman', 'N/A'),
-            'latitude': coords[1] if len(coords) > 1 else '0',
-            'longitude': coords[0] if len(coords) > 0 else '0',
+            'latitude': latitude,
+            'longitude': longitude,
             'location': g.get('Wilayah', 'Unknown'),
             'potential': g.get('Potensi', ''),
             'felt': g.get('Dirasakan', ''),
@@ -383,18 +702,20 @@ def fetch_bmkg_earthquakes_felt():
     Notes:
         - Mengambil data地震 yang dirasakan oleh masyarakat
         - Berguna untuk melihat aktivitas seismik terkini
+        - Dibaca dari snapshot feed 'gempadirasakan'
     """
-    url = "https://data.bmkg.go.id/DataMKG/TEWS/gempadirasakan.json"
-    
-    try:
-        response = requests.get(url, headers=BMKG_HEADERS, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return parse_bmkg_earthquakes_felt_data(data)
-    except Exception as e:
-        print(f"Error fetching BMKG earthquakes felt: {e}")
+    entry = read_bmkg_feed('gempadirasakan', 'latest', fetch_bmkg_earthquakes_felt_live)
+    return entry.value if entry else []
+
+def fetch_bmkg_earthquakes_felt_live():
+    """Mengambil gempadirasakan.json langsung dari BMKG tanpa cache (None jika gagal) dan mencatatnya ke riwayat."""
+    url = f"{BMKG_DATA_BASE_URL}/DataMKG/TEWS/gempadirasakan.json"
     
-    return []
+    earthquakes = fetch_bmkg_url(url, 'bmkg_gempadirasakan', lambda r: parse_bmkg_earthquakes_felt_data(r.json()))
+    if earthquakes:
+        # Oldest first so history seq follows event order
+        ingest_earthquakes(sorted(earthquakes, key=lambda q: q.get('datetime', '')))
+    return earthquakes
 
 def parse_bmkg_earthquakes_felt_data(data):
     """
@@ -412,19 +733,22 @@ def parse_bmkg_earthquakes_felt_data(data):
     """
     earthquakes = []
     try:
-        if not data or 'gempa' not in data:
+        gempa = unwrap_bmkg_gempa(data)
+        if isinstance(gempa, dict):
+            gempa = [gempa]
+        if not isinstance(gempa, list):
             return earthquakes
             
-        for g in data['gempa'][:15]:  # Max 15 earthquakes
-            coords = g.get('point', {}).get('coordinates', '0,0').split(',')
+        for g in gempa[:15]:  # Max 15 earthquakes
+            latitude, longitude = parse_bmkg_quake_coordinates(g)
             earthquakes.append({
                 'datetime': g.get('DateTime', ''),
                 'date': g.get('Tanggal', ''),
                 'time': g.get('Jam', ''),
                 'magnitude': g.get('Magnitude', 'N/A'),
                 'depth': g.get('Kedalaman', 'N/A'),
-                'latitude': coords[1] if len(coords) > 1 else '0',
-                'longitude': coords[0] if len(coords) > 0 else '0',
+                'latitude': latitude,
+                'longitude': longitude,
                 'location': g.get('Wilayah', 'Unknown'),
                 'felt': g.get('Dirasakan', '')
             })
@@ -438,56 +762,145 @@ def fetch_bmkg_early_warnings():
     Mengambil peringatan dini dari RSS feed BMKG.
     
     Returns:
-        list: Daftar peringatan dini BMKG
+        dict: {'version', 'warnings'} - daftar peringatan aktif siap saji
     
     Notes:
         - Mengambil dari endpoint nowcast/rss.xml
         - Berisi peringatan cuaca ekstrem dan bencana potensial
+        - Feed 'nowcast' hanya menjaga jadwal refresh; isinya di-ingest ke
+          early_warnings.py sehingga request tidak mem-parse XML sama sekali
     """
-    url = "https://www.bmkg.go.id/alerts/nowcast/id/rss.xml"
+    read_bmkg_feed('nowcast', 'latest', fetch_bmkg_early_warnings_live)
+    return early_warnings.snapshot()
+
+def fetch_city_warnings(city_id):
+    """
+    Peringatan dini aktif untuk satu kota.
     
-    try:
-        response = requests.get(url, headers=BMKG_HEADERS, timeout=10)
-        if response.status_code == 200:
-            return parse_bmkg_early_warnings(response.text)
-    except Exception as e:
-        print(f"Error fetching BMKG early warnings: {e}")
+    Returns:
+        list: Peringatan (terbaru dulu) dengan field match 'city' atau 'province'
+    
+    Notes:
+        - Pencocokan teks ke kota sudah dilakukan saat ingest; di sini hanya
+          satu lookup dict ke warning_index
+    """
+    fetch_bmkg_early_warnings()
+    return warning_index.get(city_id)
+
+def fetch_bmkg_early_warnings_live():
+    """
+    Mengambil RSS nowcast langsung dari BMKG dan meng-ingest peringatan baru.
+    
+    Returns:
+        int: Version daftar peringatan setelah ingest, atau None jika gagal
     
-    return []
+    Notes:
+        - Body dibaca streaming (stream=True) langsung oleh iterparse
+    """
+    url = f"{BMKG_ALERTS_BASE_URL}/alerts/nowcast/id/rss.xml"
+    
+    return fetch_bmkg_url(url, 'bmkg_nowcast', parse_bmkg_early_warnings, stream=True)
 
-def parse_bmkg_early_warnings(xml_content):
+def parse_bmkg_early_warnings(response):
     """
-    Mem-parse RSS feed peringatan dini BMKG.
+    Meng-ingest RSS peringatan dini BMKG dari response streaming.
     
     Args:
-        xml_content (str): Konten XML dari RSS feed BMKG
+        response (requests.Response): Response 200 dengan stream=True
     
     Returns:
-        list: Daftar peringatan dengan field: title, description, pubDate, link
+        int: Version daftar peringatan setelah ingest
     
     Notes:
-        - Menggunakan ElementTree untuk parsing XML
-        - Mengekstrak informasi dari setiap item di RSS
+        - Item yang sudah dikenal (guid/link sama) tidak diparse ulang
+        - XML rusak melempar error sehingga dihitung gagal oleh circuit breaker
     """
-    warnings = []
-    try:
-        root = ET.fromstring(xml_content)
-        for item in root.findall('.//item'):
-            title = item.find('title')
-            description = item.find('description')
-            pubDate = item.find('pubDate')
-            link = item.find('link')
-            
-            warnings.append({
-                'title': title.text if title is not None else '',
-                'description': description.text if description is not None else '',
-                'pubDate': pubDate.text if pubDate is not None else '',
-                'link': link.text if link is not None else ''
-            })
-    except Exception as e:
-        print(f"Error parsing BMKG early warnings: {e}")
+    # Let urllib3 undo gzip/deflate before the XML parser sees the bytes
+    response.raw.decode_content = True
+    return early_warnings.ingest_rss(response.raw)
+
+def bmkg_feed_freshness(feed, key='latest'):
+    """
+    Info kesegaran data cache sebuah feed BMKG untuk disertakan di response.
+    
+    Returns:
+        dict: fetched_at, expires_at, cache_age; kosong jika belum ada data
+    """
+    entry = bmkg_cache.peek(feed, key)
+    return entry.freshness() if entry else {}
+
+def read_bmkg_feed(feed, key, fetch_fn):
+    """
+    Membaca data feed BMKG untuk jalur request.
+    
+    Args:
+        feed (str): Nama feed ('weather', 'autogempa', 'gempadirasakan', 'nowcast')
+        key (str): Key cache (kode adm4 untuk cuaca, 'latest' untuk feed lain)
+        fetch_fn (callable): Fetch live, dipakai hanya jika scheduler mati
+    
+    Returns:
+        CacheEntry: Snapshot terbaru, atau None jika belum ada data
+    
+    Notes:
+        - Saat scheduler berjalan, request hanya membaca snapshot terakhir
+          (walau sudah lewat TTL) dan tidak pernah menunggu BMKG
+        - Tanpa scheduler, kembali ke pola cache TTL + fetch saat miss
+    """
+    if bmkg_scheduler.running:
+        return bmkg_cache.peek(feed, key)
+    return bmkg_cache.get_or_fetch(feed, key, fetch_fn)
+
+def register_bmkg_jobs(scheduler):
+    """
+    Mendaftarkan job refresh semua feed BMKG ke scheduler.
     
-    return warnings
+    Notes:
+        - Satu job cuaca per kode adm4 di BMKG_CITY_CODES (plus kode default)
+        - Setiap job menyimpan hasil fetch ke bmkg_cache; hasil gagal tidak
+          menimpa snapshot sebelumnya
+        - Job 'snapshot' menulis checkpoint ke file untuk warm start
+        - Interval job cuaca adaptif (refresh_priority.py); feed gempa dan
+          peringatan dini didahulukan saat budget request habis
+    """
+    def refresh_job(feed, key, fetch_fn):
+        return lambda: bmkg_cache.refresh(feed, key, fetch_fn) is not None
+    
+    def feed_priority():
+        return FEED_PRIORITY
+    
+    for bmkg_code in sorted(set(BMKG_CITY_CODES.values()) | {DEFAULT_BMKG_CODE}):
+        scheduler.add_job(
+            f"weather:{bmkg_code}",
+            REFRESH_INTERVALS['weather'],
+            refresh_job('weather', bmkg_code, partial(fetch_bmkg_weather_live, bmkg_code)),
+            interval_fn=partial(refresh_priority.interval, bmkg_code),
+            priority_fn=partial(refresh_priority.score, bmkg_code)
+        )
+    scheduler.add_job('autogempa', REFRESH_INTERVALS['autogempa'],
+                      refresh_job('autogempa', 'latest', fetch_bmkg_earthquake_live), priority_fn=feed_priority)
+    scheduler.add_job('gempadirasakan', REFRESH_INTERVALS['gempadirasakan'],
+                      refresh_job('gempadirasakan', 'latest', fetch_bmkg_earthquakes_felt_live), priority_fn=feed_priority)
+    scheduler.add_job('nowcast', REFRESH_INTERVALS['nowcast'],
+                      refresh_job('nowcast', 'latest', fetch_bmkg_early_warnings_live), priority_fn=feed_priority)
+    scheduler.add_job('snapshot', BMKG_SNAPSHOT_INTERVAL, bmkg_snapshot.save, cost=0)
+
+def configure_refresh_priority(priority):
+    """
+    Hubungkan prioritas refresh cuaca dengan sumber bahaya.
+    
+    Notes:
+        - Bobot statis: 0.1 per zona risiko tinggi (ringkasan geo_catalog)
+          di kota-kota kode adm4 tersebut
+        - Peringatan dini aktif dibaca langsung dari warning_index
+        - Request baru memajukan refresh terjadwal kode tersebut jika
+          interval-nya memendek (bmkg_scheduler.reschedule)
+    """
+    for bmkg_code, city_ids in BMKG_CODE_CITIES.items():
+        high_risk = sum(geo_catalog.summary(city_id)['high_risk'] for city_id in city_ids)
+        priority.set_static(bmkg_code, 0.1 * high_risk)
+    priority.hazard_fn = warning_hazard
+    priority.on_record = lambda bmkg_code: bmkg_scheduler.reschedule(f"weather:{bmkg_code}")
+    early_warnings.add_listener(refresh_warned_locations)
 
 # ==================== Risk Zones Data ====================
 
@@ -585,6 +998,9 @@ ADDITIONAL_RISK_ZONES = [
 # Merge additional data with main data
 RISK_ZONES = RISK_ZONES + ADDITIONAL_RISK_ZONES
 
+# Urutan level risiko zona, dari terendah
+RISK_LEVEL_ORDER = {'low': 0, 'medium': 1, 'high': 2}
+
 # ==================== Evacuation Points Data ====================
 
 EVACUATION_POINTS = [
@@ -668,6 +1084,62 @@ ADDITIONAL_EVACUATION = [
 
 EVACUATION_POINTS = EVACUATION_POINTS + ADDITIONAL_EVACUATION
 
+# Katalog kota, zona risiko dan titik evakuasi yang sudah di-index (dipakai semua route)
+geo_catalog = GeoCatalog(INDONESIAN_CITIES, RISK_ZONES, EVACUATION_POINTS)
+
+# Batas k dan jumlah titik query per request /api/evacuation/nearest
+EVACUATION_MAX_K = 50
+EVACUATION_BATCH_MAX = 1000
+
+# Dampak gempa ke kota, zona risiko dan titik evakuasi (dihitung saat ingest)
+quake_impacts = QuakeImpactIndex(geo_catalog)
+
+# ==================== HTTP Caching ====================
+
+# Cache-Control max-age (detik) untuk route GET publik, per nama endpoint
+ROUTE_MAX_AGE = {
+    'get_cities': 3600,
+    'get_evacuation': 3600,
+    'get_weather': 300,
+    'get_weather_bulk': 300,
+    'get_forecast': 300,
+    'get_risk': 300,
+    'get_risk_zones': 300,
+    'get_risk_point': 300,
+    'get_evacuation_nearest': 3600,
+    'get_earthquake': REFRESH_INTERVALS['autogempa'],
+    'get_earthquakes_felt': REFRESH_INTERVALS['gempadirasakan'],
+    'get_earthquake_history': REFRESH_INTERVALS['autogempa'],
+    'query_earthquakes': REFRESH_INTERVALS['autogempa'],
+    'get_early_warnings': REFRESH_INTERVALS['nowcast'],
+}
+
+# Field yang berubah di setiap response walau datanya sama; tidak ikut ETag
+VOLATILE_FIELDS = re.compile(rb'"(?:cache_age|fetched_at|expires_at|timestamp)":\s*(?:"[^"]*"|[^,}\]]+),?')
+
+@app.after_request
+def add_http_caching(response):
+    """
+    Menambahkan ETag dan Cache-Control ke response GET publik.
+    
+    Notes:
+        - ETag (weak) dihitung dari body tanpa field volatil (cache_age,
+          fetched_at, expires_at, timestamp), sehingga data yang sama
+          menghasilkan ETag yang sama walau snapshot baru saja disegarkan
+        - Client yang mengirim If-None-Match dengan ETag yang cocok
+          mendapat 304 tanpa body
+        - Hanya berlaku untuk endpoint di ROUTE_MAX_AGE
+    """
+    max_age = ROUTE_MAX_AGE.get(request.endpoint)
+    if max_age is None or request.method != 'GET' or response.status_code != 200 or response.is_streamed:
+        return response
+    
+    body = VOLATILE_FIELDS.sub(b'', response.get_data())
+    response.set_etag(hashlib.sha1(body).hexdigest(), weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
 # ==================== API Routes ====================
 
 @app.route('/')
@@ -689,11 +1161,22 @@ def index():
         "endpoints": {
             "cities": "/api/cities - List semua kota Indonesia",
             "weather": "/api/weather?city={city_id} - Data cuaca BMKG",
+            "weather_point": "/api/weather?lat=&lng= - Cuaca desa/kelurahan (adm4) terdekat",
+            "weather_bulk": "/api/weather/bulk?cities={a,b,c|all} - Cuaca banyak kota sekaligus",
+            "forecast": "/api/forecast?city={city_id}&hours=24 - Deret prakiraan cuaca dan ringkasan tren",
             "earthquake": "/api/earthquake - Gempa terakhir",
             "earthquakes_felt": "/api/earthquakes-felt - Gempa dirasakan",
+            "earthquake_history": "/api/earthquakes?since={cursor} - Riwayat gempa (delta)",
+            "earthquake_query": "/api/earthquakes/query?min_magnitude=&lat=&lng=&radius_km= - Cari riwayat gempa",
             "early_warnings": "/api/early-warnings - Peringatan dini",
+            "health": "/api/health - Status layanan, circuit breaker dan kesegaran data",
+            "bmkg_status": "/api/bmkg/status - Status ingest data BMKG",
+            "http_stats": "/api/http/stats - Metrik koneksi ke BMKG/HuggingFace",
             "evacuation": "/api/evacuation?city={city_id} - Titik evakuasi",
-            "risk-zones": "/api/risk-zones?city={city_id} - Zona risiko"
+            "evacuation_nearest": "/api/evacuation/nearest?lat=&lng=&k=5 - Titik evakuasi terdekat (POST untuk banyak titik)",
+            "risk-zones": "/api/risk-zones?city={city_id} - Zona risiko",
+            "risk_point": "/api/risk/point?lat=&lng=&radius_km=2 - Zona risiko yang memuat / dekat titik",
+            "assess_jobs": "/api/assess-damage/jobs - Penilaian kerusakan asinkron (poll/SSE)"
         }
     })
 
@@ -708,10 +1191,13 @@ def get_cities():
     Notes:
         - Mengembalikan 20 kota besar Indonesia
         - Setiap kota memiliki: id, name, lat, lng, province
+        - summary: jumlah zona risiko (per level dan tipe) dan titik evakuasi
+          per kota, dihitung sekali di geo_catalog
     """
     return jsonify({
-        "cities": INDONESIAN_CITIES,
-        "count": len(INDONESIAN_CITIES)
+        "cities": geo_catalog.cities,
+        "count": len(geo_catalog.cities),
+        "summary": geo_catalog.summaries()
     })
 
 @app.route('/api/weather', methods=['GET'])
@@ -721,14 +1207,36 @@ def get_weather():
     
     Query Parameters:
         city (str): ID kota (default: 'jakarta')
+        lat, lng (float): Alternatif city: koordinat titik (keduanya wajib bersama)
     
     Returns:
-        JSON: Data cuaca BMKG atau pesan error jika tidak tersedia
+        JSON: Data cuaca BMKG atau pesan error jika tidak tersedia; dengan
+              lat/lng ditambah field location (adm4, name, lat, lng, distance_km)
     
     Notes:
         - Parameter 'city' digunakan untuk memilih kota
-        - Jika API BMKG gagal, mengembalikan data fallback
+        - Dengan lat/lng, prakiraan diambil untuk desa/kelurahan (adm4)
+          terdekat dari adm4_index; 404 jika tidak ada adm4 dalam
+          ADM4_MAX_DISTANCE_KM, 503 jika BMKG belum bisa diambil
+        - Jika API BMKG gagal, mengembalikan data fallback (hanya mode city)
     """
+    if 'lat' in request.args or 'lng' in request.args:
+        try:
+            lat = float(request.args['lat'])
+            lng = float(request.args['lng'])
+        except (KeyError, ValueError):
+            return jsonify({"error": "lat dan lng harus diisi bersama dengan angka"}), 400
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+            return jsonify({"error": "lat/lng di luar rentang"}), 400
+        
+        location = adm4_index.nearest(lat, lng)
+        if location is None:
+            return jsonify({"error": "Lokasi di luar cakupan data BMKG"}), 404
+        weather = fetch_bmkg_weather_at(location['adm4'])
+        if weather is None:
+            return jsonify({"error": "Weather data tidak tersedia", "source": "BMKG API", "location": location}), 503
+        return jsonify({**weather, "location": location})
+    
     city = request.args.get('city', 'jakarta')
     
     weather = fetch_bmkg_weather(city.lower())
@@ -740,6 +1248,78 @@ def get_weather():
         "source": "BMKG API"
     })
 
+@app.route('/api/weather/bulk', methods=['GET'])
+def get_weather_bulk():
+    """
+    Mengambil data cuaca banyak kota dalam satu request.
+    
+    Query Parameters:
+        cities (str): ID kota dipisah koma, atau 'all' (default) untuk
+                      semua kota di INDONESIAN_CITIES
+    
+    Returns:
+        JSON: weather ({city_id: data cuaca}), count, dan unknown_cities
+              (ID yang tidak dikenal, tidak diproses)
+    """
+    cities_param = request.args.get('cities', 'all').strip().lower()
+    if cities_param in ('', 'all'):
+        city_ids = [c['id'] for c in geo_catalog.cities]
+        unknown = []
+    else:
+        requested = list(dict.fromkeys(c.strip() for c in cities_param.split(',') if c.strip()))
+        city_ids = [c for c in requested if geo_catalog.city(c)]
+        unknown = [c for c in requested if not geo_catalog.city(c)]
+    
+    weather = fetch_bmkg_weather_bulk(city_ids)
+    return jsonify({
+        "weather": weather,
+        "count": len(weather),
+        "unknown_cities": unknown
+    })
+
+@app.route('/api/forecast', methods=['GET'])
+def get_forecast():
+    """
+    Mengambil deret prakiraan cuaca sebuah kota.
+    
+    Query Parameters:
+        city (str): ID kota (default: 'jakarta')
+        hours (float): Panjang prakiraan ke depan dalam jam (default 24, maks 240)
+    
+    Returns:
+        JSON: slots (per 3 jam: suhu, kelembaban, angin, kode cuaca),
+              summary (min/max, tren suhu, cuaca dominan) dan info kesegaran
+    
+    Notes:
+        - Hanya memotong array forecast_store; data BMKG tidak diparse ulang
+        - 503 jika prakiraan kota ini belum pernah berhasil diambil
+    """
+    city = request.args.get('city', 'jakarta').lower()
+    try:
+        hours = float(request.args.get('hours', 24))
+    except ValueError as e:
+        return jsonify({"error": f"Parameter tidak valid: {e}"}), 400
+    # NaN slips through min/max clamping and would be echoed as invalid JSON
+    if not math.isfinite(hours):
+        return jsonify({"error": "hours harus angka finite"}), 400
+    hours = min(max(hours, 1.0), 240.0)
+    
+    bmkg_code = BMKG_CITY_CODES.get(city, DEFAULT_BMKG_CODE)
+    refresh_priority.record(bmkg_code)
+    # Fills the series through the normal cache path when the scheduler is off
+    read_bmkg_feed('weather', bmkg_code, partial(fetch_bmkg_weather_live, bmkg_code))
+    forecast = forecast_store.window(bmkg_code, hours)
+    if forecast is None:
+        return jsonify({"error": "Prakiraan cuaca belum tersedia", "source": "BMKG API"}), 503
+    
+    return jsonify({
+        "city": city,
+        "hours": hours,
+        **forecast,
+        "count": len(forecast['slots']),
+        **bmkg_feed_freshness('weather', bmkg_code)
+    })
+
 @app.route('/api/earthquake', methods=['GET'])
 def get_earthquake():
     """
@@ -751,9 +1331,12 @@ def get_earthquake():
     Notes:
         - Mengambil data dari TEWS (Tsunami Early Warning System)
         - Incluye magnitudo, kedalaman, lokasi, dan info dirasakan
+        - Field 'impact': kota, zona risiko dan titik evakuasi terdampak,
+          dihitung saat gempa di-ingest (quake_impact.py)
     """
     earthquake = fetch_bmkg_earthquake()
     if earthquake:
+        earthquake['impact'] = quake_impacts.get(earthquake)
         return jsonify(earthquake)
     
     return jsonify({
@@ -761,6 +1344,121 @@ def get_earthquake():
         "source": "BMKG API"
     })
 
+@app.route('/api/earthquakes', methods=['GET'])
+def get_earthquake_history():
+    """
+    Mengambil riwayat gempa secara bertahap (delta).
+    
+    Query Parameters:
+        since (int): Cursor terakhir yang sudah diterima client (default 0 = dari awal)
+        limit (int): Jumlah maksimum gempa per response (default 100, maks 1000)
+    
+    Returns:
+        JSON: events (gempa dengan seq > since, urut lama ke baru), cursor
+              (kirim sebagai since= berikutnya), has_more, count
+    
+    Notes:
+        - Riwayat dikumpulkan dari autogempa dan gempadirasakan, tanpa
+          duplikat, dan tetap tersimpan setelah restart
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError:
+        return jsonify({"error": "since dan limit harus berupa angka"}), 400
+    if since < 0 or limit < 1:
+        return jsonify({"error": "since harus >= 0 dan limit >= 1"}), 400
+    
+    events, cursor, has_more = earthquake_store.since(since, limit)
+    return jsonify({
+        "events": events,
+        "count": len(events),
+        "cursor": cursor,
+        "has_more": has_more
+    })
+
+def parse_time_param(value):
+    """
+    Parameter waktu query -> epoch detik.
+    
+    Args:
+        value (str): Epoch (angka) atau ISO 8601 ('2024-05-14T12:00:00+00:00');
+                     ISO tanpa zona waktu dianggap waktu lokal server
+    
+    Raises:
+        ValueError: Jika format tidak dikenali
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/earthquakes/query', methods=['GET'])
+def query_earthquakes():
+    """
+    Mencari riwayat gempa dengan filter.
+    
+    Query Parameters:
+        min_magnitude, max_magnitude (float): Rentang magnitudo
+        min_depth, max_depth (float): Rentang kedalaman (km)
+        start, end (str): Rentang waktu, epoch atau ISO 8601
+        hours (float): Alternatif start: hanya N jam terakhir
+        lat, lng, radius_km (float): Gempa dalam radius dari titik (ketiganya wajib bersama)
+        sort (str): time (default, terbaru dulu), magnitude, atau distance (butuh radius)
+        limit (int): Jumlah maksimum hasil (default 100, maks 1000)
+    
+    Returns:
+        JSON: events (bertipe: magnitude, depth_km, latitude, longitude, epoch;
+              distance_km jika radius dipakai), count, total_matches
+    
+    Notes:
+        - Semua angka wajib finite (NaN/inf -> 400); lat -90..90,
+          lng -180..180 dan radius_km >= 0
+    """
+    args = request.args
+    try:
+        filters = {}
+        for name in ('min_magnitude', 'max_magnitude', 'min_depth', 'max_depth', 'lat', 'lng', 'radius_km'):
+            if args.get(name) not in (None, ''):
+                filters[name] = float(args[name])
+        if args.get('start'):
+            filters['start'] = parse_time_param(args['start'])
+        if args.get('end'):
+            filters['end'] = parse_time_param(args['end'])
+        if args.get('hours'):
+            hours = float(args['hours'])
+            if not math.isfinite(hours):
+                raise ValueError(f"hours harus angka finite: {args['hours']}")
+            filters['start'] = datetime.now().timestamp() - hours * 3600
+        limit = min(int(args.get('limit', 100)), 1000)
+    except ValueError as e:
+        return jsonify({"error": f"Parameter tidak valid: {e}"}), 400
+    # NaN/inf would reach the grid index (math.floor) or silently match nothing
+    for name, value in filters.items():
+        if not math.isfinite(value):
+            return jsonify({"error": f"{name} harus angka finite"}), 400
+    
+    radius_params = [name for name in ('lat', 'lng', 'radius_km') if name in filters]
+    if radius_params and len(radius_params) != 3:
+        return jsonify({"error": "lat, lng dan radius_km harus diisi bersama"}), 400
+    if radius_params:
+        if not (-90.0 <= filters['lat'] <= 90.0 and -180.0 <= filters['lng'] <= 180.0):
+            return jsonify({"error": "lat/lng di luar rentang"}), 400
+        if filters['radius_km'] < 0:
+            return jsonify({"error": "radius_km harus angka >= 0"}), 400
+    sort = args.get('sort', 'time')
+    if sort not in ('time', 'magnitude', 'distance') or (sort == 'distance' and not radius_params):
+        return jsonify({"error": "sort harus time, magnitude, atau distance (dengan radius)"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit harus >= 1"}), 400
+    
+    events, total = earthquake_store.query(sort=sort, limit=limit, **filters)
+    return jsonify({
+        "events": events,
+        "count": len(events),
+        "total_matches": total
+    })
+
 @app.route('/api/earthquakes-felt', methods=['GET'])
 def get_earthquakes_felt():
     """
@@ -776,7 +1474,8 @@ def get_earthquakes_felt():
     earthquakes = fetch_bmkg_earthquakes_felt()
     return jsonify({
         "earthquakes": earthquakes,
-        "count": len(earthquakes)
+        "count": len(earthquakes),
+        **bmkg_feed_freshness('gempadirasakan')
     })
 
 @app.route('/api/early-warnings', methods=['GET'])
@@ -784,17 +1483,96 @@ def get_early_warnings():
     """
     Mengambil peringatan dini dari BMKG.
     
+    Query Parameters:
+        city (str): ID kota (opsional, hanya peringatan untuk kota ini)
+    
     Returns:
-        JSON: Dictionary dengan daftar peringatan dan jumlah total
+        JSON: Dictionary dengan daftar peringatan, jumlah total dan version
     
     Notes:
         - Mengambil dari RSS feed BMKG
         - Berisi peringatan cuaca ekstrem
+        - version naik setiap ada peringatan baru atau yang berakhir
     """
-    warnings = fetch_bmkg_early_warnings()
+    snapshot = fetch_bmkg_early_warnings()
+    warnings = snapshot['warnings']
+    city = request.args.get('city')
+    if city:
+        warnings = warning_index.get(city.lower())
     return jsonify({
         "warnings": warnings,
-        "count": len(warnings)
+        "count": len(warnings),
+        "version": snapshot['version'],
+        **bmkg_feed_freshness('nowcast')
+    })
+
+@app.route('/api/bmkg/status', methods=['GET'])
+def get_bmkg_status():
+    """
+    Status ingest BMKG di background.
+    
+    Returns:
+        JSON: Status scheduler (per job: last_run, last_success, failures,
+              budget), statistik cache per feed, status checkpoint snapshot
+              prioritas refresh per kode adm4 dan index adm4
+    """
+    return jsonify({
+        "scheduler": bmkg_scheduler.stats(),
+        "cache": bmkg_cache.stats(),
+        "snapshot": bmkg_snapshot.stats(),
+        "refresh_priority": refresh_priority.stats(),
+        "adm4_index": adm4_index.stats()
+    })
+
+@app.route('/api/health', methods=['GET'])
+def get_health():
+    """
+    Health check layanan dan sumber data eksternal.
+    
+    Returns:
+        JSON: status ('ok' atau 'degraded'), state circuit breaker per
+              endpoint eksternal, kesegaran setiap feed BMKG, dan ringkasan
+              cache cuaca
+    
+    Notes:
+        - Selalu HTTP 200 selama aplikasi hidup; BMKG yang down membuat
+          status 'degraded' (data lama tetap disajikan), bukan error
+        - 'degraded' jika ada breaker yang tidak closed, atau feed yang
+          belum punya data / sudah stale
+        - Cuaca hanya menilai kode yang dipin (punya job scheduler); kode
+          ad-hoc dari /api/weather?lat=&lng= tidak disegarkan scheduler
+    """
+    feeds = {feed: bmkg_feed_freshness(feed) or None for feed in ('autogempa', 'gempadirasakan', 'nowcast')}
+    breaker_stats = breakers.stats()
+    weather_stats = bmkg_cache.stats().get('weather', {'entries': 0, 'fresh': 0, 'pinned_entries': 0, 'pinned_fresh': 0})
+    
+    degraded = (
+        any(b['state'] != 'closed' for b in breaker_stats.values())
+        or any(info is None or info['stale'] for info in feeds.values())
+        or weather_stats['pinned_fresh'] < weather_stats['pinned_entries']
+    )
+    
+    return jsonify({
+        "status": "degraded" if degraded else "ok",
+        "breakers": breaker_stats,
+        "feeds": feeds,
+        "weather": weather_stats,
+        "scheduler_running": bmkg_scheduler.running,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/http/stats', methods=['GET'])
+def get_http_stats():
+    """
+    Metrik koneksi keluar per host (BMKG, HuggingFace).
+    
+    Returns:
+        JSON: Per host: requests, errors, retries, avg/p50/p95/max latensi (ms),
+              plus statistik single-flight (fetch dijalankan vs. digabung)
+    """
+    return jsonify({
+        "hosts": http_client.stats(),
+        "singleflight": flights.stats()
     })
 
 @app.route('/api/risk', methods=['GET'])
@@ -822,27 +1600,33 @@ def get_risk():
         - Jika ada zone risiko tinggi, level menjadi 'red'
         - Jika ada zone risiko sedang, level menjadi 'orange'
         - Jika tidak ada zone risiko, level menjadi 'green'
+        - Peringatan dini BMKG yang aktif untuk kota ini disertakan di
+          active_warnings dan menaikkan level 'green' menjadi 'orange'
     """
-    city = request.args.get('city', 'jakarta')
-    city_info = next((c for c in INDONESIAN_CITIES if c['id'] == city), INDONESIAN_CITIES[0])
+    city = request.args.get('city', 'jakarta').lower()
+    city_info = geo_catalog.city(city, geo_catalog.default_city)
     
     weather = fetch_bmkg_weather(city)
     
-    # Get risk zones for this city
-    city_zones = [z for z in RISK_ZONES if z['city'] == city.lower()]
-    high_risk_count = len([z for z in city_zones if z['risk'] == 'high'])
+    # Get risk zone counts for this city
+    summary = geo_catalog.summary(city)
+    high_risk_count = summary['high_risk']
     
     # Determine overall risk level
     if high_risk_count > 0:
         alert_level = 'red'
         flood_risk = 'high'
-    elif len(city_zones) > 0:
+    elif summary['risk_zones'] > 0:
         alert_level = 'orange'
         flood_risk = 'medium'
     else:
         alert_level = 'green'
         flood_risk = 'low'
     
+    active_warnings = fetch_city_warnings(city_info['id'])
+    if active_warnings and alert_level == 'green':
+        alert_level = 'orange'
+    
     # Generate recommendations based on risk level
     recommendations = []
     if alert_level == 'red':
@@ -871,9 +1655,12 @@ def get_risk():
     
     descriptions = {
         'red': f'Peringatan! Tingkat risiko tinggi untuk kota {city_info["name"]}. Terdapat {high_risk_count} zona risiko tinggi. Segera lakukan evacuate jika diperlukan.',
-        'orange': f'Peringatan Waspada untuk kota {city_info["name"]}. Terdapat {len(city_zones)} zona risiko. Tetap waspada.',
+        'orange': f'Peringatan Waspada untuk kota {city_info["name"]}. Terdapat {summary["risk_zones"]} zona risiko. Tetap waspada.',
         'green': f'Kondisi aman untuk kota {city_info["name"]}. Tidak ada zona risiko tinggi.'
     }
+    description = descriptions[alert_level]
+    if active_warnings:
+        description += f' Ada {len(active_warnings)} peringatan dini BMKG aktif: {active_warnings[0]["title"]}.'
     
     return jsonify({
         "city": city_info["name"],
@@ -881,12 +1668,75 @@ def get_risk():
         "alert_level": alert_level,
         "flood_risk": flood_risk,
         "landslide_risk": flood_risk,
-        "description": descriptions[alert_level],
+        "description": description,
         "recommendations": recommendations,
         "weather": weather,
+        "active_warnings": active_warnings,
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/risk/point', methods=['GET'])
+def get_risk_point():
+    """
+    Mengambil zona risiko yang memuat atau berada dekat sebuah titik.
+    
+    Query Parameters:
+        lat, lng (float): Koordinat titik (wajib)
+        radius_km (float): Jarak maksimum dari tepi zona untuk 'nearby'
+                           (default 2, dibatasi 50; harus angka >= 0)
+        limit (int): Jumlah maksimum zona nearby (default 50, maks 500;
+                     tidak boleh negatif)
+    
+    Returns:
+        JSON: risk_level (level tertinggi zona yang memuat titik, atau 'none'),
+              inside (zona yang memuat titik), nearby (zona di sekitar, urut
+              dari tepi terdekat); setiap zona ditambah distance_km (ke pusat)
+              dan edge_distance_km (ke tepi, 0 jika di dalam)
+    
+    Notes:
+        - Memakai geo_catalog.zone_index (grid); jarak tepat dihitung dengan haversine
+    """
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        radius_km = float(request.args.get('radius_km', 2))
+        limit = int(request.args.get('limit', 50))
+    except KeyError:
+        return jsonify({"error": "lat dan lng wajib diisi"}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Parameter tidak valid: {e}"}), 400
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return jsonify({"error": "lat/lng di luar rentang"}), 400
+    # NaN slips through min/max clamping, so check it explicitly
+    if not math.isfinite(radius_km) or radius_km < 0:
+        return jsonify({"error": "radius_km harus angka >= 0"}), 400
+    if limit < 0:
+        return jsonify({"error": "limit tidak boleh negatif"}), 400
+    radius_km = min(radius_km, 50.0)
+    limit = min(limit, 500)
+    
+    rows, center_km, edge_km = geo_catalog.zone_index.query(lat, lng, radius_km)
+    inside = []
+    nearby = []
+    for row, center, edge in zip(rows.tolist(), center_km.tolist(), edge_km.tolist()):
+        zone = {**geo_catalog.risk_zones[row], "distance_km": round(center, 3), "edge_distance_km": round(max(edge, 0.0), 3)}
+        if edge <= 0:
+            inside.append(zone)
+        elif len(nearby) < limit:
+            nearby.append(zone)
+    
+    risk_level = max((z['risk'] for z in inside), key=lambda r: RISK_LEVEL_ORDER.get(r, -1), default='none')
+    return jsonify({
+        "lat": lat,
+        "lng": lng,
+        "radius_km": radius_km,
+        "risk_level": risk_level,
+        "inside": inside,
+        "nearby": nearby,
+        "count_inside": len(inside),
+        "count_nearby": len(nearby)
+    })
+
 @app.route('/api/evacuation', methods=['GET'])
 def get_evacuation():
     """
@@ -903,17 +1753,85 @@ def get_evacuation():
         - Setiap titik memiliki kapasitas maksimum pengungsi
     """
     city = request.args.get('city', None)
-    
-    if city:
-        points = [p for p in EVACUATION_POINTS if p['city'] == city.lower()]
-    else:
-        points = EVACUATION_POINTS
+    points = geo_catalog.shelters(city.lower() if city else None)
     
     return jsonify({
         "points": points,
         "count": len(points)
     })
 
+def nearest_shelters(rows, distances):
+    """Baris hasil geo_catalog.shelter_index -> daftar titik evakuasi dengan distance_km."""
+    return [{**geo_catalog.evacuation_points[row], "distance_km": round(distance, 3)}
+            for row, distance in zip(rows.tolist(), distances.tolist())]
+
+@app.route('/api/evacuation/nearest', methods=['GET', 'POST'])
+def get_evacuation_nearest():
+    """
+    Mengambil k titik evakuasi terdekat dari satu atau banyak titik.
+    
+    Query Parameters (GET):
+        lat, lng (float): Koordinat pengguna (wajib)
+        k (int): Jumlah titik evakuasi (default 5, maks EVACUATION_MAX_K)
+        max_km (float): Jarak maksimum (opsional, angka >= 0)
+    
+    Request Body (POST, banyak pengguna sekaligus):
+        JSON: {"points": [{"lat": .., "lng": ..}, ...], "k": 5, "max_km": ..}
+              maks EVACUATION_BATCH_MAX titik
+    
+    Returns:
+        JSON: GET -> points (urut dari terdekat, dengan distance_km dan
+              capacity) dan count; POST -> results (lat, lng, points, count
+              per titik query, urutan sama dengan input) dan count
+    
+    Notes:
+        - Tidak dibatasi kota, sehingga pengguna di perbatasan kota tetap
+          mendapat titik evakuasi yang benar-benar terdekat
+        - POST menghitung semua jarak dalam satu matriks haversine NumPy
+        - Setiap titik wajib di rentang lat -90..90 dan lng -180..180
+          (NaN/inf ditolak), jika tidak 400
+    """
+    body = request.get_json(silent=True) if request.method == 'POST' else None
+    if request.method == 'POST' and not isinstance(body, dict):
+        return jsonify({"error": "Body harus JSON object"}), 400
+    params = body if request.method == 'POST' else request.args
+    try:
+        k = min(max(int(params.get('k', 5)), 1), EVACUATION_MAX_K)
+        max_km = float(params['max_km']) if params.get('max_km') not in (None, '') else None
+        if request.method == 'POST':
+            points = body.get('points')
+            if not isinstance(points, list) or not points:
+                return jsonify({"error": "points wajib berupa list {lat, lng}"}), 400
+            if len(points) > EVACUATION_BATCH_MAX:
+                return jsonify({"error": f"Maksimum {EVACUATION_BATCH_MAX} titik per request"}), 400
+            lats = [float(p['lat']) for p in points]
+            lngs = [float(p['lng']) for p in points]
+        else:
+            lats = [float(request.args['lat'])]
+            lngs = [float(request.args['lng'])]
+    except (KeyError, TypeError):
+        return jsonify({"error": "lat dan lng wajib diisi"}), 400
+    except ValueError as e:
+        return jsonify({"error": f"Parameter tidak valid: {e}"}), 400
+    if max_km is not None and not (math.isfinite(max_km) and max_km >= 0):
+        return jsonify({"error": "max_km harus angka >= 0"}), 400
+    for i, (lat, lng) in enumerate(zip(lats, lngs)):
+        # Comparisons with NaN are False, so this also rejects NaN and inf
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+            where = f" (titik ke-{i})" if request.method == 'POST' else ""
+            return jsonify({"error": f"lat/lng di luar rentang{where}"}), 400
+    
+    if request.method == 'GET':
+        rows, distances = geo_catalog.shelter_index.nearest(lats[0], lngs[0], k, max_km)
+        points = nearest_shelters(rows, distances)
+        return jsonify({"lat": lats[0], "lng": lngs[0], "k": k, "points": points, "count": len(points)})
+    
+    results = []
+    for lat, lng, (rows, distances) in zip(lats, lngs, geo_catalog.shelter_index.nearest_many(lats, lngs, k, max_km)):
+        points = nearest_shelters(rows, distances)
+        results.append({"lat": lat, "lng": lng, "points": points, "count": len(points)})
+    return jsonify({"k": k, "results": results, "count": len(results)})
+
 @app.route('/api/risk-zones', methods=['GET'])
 def get_risk_zones():
     """
@@ -930,11 +1848,7 @@ def get_risk_zones():
         - Setiap zone memiliki: name, lat, lng, radius, risk, type, description
     """
     city = request.args.get('city', None)
-    
-    if city:
-        zones = [z for z in RISK_ZONES if z['city'] == city.lower()]
-    else:
-        zones = RISK_ZONES
+    zones = geo_catalog.zones(city=city.lower() if city else None)
     
     # Get weather data for the city if specified
     weather_data = None
@@ -997,26 +1911,26 @@ def generate_emergency_response(message, city):
           - evakuasi/rute/keluar/lari -> Titik evakuasi
           - banjir/air/genangan -> Info banjir
           - gempa/地震/quake -> Info earthquake
+          - peringatan/siaga/alert -> Peringatan dini BMKG aktif
           - cuaca/hujan/weather -> Info cuaca
           - longsor/gunung/lereng -> Info longsor
           - bantuan/help/darat -> Kontak darurat
     """
     message_lower = message.lower()
-    message_lower = message.lower()
-    city_info = next((c for c in INDONESIAN_CITIES if c['id'] == city), INDONESIAN_CITIES[0])
+    city_info = geo_catalog.city(city, geo_catalog.default_city)
     city_name = city_info['name']
     
     if any(k in message_lower for k in ['evakuasi', 'rute', 'keluar', 'lari']):
-        points = [p for p in EVACUATION_POINTS if p['city'] == city.lower()]
+        points = geo_catalog.shelters(city.lower())
         if points:
             points_list = "\n".join([f"- {p['name']} (Kapasitas: {p['capacity']})" for p in points[:5]])
             return f"🚑 Titik evakuasi di {city_name}:\n{points_list}\n\nSegera evacuate menggunakan jalur teraman!"
         return f"Belum ada data titik evakuasi untuk {city_name}"
     
     if any(k in message_lower for k in ['banjir', 'air', 'genangan']):
-        zones = [z for z in RISK_ZONES if z['city'] == city.lower() and z['type'] == 'flood']
+        zones = geo_catalog.zones(city=city.lower(), type='flood')
         if zones:
-            high_risk = [z for z in zones if z['risk'] == 'high']
+            high_risk = geo_catalog.zones(city=city.lower(), type='flood', risk='high')
             if high_risk:
                 return f"⚠️ Peringatan Banjir!\n\nZona banjir berbahaya di {city_name}:\n" + "\n".join([f"- {z['name']}: {z['description']}" for z in high_risk[:3]])
             return f"Ada {len(zones)} zona banjir di {city_name}. Tetap waspadai perubahan cuaca!"
@@ -1025,19 +1939,41 @@ def generate_emergency_response(message, city):
     if any(k in message_lower for k in ['gempa', '地震', 'quake']):
         earthquake = fetch_bmkg_earthquake()
         if earthquake:
-            return f"🌍 Info Gempa Terbaru:\n\n📍 {earthquake.get('location')}\n💪 Magnitude: {earthquake.get('magnitude')}\n📏 Kedalaman: {earthquake.get('depth')}\n🕐 Waktu: {earthquake.get('time')}\n\n{earthquake.get('potential', '')}"
+            reply = f"🌍 Info Gempa Terbaru:\n\n📍 {earthquake.get('location')}\n💪 Magnitude: {earthquake.get('magnitude')}\n📏 Kedalaman: {earthquake.get('depth')}\n🕐 Waktu: {earthquake.get('time')}\n\n{earthquake.get('potential', '')}"
+            impact = quake_impacts.get(earthquake)
+            if impact and impact['cities']:
+                cities_list = ", ".join(f"{c['name']} ({c['distance_km']} km, {c['intensity']})" for c in impact['cities'][:5])
+                reply += f"\n\n🏙️ Kota yang kemungkinan merasakan: {cities_list}"
+                own_city = next((c for c in impact['cities'] if c['id'] == city.lower()), None)
+                if own_city:
+                    shelters = [p for p in impact['evacuation_points'] if p['city'] == city.lower()][:3]
+                    reply += f"\n\n⚠️ {city_name} berada {own_city['distance_km']} km dari pusat gempa."
+                    if shelters:
+                        reply += " Titik evakuasi terdekat:\n" + "\n".join(f"- {p['name']} ({p['distance_km']} km dari pusat gempa)" for p in shelters)
+            return reply
         return "Tidak ada informasi gempa terkini"
     
+    if any(k in message_lower for k in ['peringatan', 'siaga', 'alert']):
+        warnings = fetch_city_warnings(city_info['id'])
+        if warnings:
+            warnings_list = "\n".join(f"- {w['title']} ({w['pubDate']})" for w in warnings[:5])
+            return f"🚨 Peringatan dini BMKG untuk {city_name}:\n{warnings_list}\n\nIkuti arahan BMKG dan BPBD setempat!"
+        return f"✅ Tidak ada peringatan dini BMKG yang aktif untuk {city_name} saat ini."
+    
     if any(k in message_lower for k in ['cuaca', 'hujan', 'weather']):
         weather = fetch_bmkg_weather(city)
         if weather:
-            return f"🌤️ Cuaca di {city_name}:\n\nSuhu: {weather.get('temperature')}°C\nKelembaban: {weather.get('humidity')}%\nAngin: {weather.get('wind_speed')} km/j\n\n{weather.get('weather_desc', 'Cuaca normal')}"
+            reply = f"🌤️ Cuaca di {city_name}:\n\nSuhu: {weather.get('temperature')}°C\nKelembaban: {weather.get('humidity')}%\nAngin: {weather.get('wind_speed')} km/j\n\n{weather.get('weather_desc', 'Cuaca normal')}"
+            warnings = fetch_city_warnings(city_info['id'])
+            if warnings:
+                reply += f"\n\n🚨 Peringatan dini BMKG: {warnings[0]['title']}"
+            return reply
         return f"Cuaca untuk {city_name} tidak tersedia"
     
     if any(k in message_lower for k in ['longsor', 'gunung', 'lereng']):
-        zones = [z for z in RISK_ZONES if z['city'] == city.lower() and z['type'] == 'landslide']
+        zones = geo_catalog.zones(city=city.lower(), type='landslide')
         if zones:
-            high_risk = [z for z in zones if z['risk'] == 'high']
+            high_risk = geo_catalog.zones(city=city.lower(), type='landslide', risk='high')
             if high_risk:
                 return f"⚠️ Peringatan Longsor!\n\nZona longsor berbahaya di {city_name}:\n" + "\n".join([f"- {z['name']}: {z['description']}" for z in high_risk[:3]])
         return f"Tidak ada informasi longsor khusus untuk {city_name}"
@@ -1047,14 +1983,14 @@ def generate_emergency_response(message, city):
     
     # Handler for risk level queries
     if any(k in message_lower for k in ['risiko', 'tingkat risiko', 'level risiko', 'seberapa berbahaya', 'status risiko']):
-        zones = [z for z in RISK_ZONES if z['city'] == city.lower()]
+        zones = geo_catalog.zones(city=city.lower())
         
         if not zones:
             return f"ℹ️ Info Risiko {city_name}:\n\nBelum ada data zona risiko untuk kota ini.\nTetap waspadai kondisi cuaca dan berita terkini!"
         
-        high_risk = [z for z in zones if z['risk'] == 'high']
-        medium_risk = [z for z in zones if z['risk'] == 'medium']
-        low_risk = [z for z in zones if z['risk'] == 'low']
+        high_risk = geo_catalog.zones(city=city.lower(), risk='high')
+        medium_risk = geo_catalog.zones(city=city.lower(), risk='medium')
+        low_risk = geo_catalog.zones(city=city.lower(), risk='low')
         
         # Determine overall risk level
         if len(high_risk) >= 3:
@@ -1081,6 +2017,12 @@ def generate_emergency_response(message, city):
             for z in high_risk[:3]:
                 risk_info += f"\n• {z['name']} ({z['type']}) - {z['description']}"
         
+        active_warnings = fetch_city_warnings(city_info['id'])
+        if active_warnings:
+            risk_info += "\n\n🚨 Peringatan Dini BMKG Aktif:"
+            for w in active_warnings[:3]:
+                risk_info += f"\n• {w['title']}"
+        
         risk_info += f"\n\n{warning}"
         
         return risk_info
@@ -1155,9 +2097,7 @@ def get_reports():
     try:
         from admin import reports_collection
         
-        city_count = len(INDONESIAN_CITIES)
-        risk_zone_count = len(RISK_ZONES)
-        evacuation_count = len(EVACUATION_POINTS)
+        counts = geo_catalog.counts()
         
         # User count - tidak ada sistem user
         user_count = 1  # Default admin saja
@@ -1178,9 +2118,7 @@ def get_reports():
                 "reports": reports,
                 "count": len(reports),
                 "stats": {
-                    "cities": city_count,
-                    "risk_zones": risk_zone_count,
-                    "evacuation_points": evacuation_count,
+                    **counts,
                     "users": user_count,
                     "reports_count": report_count
                 }
@@ -1192,9 +2130,7 @@ def get_reports():
         "reports": [],
         "count": 0,
         "stats": {
-            "cities": len(INDONESIAN_CITIES),
-            "risk_zones": len(RISK_ZONES),
-            "evacuation_points": len(EVACUATION_POINTS),
+            **geo_catalog.counts(),
             "users": 1,
             "reports_count": 0
         }
@@ -1222,9 +2158,7 @@ def get_stats():
     try:
         from admin import reports_collection
         
-        city_count = len(INDONESIAN_CITIES)
-        risk_zone_count = len(RISK_ZONES)
-        evacuation_count = len(EVACUATION_POINTS)
+        counts = geo_catalog.counts()
         
         # User count - tidak ada sistem user
         user_count = 1  # Default admin saja
@@ -1238,18 +2172,14 @@ def get_stats():
             pass
         
         return jsonify({
-            "cities": city_count,
-            "risk_zones": risk_zone_count,
-            "evacuation_points": evacuation_count,
+            **counts,
             "users": user_count,
             "reports": report_count
         })
     except Exception as e:
         print(f"Error getting stats: {e}")
         return jsonify({
-            "cities": len(INDONESIAN_CITIES),
-            "risk_zones": len(RISK_ZONES),
-            "evacuation_points": len(EVACUATION_POINTS),
+            **geo_catalog.counts(),
             "users": 1,
             "reports": 0
         })
@@ -1359,6 +2289,24 @@ def assess_damage():
             "error": "No image provided"
         }), 400
     
+    return jsonify(run_damage_assessment(image_data))
+
+
+def run_damage_assessment(image_data):
+    """
+    Menjalankan penilaian kerusakan untuk satu gambar.
+    
+    Args:
+        image_data (str): Data gambar dalam format base64
+    
+    Returns:
+        dict: Hasil penilaian kerusakan (format sama dengan /api/assess-damage)
+    
+    Notes:
+        - Tidak bergantung pada request context, sehingga bisa dipanggil dari
+          route sinkron maupun dari worker job asinkron (jobs.py)
+        - Jika classifier gagal, mengembalikan penilaian demo
+    """
     try:
         # First: Use disaster classifier (color-based analysis)
         from disaster_classifier import classify_disaster
@@ -1461,7 +2409,6 @@ def assess_damage():
         # Try to enhance with HuggingFace AI if available
         try:
             import base64
-            import requests
             
             hf_api_key = os.environ.get('HF_API_KEY', '')
             
@@ -1480,9 +2427,18 @@ def assess_damage():
                     headers = {"Authorization": f"Bearer {hf_api_key}"}
                     api_url = "https://api-inference.huggingface.co/pipeline/image-text-to-text/Salesforce/blip-image-captioning-base"
                     
+                    def post_caption():
+                        # Captioning is a pure inference call, safe to retry (HF answers 503 while the model loads)
+                        hf_response = http_client.post(api_url, headers=headers, data=image_bytes,
+                                                       timeout=(HTTP_CONNECT_TIMEOUT, 30), retries=HTTP_MAX_RETRIES)
+                        # 5xx counts against the breaker; 4xx is a request problem, not an outage
+                        return hf_response if hf_response.status_code < 500 else None
+                    
                     try:
-                        hf_response = requests.post(api_url, headers=headers, data=image_bytes, timeout=30)
-                        if hf_response.status_code == 200:
+                        # Same image uploaded concurrently (e.g. a retried submit) shares one caption call
+                        caption_key = (api_url, hashlib.sha1(image_bytes).hexdigest())
+                        hf_response = flights.do(caption_key, lambda: breakers.get('huggingface').call(post_caption))
+                        if hf_response is not None and hf_response.status_code == 200:
                             result = hf_response.json()
                             caption = ""
                             if isinstance(result, list) and len(result) > 0:
@@ -1494,12 +2450,15 @@ def assess_damage():
                             if caption:
                                 response["visual_evidence"] = caption
                                 response["damage_description"] = f"{color_result.get('reason', '')} | AI: {caption}"
+                    except CircuitOpen:
+                        # Skip the caption instead of waiting out the timeout
+                        pass
                     except Exception as e:
                         print(f"HuggingFace API error: {e}")
         except Exception as e:
             print(f"Error calling HuggingFace: {e}")
         
-        return jsonify(response)
+        return response
             
     except ImportError as e:
         print(f"Error importing disaster classifier: {e}")
@@ -1518,7 +2477,7 @@ def generate_demo_assessment():
     Menghasilkan penilaian demo acak ketika API tidak tersedia.
     
     Returns:
-        JSON: Penilaian kerusakan simulasi dengan:
+        dict: Penilaian kerusakan simulasi dengan:
               - is_disaster: True
               - disaster_type: Jenis bencana acak
               - severity: Tingkat keparahan acak
@@ -1537,7 +2496,7 @@ def generate_demo_assessment():
     ]
     disaster = random.choice(disasters)
     
-    return jsonify({
+    return {
         "success": True,
         "is_disaster": True,
         "disaster_type": disaster["name"],
@@ -1555,7 +2514,117 @@ def generate_demo_assessment():
         ],
         "estimated_impact": disaster["severity"].capitalize() + " impact requiring response",
         "demo_mode": True
-    })
+    }
+
+
+# ==================== Classifier Micro-Batching ====================
+
+# Request klasifikasi yang datang bersamaan digabung menjadi satu batch
+CLASSIFY_BATCH_MAX_SIZE = int(os.getenv('CLASSIFY_BATCH_MAX_SIZE', '16'))
+CLASSIFY_BATCH_MAX_WAIT_MS = float(os.getenv('CLASSIFY_BATCH_MAX_WAIT_MS', '5'))
+# Batas tunggu hasil per request (termasuk antre di batcher), detik
+CLASSIFY_TIMEOUT = float(os.getenv('CLASSIFY_TIMEOUT', str(CLASSIFIER_RESULT_TIMEOUT + 5)))
+
+# Opsional: klasifikasi di proses terpisah, gambar diserahkan lewat shared memory
+classifier_pool = None
+classifier_pool_attempted = False
+classifier_pool_lock = threading.Lock()
+
+def get_classifier_pool():
+    """
+    Mengambil process pool classifier, dibuat saat klasifikasi pertama.
+    
+    Returns:
+        ProcessClassifierPool: Pool aktif, atau None jika CLASSIFIER_PROCESSES
+                               0 atau pool gagal dibuat (klasifikasi di proses web)
+    
+    Notes:
+        - Tidak dibuat saat modul di-import, sehingga reloader, CLI dan
+          importer lain tidak ikut menjalankan proses worker
+        - Pool ditutup (worker dihentikan, shared memory dihapus) saat
+          proses berhenti
+    """
+    global classifier_pool, classifier_pool_attempted
+    if CLASSIFIER_PROCESSES <= 0:
+        return None
+    with classifier_pool_lock:
+        if not classifier_pool_attempted:
+            classifier_pool_attempted = True
+            try:
+                classifier_pool = ProcessClassifierPool(CLASSIFIER_PROCESSES)
+                atexit.register(classifier_pool.close)
+            except Exception as e:
+                print(f"Error starting classifier process pool: {e}")
+        return classifier_pool
+
+# Satu MicroBatcher per backend classifier (rule/model/ensemble)
+classify_batchers = {}
+classify_batchers_lock = threading.Lock()
+
+def get_classify_batcher(backend_name=None):
+    """
+    Mengambil (atau membuat) MicroBatcher untuk backend classifier.
+    
+    Args:
+        backend_name (str): Nama backend (rule/model/ensemble),
+                            None = CLASSIFIER_BACKEND
+    
+    Returns:
+        tuple: (nama backend, MicroBatcher)
+    
+    Raises:
+        ValueError: Jika nama backend tidak dikenal
+        BackendUnavailable: Jika backend belum siap
+    
+    Notes:
+        - Jika CLASSIFIER_PROCESSES > 0, batch dikirim ke proses worker
+          (satu batch per proses secara bersamaan); pool dibuat saat
+          batcher pertama dibuat (get_classifier_pool)
+    """
+    from classifier_backends import get_backend
+    
+    backend = get_backend(backend_name)
+    with classify_batchers_lock:
+        batcher = classify_batchers.get(backend.name)
+        if batcher is None:
+            pool = get_classifier_pool()
+            if pool is not None:
+                batch_fn = partial(pool.classify_images, backend_name=backend.name)
+                concurrency = CLASSIFIER_PROCESSES
+            else:
+                batch_fn = backend.classify_images
+                concurrency = 1
+            batcher = MicroBatcher(
+                batch_fn,
+                max_batch_size=CLASSIFY_BATCH_MAX_SIZE,
+                max_wait_ms=CLASSIFY_BATCH_MAX_WAIT_MS,
+                name=f'classify-{backend.name}',
+                concurrency=concurrency
+            )
+            classify_batchers[backend.name] = batcher
+    return backend.name, batcher
+
+
+@app.route('/api/classifier/backends', methods=['GET'])
+def get_classifier_backends():
+    """
+    Mengambil daftar backend classifier dan ketersediaannya.
+    
+    Returns:
+        JSON: Daftar backend (name, available, reason, default),
+              statistik micro-batcher dan process pool (jika aktif)
+    """
+    try:
+        from classifier_backends import list_backends
+        with classify_batchers_lock:
+            batchers = {name: batcher.stats() for name, batcher in classify_batchers.items()}
+        return jsonify({
+            "backends": list_backends(),
+            "batchers": batchers,
+            "process_pool": classifier_pool.stats() if classifier_pool is not None else None
+        })
+    except ImportError as e:
+        return jsonify({"backends": [], "error": f"Module classifier tidak tersedia: {e}"}), 500
 
 
 @app.route('/api/classify-disaster', methods=['POST'])
@@ -1566,6 +2635,7 @@ def classify_disaster():
     Request Body:
         JSON dengan field:
         - image (str): Data gambar dalam format base64
+        - backend (str): Opsional, rule/model/ensemble (bisa juga ?backend=)
     
     Returns:
         JSON: Hasil klasifikasi meliputi:
@@ -1579,6 +2649,8 @@ def classify_disaster():
     Notes:
         - Menggunakan analisis warna HSV untuk klasifikasi
         - Metode: Kebakaran, Banjir, Gunung Berapi, Tanah Longsor
+        - Request bersamaan diproses dalam micro-batch (lihat batching.py);
+          atur dengan CLASSIFY_BATCH_MAX_SIZE dan CLASSIFY_BATCH_MAX_WAIT_MS
     """
     data = request.get_json()
     image_data = data.get('image', '')
@@ -1591,10 +2663,40 @@ def classify_disaster():
     
     try:
         # Import the disaster classifier
-        from disaster_classifier import classify_disaster
+        from disaster_classifier import decode_base64_image
+        from classifier_backends import BackendUnavailable
         
-        # Perform hybrid classification
-        result = classify_disaster(image_data)
+        try:
+            backend_name, batcher = get_classify_batcher(data.get('backend') or request.args.get('backend'))
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e),
+                "is_disaster": False
+            }), 400
+        except BackendUnavailable as e:
+            return jsonify({
+                "success": False,
+                "error": str(e),
+                "is_disaster": False
+            }), 503
+        
+        # Decode in the request thread, classify in a shared micro-batch
+        image = decode_base64_image(image_data)
+        if image is None:
+            result = {
+                "success": False,
+                "error": "Gambar tidak dapat dibaca"
+            }
+        else:
+            try:
+                result = batcher.submit(image).result(timeout=CLASSIFY_TIMEOUT)
+            except (RingFull, WorkerLost, TimeoutError, FutureTimeout):
+                return jsonify({
+                    "success": False,
+                    "error": "Classifier sedang sibuk, coba lagi nanti",
+                    "is_disaster": False
+                }), 503
         
         # Map to frontend expected format
         if result.get("success"):
@@ -1629,6 +2731,7 @@ def classify_disaster():
                 "reason": result.get("reason", ""),
                 "damage_type": disaster_type.lower().replace(" ", "_") if disaster_type else None,
                 "kategori_bencana": disaster_type,
+                "backend": backend_name,
                 "confidence_score": result.get("confidence_score", "0%"),
                 "warna_dominan": result.get("warna_dominan", {}),
                 "detail_analysis": result.get("detail_analysis", {}),
@@ -1771,8 +2874,51 @@ register_auth_routes(app)
 # Register admin routes
 register_admin_routes(app)
 
+# Register async damage assessment job routes
+register_job_routes(app, run_damage_assessment)
+
+# Background BMKG ingestion (routes read the snapshot it keeps warm)
+register_bmkg_jobs(bmkg_scheduler)
+configure_refresh_priority(refresh_priority)
+bmkg_cache.bound('weather', BMKG_ADHOC_MAX_CODES, is_scheduled_bmkg_code)
+forecast_store.bound(BMKG_ADHOC_MAX_CODES, is_scheduled_bmkg_code)
+
+# Nearest-adm4 lookup for /api/weather?lat=&lng=; without a catalog file only the per-city codes are known
+if not adm4_index.load():
+    adm4_index.build(city_adm4_rows(), source='BMKG_CITY_CODES')
+
+background_services_lock = threading.Lock()
+background_services_started = False
+
+def start_background_services():
+    """
+    Menyalakan layanan background untuk proses yang melayani request.
+    
+    Notes:
+        - Memuat checkpoint BMKG terakhir (warm start), mendaftarkan
+          penyimpanan checkpoint saat proses berhenti, dan menjalankan
+          scheduler BMKG jika BMKG_SCHEDULER_ENABLED
+        - Tidak dipanggil saat modul di-import (CLI, test, worker pool);
+          dipanggil oleh entry point server: blok __main__ di bawah atau
+          hook post_fork di gunicorn.conf.py
+        - Idempotent, aman dipanggil lebih dari sekali per proses
+    """
+    global background_services_started
+    with background_services_lock:
+        if background_services_started:
+            return
+        background_services_started = True
+    # Warm start: serve the last checkpointed BMKG data until the first refresh lands
+    bmkg_snapshot.load()
+    atexit.register(bmkg_snapshot.save)
+    if BMKG_SCHEDULER_ENABLED:
+        bmkg_scheduler.start()
+
 if __name__ == '__main__':
     print(f"🏙️ {len(INDONESIAN_CITIES)} Indonesian cities loaded")
     print(f"⚠️ {len(RISK_ZONES)} risk zones loaded")
     print(f"🏠 {len(EVACUATION_POINTS)} evacuation points loaded")
+    # The debug reloader runs this file twice; only the serving child starts background work
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
     app.run(debug=True, host='0.0.0.0', port=5000)
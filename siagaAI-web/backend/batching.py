@@ -0,0 +1,121 @@
+"""
+Modul Micro-Batching - Antrian dinamis di depan classifier
+
+Dokumentasi Bahasa Indonesia:
+- Request yang datang bersamaan dikumpulkan selama beberapa milidetik
+  (max_wait_ms) atau sampai max_batch_size item, lalu diproses sebagai
+  satu batch tervektorisasi
+- Setiap pemanggil mendapat Future berisi hasilnya sendiri
+- Saat sepi, item pertama hanya menunggu paling lama max_wait_ms,
+  sehingga tambahan latensi untuk satu request tetap terbatas
+- Dengan concurrency > 1, beberapa batch bisa diproses bersamaan
+  (mis. dikirim ke beberapa proses classifier)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Penjadwal micro-batch dengan satu atau beberapa thread worker.
+
+    Args:
+        batch_fn: Fungsi yang menerima list item dan mengembalikan list hasil
+                  dengan panjang dan urutan yang sama
+        max_batch_size (int): Jumlah item maksimum per batch
+        max_wait_ms (float): Waktu tunggu maksimum sejak item pertama masuk
+        name (str): Nama batcher (untuk nama thread dan log)
+        concurrency (int): Jumlah batch yang boleh diproses bersamaan
+
+    Usage:
+        batcher = MicroBatcher(classify_images, max_batch_size=16, max_wait_ms=5)
+        result = batcher.submit(image).result()
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5, name='batcher', concurrency=1):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    def _ensure_worker(self):
+        if len(self._threads) == self.concurrency:
+            return
+        with self._lock:
+            while len(self._threads) < self.concurrency:
+                thread = threading.Thread(target=self._run, name=f"{self.name}-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, item):
+        """Masukkan item ke antrian dan kembalikan Future hasilnya."""
+        future = Future()
+        self._queue.put((item, future))
+        self._ensure_worker()
+        return future
+
+    def _collect(self):
+        """Ambil satu batch: blok sampai ada item, lalu tunggu sisa slot sampai deadline."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                print(f"Error processing {self.name} batch of {len(items)}: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(items)
+                self._largest_batch = max(self._largest_batch, len(items))
+
+    def stats(self):
+        """Statistik batcher: jumlah batch, item, rata-rata dan ukuran batch terbesar."""
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+                "largest_batch": self._largest_batch,
+                "pending": self._queue.qsize(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "concurrency": self.concurrency
+            }
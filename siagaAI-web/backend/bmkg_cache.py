@@ -0,0 +1,289 @@
+"""
+Modul Cache BMKG - Cache in-process dengan TTL per feed
+
+Dokumentasi Bahasa Indonesia:
+- Setiap feed BMKG punya TTL sendiri, disesuaikan dengan seberapa sering
+  BMKG memperbarui datanya
+- Data disajikan dari memori selama masih segar; hanya cache miss atau
+  data kedaluwarsa yang memanggil BMKG
+- Hasil gagal (None) tidak disimpan, sehingga fallback tidak ikut di-cache
+- Setiap entri menyimpan waktu pengambilan untuk ditampilkan di response
+- Stale-while-revalidate: entri yang sudah lewat TTL tetap disajikan
+  (ditandai stale) sementara satu refresh berjalan di background; hanya
+  key yang belum pernah berhasil diambil yang menunggu fetch
+- Feed bisa dibatasi (bound): key yang tidak "dipin" (mis. kode adm4 dari
+  query koordinat tanpa job scheduler) disimpan sebagai LRU dengan jumlah
+  maksimum dan tidak ikut di-export ke snapshot
+
+TTL default (detik, bisa diubah lewat environment):
+- weather (BMKG_TTL_WEATHER): 1800 - prakiraan cuaca diperbarui per 3 jam
+- autogempa (BMKG_TTL_AUTOGEMPA): 60 - gempa terbaru
+- gempadirasakan (BMKG_TTL_GEMPADIRASAKAN): 300 - daftar gempa dirasakan
+- nowcast (BMKG_TTL_NOWCAST): 300 - peringatan dini cuaca
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+FEED_TTLS = {
+    'weather': int(os.getenv('BMKG_TTL_WEATHER', '1800')),
+    'autogempa': int(os.getenv('BMKG_TTL_AUTOGEMPA', '60')),
+    'gempadirasakan': int(os.getenv('BMKG_TTL_GEMPADIRASAKAN', '300')),
+    'nowcast': int(os.getenv('BMKG_TTL_NOWCAST', '300')),
+}
+
+DEFAULT_TTL = 300
+
+BMKG_REVALIDATE_WORKERS = int(os.getenv('BMKG_REVALIDATE_WORKERS', '2'))
+
+
+class CacheEntry:
+    """Satu nilai cache beserta waktu pengambilan dan kedaluwarsanya."""
+
+    __slots__ = ('value', 'fetched_at', 'expires_at')
+
+    def __init__(self, value, fetched_at, expires_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+    def is_fresh(self, now=None):
+        return (now or time.time()) < self.expires_at
+
+    def freshness(self):
+        """Info kesegaran untuk response: fetched_at, expires_at, cache_age, stale."""
+        now = time.time()
+        return {
+            'fetched_at': datetime.fromtimestamp(self.fetched_at).isoformat(),
+            'expires_at': datetime.fromtimestamp(self.expires_at).isoformat(),
+            'cache_age': round(now - self.fetched_at, 1),
+            'stale': not self.is_fresh(now)
+        }
+
+
+class TTLCache:
+    """
+    Cache thread-safe dengan TTL per feed.
+
+    Usage:
+        entry = bmkg_cache.get_or_fetch('autogempa', 'latest', fetch_live)
+        if entry:
+            data = entry.value
+    """
+
+    def __init__(self, ttls=None):
+        self.ttls = dict(FEED_TTLS if ttls is None else ttls)
+        self._entries = {}
+        # feed -> (max_keys, pinned_fn) and feed -> LRU of its unpinned keys
+        self._bounds = {}
+        self._lru = {}
+        self._changes = 0
+        self._revalidating = set()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def ttl(self, feed):
+        return self.ttls.get(feed, DEFAULT_TTL)
+
+    def bound(self, feed, max_keys, pinned_fn):
+        """
+        Batasi jumlah key feed yang tidak dipin.
+
+        Args:
+            feed (str): Nama feed
+            max_keys (int): Maksimum key tidak dipin; yang paling lama tidak
+                            dipakai dibuang lebih dulu
+            pinned_fn (callable): pinned_fn(key) -> True jika key selalu
+                                  disimpan (dan ikut snapshot)
+        """
+        with self._lock:
+            self._bounds[feed] = (max(1, max_keys), pinned_fn)
+            self._lru.setdefault(feed, OrderedDict())
+
+    def _touch(self, feed, key):
+        """Tandai key tidak dipin sebagai baru dipakai (lock dipegang)."""
+        lru = self._lru.get(feed)
+        if lru is not None and key in lru:
+            lru.move_to_end(key)
+
+    def get(self, feed, key):
+        """Ambil entri yang masih segar, atau None."""
+        with self._lock:
+            entry = self._entries.get((feed, key))
+            self._touch(feed, key)
+        if entry is not None and entry.is_fresh():
+            return entry
+        return None
+
+    def peek(self, feed, key):
+        """Ambil entri terakhir tanpa memeriksa TTL (atau None)."""
+        with self._lock:
+            self._touch(feed, key)
+            return self._entries.get((feed, key))
+
+    def set(self, feed, key, value, fetched_at=None):
+        """Simpan nilai baru dengan TTL feed dan kembalikan entrinya."""
+        fetched_at = fetched_at or time.time()
+        entry = CacheEntry(value, fetched_at, fetched_at + self.ttl(feed))
+        bound = self._bounds.get(feed)
+        # pinned_fn may take other locks; ask before taking ours
+        unpinned = bound is not None and not bound[1](key)
+        with self._lock:
+            self._entries[(feed, key)] = entry
+            self._changes += 1
+            if unpinned:
+                lru = self._lru[feed]
+                lru[key] = None
+                lru.move_to_end(key)
+                while len(lru) > bound[0]:
+                    evicted, _ = lru.popitem(last=False)
+                    self._entries.pop((feed, evicted), None)
+        return entry
+
+    def get_or_fetch(self, feed, key, fetch_fn):
+        """
+        Ambil dari cache, atau panggil fetch_fn() jika belum ada.
+
+        Returns:
+            CacheEntry: Entri segar; entri kedaluwarsa (sambil refresh di
+                        background); atau hasil fetch langsung jika key
+                        belum pernah ada (None jika fetch_fn gagal)
+        """
+        entry = self.peek(feed, key)
+        if entry is None:
+            return self.refresh(feed, key, fetch_fn)
+        if not entry.is_fresh():
+            self.revalidate(feed, key, fetch_fn)
+        return entry
+
+    def revalidate(self, feed, key, fetch_fn):
+        """
+        Jadwalkan refresh di background, paling banyak satu per key.
+
+        Returns:
+            bool: True jika refresh baru dijadwalkan
+        """
+        with self._lock:
+            if (feed, key) in self._revalidating:
+                return False
+            self._revalidating.add((feed, key))
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=BMKG_REVALIDATE_WORKERS, thread_name_prefix='bmkg-revalidate')
+
+        def run():
+            try:
+                self.refresh(feed, key, fetch_fn)
+            except Exception as e:
+                print(f"Error revalidating {feed}/{key}: {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard((feed, key))
+
+        self._executor.submit(run)
+        return True
+
+    def refresh(self, feed, key, fetch_fn):
+        """
+        Panggil fetch_fn() tanpa melihat cache dan simpan hasilnya.
+
+        Returns:
+            CacheEntry: Entri baru, atau None jika fetch_fn mengembalikan None
+                        (entri lama dibiarkan)
+        """
+        value = fetch_fn()
+        if value is None:
+            return None
+        return self.set(feed, key, value)
+
+    def invalidate(self, feed=None, key=None):
+        """Hapus entri (semua, satu feed, atau satu key)."""
+        with self._lock:
+            self._changes += 1
+            if feed is None:
+                self._entries.clear()
+                for lru in self._lru.values():
+                    lru.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] == feed and (key is None or k[1] == key)]:
+                del self._entries[entry_key]
+                self._lru.get(feed, {}).pop(entry_key[1], None)
+
+    @property
+    def changes(self):
+        """Penghitung yang naik setiap kali isi cache berubah."""
+        return self._changes
+
+    def export(self):
+        """Entri yang dipin sebagai list dict (feed, key, value, fetched_at) untuk checkpoint."""
+        with self._lock:
+            entries = [(k, entry) for k, entry in self._entries.items() if k[1] not in self._lru.get(k[0], ())]
+        return [{'feed': feed, 'key': key, 'value': entry.value, 'fetched_at': entry.fetched_at}
+                for (feed, key), entry in entries]
+
+    def restore(self, items, max_age=None):
+        """
+        Muat entri hasil export() dengan waktu fetch aslinya.
+
+        Args:
+            items (list): Hasil export()
+            max_age (float): Entri yang lebih tua dari ini (detik) dilewati
+
+        Returns:
+            int: Jumlah entri yang dimuat
+
+        Notes:
+            - Entri yang sudah ada dan lebih baru tidak ditimpa
+            - Entri lewat TTL tetap dimuat sebagai stale dan disegarkan
+              oleh scheduler / revalidate seperti biasa
+        """
+        now = time.time()
+        restored = 0
+        for item in items:
+            fetched_at = item['fetched_at']
+            if max_age is not None and now - fetched_at > max_age:
+                continue
+            current = self.peek(item['feed'], item['key'])
+            if current is not None and current.fetched_at >= fetched_at:
+                continue
+            self.set(item['feed'], item['key'], item['value'], fetched_at=fetched_at)
+            restored += 1
+        return restored
+
+    def stats(self):
+        """
+        Jumlah entri per feed dan berapa yang masih segar.
+
+        Notes:
+            - pinned_entries/pinned_fresh hanya menghitung key yang dipin
+              (untuk feed tanpa bound sama dengan entries/fresh); key LRU
+              tidak disegarkan scheduler sehingga wajar jika stale
+        """
+        now = time.time()
+        with self._lock:
+            entries = [(k, entry, k[1] in self._lru.get(k[0], ())) for k, entry in self._entries.items()]
+            bounds = {feed: (len(lru), self._bounds[feed][0]) for feed, lru in self._lru.items()}
+        stats = {}
+        for (feed, _), entry, unpinned in entries:
+            feed_stats = stats.setdefault(feed, {'entries': 0, 'fresh': 0, 'pinned_entries': 0, 'pinned_fresh': 0,
+                                                 'ttl': self.ttl(feed)})
+            fresh = entry.is_fresh(now)
+            feed_stats['entries'] += 1
+            feed_stats['fresh'] += fresh
+            if not unpinned:
+                feed_stats['pinned_entries'] += 1
+                feed_stats['pinned_fresh'] += fresh
+        for feed, (count, max_keys) in bounds.items():
+            if feed in stats:
+                stats[feed]['unpinned'] = count
+                stats[feed]['max_unpinned'] = max_keys
+        return stats
+
+
+bmkg_cache = TTLCache()
@@ -0,0 +1,285 @@
+"""
+Modul Scheduler BMKG - Ingest data BMKG di background
+
+Dokumentasi Bahasa Indonesia:
+- Menyegarkan feed BMKG (cuaca semua kota, autogempa, gempadirasakan,
+  nowcast) secara berkala di thread background, bukan di jalur request
+- Hasil disimpan ke bmkg_cache sebagai snapshot terbaru; route cukup
+  membaca snapshot sehingga latensi request tidak bergantung pada BMKG
+- Fetch dijalankan di thread pool dengan jumlah worker terbatas agar
+  BMKG tidak dibanjiri request bersamaan
+- Saat start, semua job langsung dijalankan sekali (pre-warm)
+- Job yang gagal dicoba lagi lebih cepat (retry interval), snapshot
+  lama tetap disajikan selama itu
+- Interval job boleh adaptif (interval_fn dihitung ulang setiap run)
+- Budget global request ke BMKG (token bucket per menit); jika habis,
+  job yang jatuh tempo diurutkan menurut priority_fn dan yang lain
+  menunggu token berikutnya
+
+Interval default (detik, bisa diubah lewat environment):
+- weather (BMKG_REFRESH_WEATHER): 900
+- autogempa (BMKG_REFRESH_AUTOGEMPA): 30
+- gempadirasakan (BMKG_REFRESH_GEMPADIRASAKAN): 120
+- nowcast (BMKG_REFRESH_NOWCAST): 120
+- BMKG_SCHEDULER_BUDGET: maksimum request BMKG per menit dari scheduler
+  (default 120, 0 = tanpa batas)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+BMKG_SCHEDULER_ENABLED = os.getenv('BMKG_SCHEDULER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+BMKG_SCHEDULER_WORKERS = int(os.getenv('BMKG_SCHEDULER_WORKERS', '4'))
+BMKG_SCHEDULER_RETRY_SECONDS = int(os.getenv('BMKG_SCHEDULER_RETRY_SECONDS', '60'))
+BMKG_SCHEDULER_BUDGET = int(os.getenv('BMKG_SCHEDULER_BUDGET', '120'))
+
+REFRESH_INTERVALS = {
+    'weather': int(os.getenv('BMKG_REFRESH_WEATHER', '900')),
+    'autogempa': int(os.getenv('BMKG_REFRESH_AUTOGEMPA', '30')),
+    'gempadirasakan': int(os.getenv('BMKG_REFRESH_GEMPADIRASAKAN', '120')),
+    'nowcast': int(os.getenv('BMKG_REFRESH_NOWCAST', '120')),
+}
+
+
+class ScheduledJob:
+    """State satu job berkala: interval, fungsi refresh, prioritas, dan statistik run."""
+
+    def __init__(self, name, interval, fn, interval_fn=None, priority_fn=None, cost=1):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.interval_fn = interval_fn
+        self.priority_fn = priority_fn
+        self.cost = cost
+        self.next_run = 0.0
+        self.running = False
+        self.last_run = None
+        self.last_success = None
+        self.last_error = None
+        self.runs = 0
+        self.failures = 0
+
+    def current_interval(self):
+        if self.interval_fn is None:
+            return self.interval
+        return self.interval_fn()
+
+    def priority(self):
+        return self.priority_fn() if self.priority_fn is not None else 0.0
+
+    def to_dict(self):
+        return {
+            "interval": self.interval,
+            "next_run": datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            "running": self.running,
+            "last_run": datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            "last_success": datetime.fromtimestamp(self.last_success).isoformat() if self.last_success else None,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "failures": self.failures
+        }
+
+
+class BMKGScheduler:
+    """
+    Scheduler job berkala dengan concurrency terbatas.
+
+    Args:
+        max_workers (int): Jumlah fetch yang boleh berjalan bersamaan
+        retry_interval (int): Jeda sebelum mencoba lagi job yang gagal
+        budget (int): Maksimum request upstream per menit (0 = tanpa batas)
+
+    Usage:
+        scheduler = BMKGScheduler(max_workers=4)
+        scheduler.add_job('autogempa', 30, refresh_autogempa)
+        scheduler.start()
+
+    Notes:
+        - Fungsi job mengembalikan nilai truthy jika refresh berhasil;
+          False/None atau exception dihitung sebagai kegagalan
+        - Satu job tidak pernah berjalan dua kali bersamaan
+        - Job dengan cost=0 (mis. checkpoint lokal) tidak memakai budget
+    """
+
+    def __init__(self, max_workers=BMKG_SCHEDULER_WORKERS, retry_interval=BMKG_SCHEDULER_RETRY_SECONDS,
+                 budget=BMKG_SCHEDULER_BUDGET):
+        self.max_workers = max(1, max_workers)
+        self.retry_interval = retry_interval
+        self.budget = budget
+        # Token bucket refilled at budget/60 per second, bursting up to one minute's worth
+        self._tokens = float(budget)
+        self._tokens_at = time.time()
+        self._deferred = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_job(self, name, interval, fn, interval_fn=None, priority_fn=None, cost=1):
+        """
+        Daftarkan job berkala; job baru langsung jatuh tempo.
+
+        Args:
+            name (str): Nama unik job
+            interval (int): Interval default (detik)
+            fn (callable): Fungsi refresh, truthy jika berhasil
+            interval_fn (callable): Opsional, interval adaptif dihitung setiap run
+            priority_fn (callable): Opsional, skor prioritas saat budget habis
+            cost (int): Request upstream per run (0 = tidak memakai budget)
+        """
+        with self._lock:
+            self._jobs[name] = ScheduledJob(name, interval, fn, interval_fn, priority_fn, cost)
+        self._wakeup.set()
+
+    def _take_tokens(self, cost, now):
+        """Ambil token budget (lock dipegang); False jika belum cukup."""
+        if self.budget <= 0 or cost <= 0:
+            return True
+        self._tokens = min(float(self.budget), self._tokens + (now - self._tokens_at) * self.budget / 60.0)
+        self._tokens_at = now
+        if self._tokens < cost:
+            return False
+        self._tokens -= cost
+        return True
+
+    def start(self):
+        """Mulai thread scheduler (idempotent); semua job langsung dijalankan sekali."""
+        with self._lock:
+            if self.running:
+                return
+            self._stopped.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bmkg-fetch')
+            self._thread = threading.Thread(target=self._loop, name='bmkg-scheduler', daemon=True)
+            self._thread.start()
+        print(f"BMKG scheduler started: {len(self._jobs)} jobs, {self.max_workers} workers")
+
+    def stop(self):
+        """Hentikan scheduler dan tunggu fetch yang sedang berjalan."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def reschedule(self, name):
+        """
+        Majukan next_run job jika interval adaptifnya kini lebih pendek.
+
+        Returns:
+            bool: True jika next_run dimajukan
+
+        Notes:
+            - next_run baru = last_run + interval saat ini; tidak pernah
+              dimundurkan, dan job yang belum pernah jalan atau sedang
+              berjalan tidak diubah
+        """
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None or job.running or job.last_run is None:
+                return False
+        # interval_fn may consult other locks; compute it outside ours
+        interval = job.current_interval()
+        with self._lock:
+            if job.running or job.last_run is None or job.last_run + interval >= job.next_run:
+                return False
+            job.next_run = job.last_run + interval
+        self._wakeup.set()
+        return True
+
+    def has_job(self, name):
+        with self._lock:
+            return name in self._jobs
+
+    def run_now(self, name=None):
+        """Jadwalkan ulang satu job (atau semua) agar segera dijalankan."""
+        with self._lock:
+            for job in self._jobs.values():
+                if name is None or job.name == name:
+                    job.next_run = 0.0
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            now = time.time()
+            with self._lock:
+                due = [job for job in self._jobs.values() if not job.running and job.next_run <= now]
+            # Priorities may consult other locks (caches, indexes); compute them outside ours
+            due.sort(key=lambda job: job.priority(), reverse=True)
+            starved = False
+            with self._lock:
+                started = []
+                for job in due:
+                    if not self._take_tokens(job.cost, now):
+                        starved = True
+                        self._deferred += 1
+                        continue
+                    job.running = True
+                    started.append(job)
+            for job in started:
+                self._executor.submit(self._run_job, job)
+
+            with self._lock:
+                waiting = [job.next_run for job in self._jobs.values() if not job.running]
+            timeout = max(0.0, min(waiting) - time.time()) if waiting else None
+            if starved:
+                # Re-check once the next token has been refilled
+                timeout = 60.0 / self.budget
+            # Woken early by add_job/run_now or when a running job finishes
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def _run_job(self, job):
+        started = time.time()
+        error = None
+        try:
+            ok = job.fn()
+            if not ok:
+                error = "fetch gagal"
+        except Exception as e:
+            error = str(e)
+            print(f"Error in BMKG job {job.name}: {e}")
+
+        # interval_fn may consult other locks; compute it outside ours
+        interval = job.current_interval() if error is None else None
+        with self._lock:
+            job.running = False
+            job.runs += 1
+            job.last_run = started
+            if error is None:
+                job.last_success = time.time()
+                job.last_error = None
+                job.next_run = started + interval
+            else:
+                job.failures += 1
+                job.last_error = error
+                job.next_run = time.time() + min(job.interval, self.retry_interval)
+        self._wakeup.set()
+
+    def stats(self):
+        """Status scheduler dan setiap job."""
+        with self._lock:
+            jobs = {name: job.to_dict() for name, job in self._jobs.items()}
+        return {
+            "running": self.running,
+            "workers": self.max_workers,
+            "budget_per_minute": self.budget,
+            "budget_tokens": round(self._tokens, 1),
+            "deferred": self._deferred,
+            "jobs": jobs
+        }
+
+
+bmkg_scheduler = BMKGScheduler()
@@ -0,0 +1,155 @@
+"""
+Modul Snapshot BMKG - Checkpoint data BMKG ke file untuk warm start
+
+Dokumentasi Bahasa Indonesia:
+- Isi bmkg_cache (cuaca semua kota, autogempa, gempadirasakan, nowcast),
+  peringatan dini aktif dan deret prakiraan per kota ditulis ke satu file JSON ringkas secara
+  berkala, hanya jika ada perubahan sejak checkpoint terakhir
+- Penulisan atomik: ditulis ke file sementara di folder yang sama lalu
+  os.replace, sehingga crash saat menulis tidak merusak snapshot lama
+- Saat start, snapshot dimuat sebelum scheduler berjalan; route langsung
+  menyajikan data BMKG asli (ditandai stale jika lewat TTL) sementara
+  scheduler mengambil data baru di background
+- Data yang lebih tua dari BMKG_SNAPSHOT_MAX_AGE tidak dimuat
+
+Konfigurasi (environment):
+- BMKG_SNAPSHOT_PATH: file snapshot (default data/bmkg_snapshot.json di
+  folder backend; kosongkan untuk menonaktifkan)
+- BMKG_SNAPSHOT_INTERVAL: jeda antar checkpoint dalam detik (default 60)
+- BMKG_SNAPSHOT_MAX_AGE: umur maksimum data yang dimuat, detik (default 21600)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime
+
+from bmkg_cache import bmkg_cache
+from early_warnings import early_warnings
+from forecast_store import forecast_store
+
+BMKG_SNAPSHOT_PATH = os.getenv(
+    'BMKG_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bmkg_snapshot.json')
+)
+BMKG_SNAPSHOT_INTERVAL = int(os.getenv('BMKG_SNAPSHOT_INTERVAL', '60'))
+BMKG_SNAPSHOT_MAX_AGE = int(os.getenv('BMKG_SNAPSHOT_MAX_AGE', '21600'))
+
+SNAPSHOT_FORMAT = 1
+
+
+class BMKGSnapshot:
+    """
+    Checkpoint dan pemuatan ulang cache BMKG + peringatan dini.
+
+    Args:
+        cache (TTLCache): bmkg_cache
+        warnings (EarlyWarningStore): early_warnings
+        forecasts (ForecastStore): forecast_store
+        path (str): File snapshot (None/'' = nonaktif)
+        max_age (int): Umur maksimum data yang dimuat (detik)
+
+    Usage:
+        snapshot = BMKGSnapshot(bmkg_cache, early_warnings, forecast_store)
+        snapshot.load()   # saat start
+        snapshot.save()   # berkala (job scheduler) dan saat proses berhenti
+    """
+
+    def __init__(self, cache, warnings, forecasts, path=BMKG_SNAPSHOT_PATH, max_age=BMKG_SNAPSHOT_MAX_AGE):
+        self.cache = cache
+        self.warnings = warnings
+        self.forecasts = forecasts
+        self.path = path or None
+        self.max_age = max_age
+        self._saved_state = None
+        self._last_saved = None
+        self._last_loaded = None
+        self._lock = threading.Lock()
+
+    def _state(self):
+        return (self.cache.changes, self.warnings.version, self.forecasts.changes)
+
+    def save(self, force=False):
+        """
+        Tulis snapshot jika ada perubahan sejak checkpoint terakhir.
+
+        Returns:
+            bool: False jika penulisan gagal, True jika berhasil atau tidak
+                  ada yang perlu ditulis
+        """
+        if not self.path:
+            return True
+        with self._lock:
+            state = self._state()
+            if not force and state == self._saved_state:
+                return True
+            data = {
+                'format': SNAPSHOT_FORMAT,
+                'saved_at': time.time(),
+                'cache': self.cache.export(),
+                'early_warnings': self.warnings.export(),
+                'forecast': self.forecasts.export()
+            }
+            directory = os.path.dirname(self.path) or '.'
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.bmkg_snapshot.', dir=directory)
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error writing BMKG snapshot: {e}")
+                return False
+            self._saved_state = state
+            self._last_saved = data['saved_at']
+            return True
+
+    def load(self):
+        """
+        Muat snapshot ke cache dan store peringatan.
+
+        Returns:
+            int: Jumlah entri cache yang dimuat (0 jika tidak ada snapshot)
+        """
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        start = time.perf_counter()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading BMKG snapshot: {e}")
+            return 0
+        if data.get('format') != SNAPSHOT_FORMAT:
+            return 0
+
+        restored = self.cache.restore(data.get('cache', []), max_age=self.max_age)
+        warnings = self.warnings.restore(data.get('early_warnings', {}))
+        self.forecasts.restore(data.get('forecast', {}))
+        with self._lock:
+            # What was just loaded is already on disk
+            self._saved_state = self._state()
+            self._last_loaded = time.time()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"BMKG snapshot loaded: {restored} cache entries, {warnings} warnings in {elapsed_ms:.1f} ms")
+        return restored
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "interval": BMKG_SNAPSHOT_INTERVAL,
+            "last_saved": datetime.fromtimestamp(self._last_saved).isoformat() if self._last_saved else None,
+            "last_loaded": datetime.fromtimestamp(self._last_loaded).isoformat() if self._last_loaded else None
+        }
+
+
+bmkg_snapshot = BMKGSnapshot(bmkg_cache, early_warnings, forecast_store)
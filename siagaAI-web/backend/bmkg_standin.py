@@ -0,0 +1,411 @@
+"""
+Modul Stand-in BMKG - Server lokal pengganti API BMKG untuk uji beban/latensi
+
+Dokumentasi Bahasa Indonesia:
+- Menyajikan ulang (replay) payload BMKG yang direkam: prakiraan cuaca
+  adm4, autogempa, gempadirasakan dan RSS peringatan dini nowcast, dengan
+  path yang sama seperti server BMKG asli
+- Backend diarahkan ke stand-in lewat BMKG_API_BASE_URL,
+  BMKG_DATA_BASE_URL dan BMKG_ALERTS_BASE_URL
+- Fixture dibaca dari folder bmkg_fixtures/; prakiraan cuaca memakai
+  weather/<adm4>.json jika ada, selain itu prakiraan-cuaca.json dengan kode
+  adm4 diganti dan waktu slot digeser ke slot 3 jam saat ini agar selalu
+  terlihat "segar"
+- Mendukung ETag / If-None-Match (304) seperti server asli
+- Gangguan bisa disuntikkan: latensi (+ jitter), error 503 dan timeout
+  (koneksi ditahan lalu ditutup tanpa response); semua acak memakai seed
+  sehingga hasil benchmark bisa diulang
+- Mode --record meneruskan request ke BMKG asli dan menyimpan response
+  sebagai fixture
+- Endpoint kontrol: GET /_standin/stats (jumlah request per route) dan
+  POST /_standin/config (ubah latensi/error saat berjalan, JSON body)
+
+Penggunaan:
+    python bmkg_standin.py --port 8600 --latency 0.2 --error-rate 0.1
+    BMKG_API_BASE_URL=http://127.0.0.1:8600 \\
+    BMKG_DATA_BASE_URL=http://127.0.0.1:8600 \\
+    BMKG_ALERTS_BASE_URL=http://127.0.0.1:8600 python app.py
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from email.utils import parsedate_to_datetime, format_datetime
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bmkg_fixtures')
+
+# Upstream asli untuk mode --record
+UPSTREAM = {
+    'weather': 'https://api.bmkg.go.id',
+    'autogempa': 'https://data.bmkg.go.id',
+    'gempadirasakan': 'https://data.bmkg.go.id',
+    'nowcast': 'https://www.bmkg.go.id',
+}
+
+# path -> (nama route, file fixture, content type)
+ROUTES = {
+    '/publik/prakiraan-cuaca': ('weather', 'prakiraan-cuaca.json', 'application/json'),
+    '/DataMKG/TEWS/autogempa.json': ('autogempa', 'autogempa.json', 'application/json'),
+    '/DataMKG/TEWS/gempadirasakan.json': ('gempadirasakan', 'gempadirasakan.json', 'application/json'),
+    '/alerts/nowcast/id/rss.xml': ('nowcast', 'nowcast.xml', 'application/rss+xml; charset=utf-8'),
+}
+
+ADM4_PATTERN = re.compile(r'^\d{2}(\.\d{2}){2}\.\d{4}$')
+SLOT_SECONDS = 3 * 3600
+LOCAL_OFFSET = timedelta(hours=7)
+# pubDate peringatan terbaru digeser ke awal periode ini
+NOWCAST_SHIFT_SECONDS = 15 * 60
+PUB_DATE_PATTERN = re.compile(rb'<pubDate>([^<]+)</pubDate>')
+
+
+def shift_forecast(data, adm4, now=None):
+    """
+    Sesuaikan fixture prakiraan ke kode adm4 dan waktu sekarang.
+
+    Args:
+        data (dict): Response prakiraan-cuaca BMKG yang direkam
+        adm4 (str): Kode adm4 yang diminta
+        now (float): Epoch acuan (default sekarang)
+
+    Returns:
+        dict: Salinan data dengan slot pertama = slot 3 jam yang sedang berjalan
+    """
+    data = copy.deepcopy(data)
+    now = time.time() if now is None else now
+    current = datetime.fromtimestamp(now - now % SLOT_SECONDS, timezone.utc)
+
+    for location in [data.get('lokasi')] + [item.get('lokasi') for item in data.get('data', [])]:
+        if isinstance(location, dict):
+            location['adm4'] = adm4
+
+    first = None
+    for item in data.get('data', []):
+        for day in item.get('cuaca', []):
+            for slot in day if isinstance(day, list) else [day]:
+                try:
+                    recorded = datetime.strptime(slot['utc_datetime'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                first = first or recorded
+                moved = current + (recorded - first)
+                slot['datetime'] = moved.strftime('%Y-%m-%dT%H:%M:%SZ')
+                slot['utc_datetime'] = moved.strftime('%Y-%m-%d %H:%M:%S')
+                slot['local_datetime'] = (moved + LOCAL_OFFSET).strftime('%Y-%m-%d %H:%M:%S')
+    return data
+
+
+def shift_nowcast(raw, now=None):
+    """
+    Geser pubDate RSS nowcast yang direkam sehingga item terbaru terbit di
+    awal periode NOWCAST_SHIFT_SECONDS saat ini (jarak antar item tetap),
+    agar tidak langsung kedaluwarsa oleh EARLY_WARNING_MAX_AGE_HOURS.
+    """
+    now = time.time() if now is None else now
+    dates = []
+    for match in PUB_DATE_PATTERN.finditer(raw):
+        try:
+            dates.append(parsedate_to_datetime(match.group(1).decode('utf-8').strip()))
+        except (TypeError, ValueError, IndexError):
+            pass
+    if not dates:
+        return raw
+    offset = datetime.fromtimestamp(now - now % NOWCAST_SHIFT_SECONDS, timezone.utc) - max(dates)
+
+    def replace(match):
+        try:
+            recorded = parsedate_to_datetime(match.group(1).decode('utf-8').strip())
+        except (TypeError, ValueError, IndexError):
+            return match.group(0)
+        moved = (recorded + offset).astimezone(recorded.tzinfo)
+        return b'<pubDate>' + format_datetime(moved).encode('utf-8') + b'</pubDate>'
+
+    return PUB_DATE_PATTERN.sub(replace, raw)
+
+
+class StandinState:
+    """
+    Fixture, konfigurasi gangguan dan statistik stand-in (dipakai bersama
+    oleh semua thread handler).
+
+    Args:
+        fixtures_dir (str): Folder fixture
+        latency (float): Latensi dasar per response (detik)
+        jitter (float): Tambahan latensi acak maksimum (detik)
+        error_rate (float): Peluang response 503 (0-1)
+        timeout_rate (float): Peluang koneksi ditahan lalu ditutup (0-1)
+        timeout_seconds (float): Lama koneksi ditahan saat timeout
+        seed (int): Seed RNG agar gangguan bisa diulang
+        record (bool): Teruskan ke BMKG asli dan simpan fixture
+    """
+
+    CONFIG_KEYS = ('latency', 'jitter', 'error_rate', 'timeout_rate', 'timeout_seconds')
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency=0.0, jitter=0.0, error_rate=0.0,
+                 timeout_rate=0.0, timeout_seconds=30.0, seed=None, record=False):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.record = record
+        self._random = random.Random(seed)
+        self._fixtures = {}
+        self._rendered = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, values):
+        """Ubah parameter gangguan; key yang tidak dikenal diabaikan."""
+        with self._lock:
+            for key in self.CONFIG_KEYS:
+                if key in values:
+                    setattr(self, key, float(values[key]))
+        return self.config()
+
+    def config(self):
+        return {key: getattr(self, key) for key in self.CONFIG_KEYS}
+
+    def draw(self):
+        """
+        Tentukan nasib satu request.
+
+        Returns:
+            tuple: (hasil 'ok' | 'error' | 'timeout', delay detik)
+        """
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            if roll < self.timeout_rate:
+                return 'timeout', self.timeout_seconds
+            if roll < self.timeout_rate + self.error_rate:
+                return 'error', delay
+            return 'ok', delay
+
+    def count(self, route, outcome):
+        with self._lock:
+            route_stats = self._stats.setdefault(route, {})
+            route_stats[outcome] = route_stats.get(outcome, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {'config': self.config(), 'record': self.record,
+                    'routes': {route: dict(counts) for route, counts in self._stats.items()}}
+
+    def fixture(self, filename):
+        """Isi file fixture (bytes, di-cache di memori termasuk jika tidak ada), None jika tidak ada."""
+        with self._lock:
+            if filename in self._fixtures:
+                return self._fixtures[filename]
+        path = os.path.join(self.fixtures_dir, filename)
+        body = None
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                body = f.read()
+        with self._lock:
+            self._fixtures[filename] = body
+        return body
+
+    def rendered(self, key, raw, period, render):
+        """
+        Fixture yang waktunya digeser ke sekarang (render(raw, now) -> bytes).
+
+        Notes:
+            - Hasil di-cache per key selama satu periode, sehingga ETag stabil
+              dan stand-in tidak menjadi bottleneck saat uji beban
+        """
+        if raw is None:
+            return None
+        now = time.time()
+        bucket = int(now // period)
+        with self._lock:
+            cached = self._rendered.get(key)
+        if cached and cached[0] == bucket and cached[1] is raw:
+            return cached[2]
+        body = render(raw, now)
+        with self._lock:
+            self._rendered[key] = (bucket, raw, body)
+        return body
+
+    def save_fixture(self, filename, body):
+        path = os.path.join(self.fixtures_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        with self._lock:
+            self._fixtures[filename] = body
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Handler HTTP stand-in; state diambil dari self.server.state."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BMKGStandin/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=b'', content_type='application/json', headers=None):
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode('utf-8'))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/_standin/config':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            values = json.loads(self.rfile.read(length) or b'{}')
+            self._send_json(200, self.server.state.configure(values))
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlsplit(self.path)
+        if url.path == '/_standin/stats':
+            self._send_json(200, state.stats())
+            return
+        route = ROUTES.get(url.path)
+        if route is None:
+            self._send_json(404, {'error': 'Not found'})
+            return
+        name, filename, content_type = route
+
+        adm4 = None
+        if name == 'weather':
+            adm4 = (parse_qs(url.query).get('adm4') or [''])[0]
+            if not ADM4_PATTERN.match(adm4):
+                state.count(name, 'bad_request')
+                self._send_json(400, {'message': 'Kode wilayah tidak valid'})
+                return
+
+        outcome, delay = state.draw()
+        state.count(name, outcome)
+        if outcome == 'timeout':
+            # Hold the connection past the client's timeout, then drop it
+            time.sleep(delay)
+            self.close_connection = True
+            return
+        if delay:
+            time.sleep(delay)
+        if outcome == 'error':
+            self._send_json(503, {'message': 'Service Unavailable'})
+            return
+
+        body = self._body(name, filename, adm4, url.query)
+        if body is None:
+            state.count(name, 'missing')
+            self._send_json(404, {'message': 'Data tidak ditemukan'})
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        if etag in (self.headers.get('If-None-Match') or ''):
+            self._send(304, headers={'ETag': etag})
+            return
+        self._send(200, body, content_type, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+    def _body(self, name, filename, adm4, query):
+        """Payload route: rekam dari BMKG asli (mode record) atau replay fixture."""
+        state = self.server.state
+        own_file = f'weather/{adm4}.json' if name == 'weather' else filename
+
+        if state.record:
+            body = self._record(name, own_file, query)
+            if body is not None:
+                return body
+
+        if name == 'nowcast':
+            return state.rendered(name, state.fixture(filename), NOWCAST_SHIFT_SECONDS, shift_nowcast)
+        if name != 'weather':
+            return state.fixture(filename)
+        return state.rendered(
+            adm4, state.fixture(own_file) or state.fixture(filename), SLOT_SECONDS,
+            lambda raw, now: json.dumps(shift_forecast(json.loads(raw), adm4, now), ensure_ascii=False).encode('utf-8')
+        )
+
+    def _record(self, name, filename, query):
+        import requests
+
+        url = UPSTREAM[name] + urlsplit(self.path).path + (f'?{query}' if query else '')
+        try:
+            response = requests.get(url, timeout=15, headers={'User-Agent': 'SiagaAI-Standin/1.0'})
+        except requests.exceptions.RequestException as e:
+            print(f"Record {url} failed: {e}")
+            return None
+        if response.status_code != 200:
+            print(f"Record {url} failed: HTTP {response.status_code}")
+            return None
+        self.server.state.save_fixture(filename, response.content)
+        return response.content
+
+
+def create_server(host='127.0.0.1', port=8600, state=None, verbose=False):
+    """
+    Buat server stand-in (belum berjalan).
+
+    Returns:
+        ThreadingHTTPServer: Panggil serve_forever() / shutdown()
+    """
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.state = state or StandinState()
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in lokal API BMKG untuk uji beban dan latensi')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help='folder fixture')
+    parser.add_argument('--record', action='store_true', help='teruskan ke BMKG asli dan simpan fixture')
+    parser.add_argument('--latency', type=float, default=0.0, help='latensi dasar (detik)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='tambahan latensi acak maksimum (detik)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='peluang response 503 (0-1)')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='peluang koneksi ditahan lalu ditutup (0-1)')
+    parser.add_argument('--timeout-seconds', type=float, default=30.0, help='lama koneksi ditahan saat timeout')
+    parser.add_argument('--seed', type=int, default=None, help='seed RNG agar gangguan bisa diulang')
+    parser.add_argument('--verbose', action='store_true', help='log setiap request')
+    args = parser.parse_args()
+
+    state = StandinState(
+        fixtures_dir=args.fixtures, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, timeout_seconds=args.timeout_seconds, seed=args.seed, record=args.record
+    )
+    server = create_server(args.host, args.port, state, verbose=args.verbose)
+    print(f"BMKG stand-in listening on http://{args.host}:{args.port} (fixtures: {args.fixtures})")
+    print(f"Config: {json.dumps(state.config())}{' [record]' if args.record else ''}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
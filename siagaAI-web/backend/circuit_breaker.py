@@ -0,0 +1,172 @@
+"""
+Modul Circuit Breaker - Gagal cepat saat layanan eksternal bermasalah
+
+Dokumentasi Bahasa Indonesia:
+- Satu breaker per endpoint eksternal (mis. cuaca BMKG, autogempa,
+  HuggingFace)
+- closed: request diteruskan; setelah failure_threshold kegagalan
+  berturut-turut, breaker menjadi open
+- open: request langsung ditolak (CircuitOpen) tanpa menunggu timeout,
+  sampai reset_timeout berlalu
+- half_open: satu request percobaan diteruskan; berhasil -> closed,
+  gagal -> open lagi
+- Hasil None dari fungsi yang dibungkus dihitung sebagai kegagalan
+
+Konfigurasi (environment):
+- BREAKER_FAILURE_THRESHOLD (5)
+- BREAKER_RESET_SECONDS (30)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '30'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Dilempar ketika breaker menolak request (open atau percobaan sedang berjalan)."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker untuk satu endpoint.
+
+    Args:
+        name (str): Nama endpoint (untuk status dan log)
+        failure_threshold (int): Kegagalan berturut-turut sebelum open
+        reset_timeout (float): Lama open sebelum mencoba lagi (detik)
+
+    Usage:
+        try:
+            data = breaker.call(fetch_live)
+        except CircuitOpen:
+            data = None
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._last_failure = None
+        self._last_error = None
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.time() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self):
+        """True jika request boleh diteruskan (di half_open hanya satu percobaan)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"Circuit breaker {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._last_failure = time.time()
+            self._last_error = error
+            was_trial = self._trial_running
+            self._trial_running = False
+            if was_trial or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                if self._state != OPEN:
+                    print(f"Circuit breaker {self.name} open after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.time()
+
+    def call(self, fn):
+        """
+        Jalankan fn() melalui breaker.
+
+        Returns:
+            Hasil fn()
+
+        Raises:
+            CircuitOpen: Jika breaker menolak request
+            Exception: Exception dari fn() diteruskan setelah dicatat
+        """
+        if not self.allow():
+            raise CircuitOpen(f"Circuit breaker {self.name} open")
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_failure(str(e))
+            raise
+        if result is None:
+            self.record_failure("no data")
+        else:
+            self.record_success()
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            state = self._current_state()
+            retry_at = self._opened_at + self.reset_timeout if state == OPEN else None
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "rejected": self._rejected,
+                "last_failure": datetime.fromtimestamp(self._last_failure).isoformat() if self._last_failure else None,
+                "last_error": self._last_error,
+                "retry_at": datetime.fromtimestamp(retry_at).isoformat() if retry_at else None
+            }
+
+
+class BreakerRegistry:
+    """Kumpulan breaker per nama, dibuat saat pertama kali diminta."""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name)
+            return breaker
+
+    def stats(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.to_dict() for breaker in breakers}
+
+
+breakers = BreakerRegistry()
@@ -0,0 +1,288 @@
+"""
+Modul Backend Classifier - Antarmuka pluggable untuk klasifikasi bencana
+
+Dokumentasi Bahasa Indonesia:
+- 'rule'     : Classifier rule-based multi-fitur (disaster_classifier.py)
+- 'model'    : Model CNN kecil (mis. MobileNet terkuantisasi) via TFLite
+               Interpreter dengan jumlah thread yang bisa diatur dan
+               inferensi batch
+- 'ensemble' : Rata-rata berbobot skor rule-based dan model
+- Semua backend menerima list gambar BGR yang sudah di-decode dan
+  mengembalikan hasil dengan skema yang sama (build_classification_result)
+
+Konfigurasi (environment):
+- CLASSIFIER_BACKEND: Backend default (rule/model/ensemble), default 'rule'
+- CLASSIFIER_MODEL_PATH: Path file .tflite
+- CLASSIFIER_MODEL_LABELS: Urutan label output model, dipisah koma
+  (default: kebakaran,gunung_berapi,gempa,tsunami,banjir,tanah_longsor);
+  label di luar kategori bencana (mis. 'normal') ikut di softmax tapi
+  tidak masuk skor
+- CLASSIFIER_MODEL_THREADS: Jumlah thread interpreter (default: jumlah CPU)
+- CLASSIFIER_ENSEMBLE_MODEL_WEIGHT: Bobot model di ensemble (default 0.5)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from disaster_classifier import DISASTER_NAMES, build_classification_result, score_images
+
+CLASSIFIER_BACKEND = os.getenv('CLASSIFIER_BACKEND', 'rule')
+CLASSIFIER_MODEL_PATH = os.getenv('CLASSIFIER_MODEL_PATH', '')
+CLASSIFIER_MODEL_LABELS = [
+    label.strip() for label in os.getenv('CLASSIFIER_MODEL_LABELS', ','.join(DISASTER_NAMES)).split(',') if label.strip()
+]
+CLASSIFIER_MODEL_THREADS = int(os.getenv('CLASSIFIER_MODEL_THREADS', str(os.cpu_count() or 1)))
+CLASSIFIER_ENSEMBLE_MODEL_WEIGHT = float(os.getenv('CLASSIFIER_ENSEMBLE_MODEL_WEIGHT', '0.5'))
+
+
+class BackendUnavailable(Exception):
+    """Dilempar ketika backend tidak bisa dipakai (model/library tidak ada)."""
+
+
+class ClassifierBackend(ABC):
+    """
+    Antarmuka dasar backend classifier.
+
+    Subclass wajib mengimplementasikan classify_images(images) yang
+    mengembalikan satu hasil per gambar dengan urutan yang sama.
+    """
+
+    name = 'base'
+
+    def availability(self):
+        """Kembalikan (True, None) jika siap, atau (False, alasan)."""
+        return True, None
+
+    @abstractmethod
+    def classify_images(self, images):
+        """Klasifikasi list gambar BGR; satu hasil per gambar, urutan sama."""
+
+
+class RuleBackend(ClassifierBackend):
+    """Classifier rule-based multi-fitur (HSV, GLCM, edge, deteksi objek)."""
+
+    name = 'rule'
+
+    def classify_images(self, images):
+        return [build_classification_result(**rule_scores) for rule_scores in score_images(images)]
+
+
+class TFLiteModelBackend(ClassifierBackend):
+    """
+    Model CNN kecil yang dijalankan dengan TFLite Interpreter di CPU.
+
+    Notes:
+        - Interpreter dimuat saat pertama dipakai (lazy), memakai
+          tflite_runtime jika terpasang, selain itu tensorflow.lite
+        - Tensor input di-resize ke ukuran batch, sehingga satu invoke()
+          memproses seluruh batch
+        - Mendukung model float32 (normalisasi MobileNet [-1, 1]) maupun
+          model terkuantisasi uint8/int8
+    """
+
+    name = 'model'
+
+    def __init__(self, model_path=CLASSIFIER_MODEL_PATH, labels=None, num_threads=CLASSIFIER_MODEL_THREADS):
+        self.model_path = model_path
+        self.labels = labels or CLASSIFIER_MODEL_LABELS
+        self.num_threads = max(1, num_threads)
+        self._interpreter = None
+        self._batch_size = None
+        self._lock = threading.Lock()
+
+    def availability(self):
+        if not self.model_path:
+            return False, "CLASSIFIER_MODEL_PATH belum diatur"
+        if not os.path.exists(self.model_path):
+            return False, f"File model tidak ditemukan: {self.model_path}"
+        try:
+            self._get_interpreter_class()
+        except ImportError:
+            return False, "tflite_runtime/tensorflow tidak terpasang"
+        return True, None
+
+    @staticmethod
+    def _get_interpreter_class():
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        return Interpreter
+
+    def _load(self):
+        available, reason = self.availability()
+        if not available:
+            raise BackendUnavailable(reason)
+
+        Interpreter = self._get_interpreter_class()
+        self._interpreter = Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        print(f"Classifier model loaded: {self.model_path} ({self.num_threads} threads, input {self._input['shape'].tolist()})")
+
+    def _preprocess(self, images):
+        import cv2
+
+        height, width = int(self._input['shape'][1]), int(self._input['shape'][2])
+        batch = np.stack([
+            cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), (width, height), interpolation=cv2.INTER_AREA)
+            for image in images
+        ])
+
+        dtype = self._input['dtype']
+        if dtype == np.uint8:
+            return batch
+        normalized = batch.astype(np.float32) / 127.5 - 1.0
+        if dtype == np.int8:
+            scale, zero_point = self._input['quantization']
+            return np.clip(np.round(normalized / scale + zero_point), -128, 127).astype(np.int8)
+        return normalized.astype(dtype)
+
+    def _postprocess(self, raw):
+        output = raw.astype(np.float32)
+        scale, zero_point = self._output['quantization']
+        if scale:
+            output = (output - zero_point) * scale
+        # Apply softmax when the model emits logits
+        if output.min() < 0 or not np.allclose(output.sum(axis=1), 1.0, atol=1e-2):
+            output = np.exp(output - output.max(axis=1, keepdims=True))
+            output /= output.sum(axis=1, keepdims=True)
+        return output
+
+    def predict_scores(self, images):
+        """
+        Jalankan inferensi batch dan kembalikan skor per kategori bencana.
+
+        Returns:
+            list: dict {kategori: probabilitas} per gambar
+        """
+        if not images:
+            return []
+
+        with self._lock:
+            if self._interpreter is None:
+                self._load()
+
+            batch = self._preprocess(images)
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input['index'], list(batch.shape))
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+
+            self._interpreter.set_tensor(self._input['index'], batch)
+            self._interpreter.invoke()
+            probabilities = self._postprocess(self._interpreter.get_tensor(self._output['index']))
+
+        label_index = {label: i for i, label in enumerate(self.labels)}
+        return [
+            {category: round(float(row[label_index[category]]), 4) if category in label_index else 0.0
+             for category in DISASTER_NAMES}
+            for row in probabilities
+        ]
+
+    def classify_images(self, images):
+        results = []
+        for scores in self.predict_scores(images):
+            reasons = {
+                category: f"Model CNN memprediksi {name} dengan probabilitas {scores[category] * 100:.1f}%"
+                for category, name in DISASTER_NAMES.items()
+            }
+            results.append(build_classification_result(scores, reasons))
+        return results
+
+
+class EnsembleBackend(ClassifierBackend):
+    """
+    Gabungan rule-based dan model: skor akhir = rata-rata berbobot.
+
+    Notes:
+        - Fitur dan alasan (reason) diambil dari rule-based agar hasil
+          tetap bisa dijelaskan; probabilitas model ditambahkan ke reason
+        - Syarat indikator minimum rule-based tetap berlaku, sehingga model
+          tidak bisa meloloskan bencana yang diblokir pemeriksaan rule
+    """
+
+    name = 'ensemble'
+
+    def __init__(self, rule_backend, model_backend, model_weight=CLASSIFIER_ENSEMBLE_MODEL_WEIGHT):
+        self.rule_backend = rule_backend
+        self.model_backend = model_backend
+        self.model_weight = min(max(model_weight, 0.0), 1.0)
+
+    def availability(self):
+        return self.model_backend.availability()
+
+    def classify_images(self, images):
+        rule_scores = score_images(images)
+        model_scores = self.model_backend.predict_scores(images)
+
+        results = []
+        for rule, model in zip(rule_scores, model_scores):
+            scores = {
+                category: round((1 - self.model_weight) * rule['scores'][category] + self.model_weight * model[category], 4)
+                for category in DISASTER_NAMES
+            }
+            reasons = {
+                category: f"{rule['reasons'][category]} | Model: {model[category] * 100:.1f}%"
+                for category in DISASTER_NAMES
+            }
+            results.append(build_classification_result(
+                scores, reasons, min_indicators=rule['min_indicators'], analisis_fitur=rule['analisis_fitur']
+            ))
+        return results
+
+
+_rule_backend = RuleBackend()
+_model_backend = TFLiteModelBackend()
+
+BACKENDS = {
+    'rule': _rule_backend,
+    'model': _model_backend,
+    'ensemble': EnsembleBackend(_rule_backend, _model_backend)
+}
+
+
+def get_backend(name=None):
+    """
+    Ambil backend berdasarkan nama (default: CLASSIFIER_BACKEND).
+
+    Raises:
+        ValueError: Jika nama backend bukan string atau tidak dikenal
+        BackendUnavailable: Jika backend belum siap (model/library tidak ada)
+    """
+    if name is None or name == '':
+        name = CLASSIFIER_BACKEND
+    if not isinstance(name, str):
+        raise ValueError(f"Nama backend harus string, bukan {type(name).__name__}")
+    name = name.lower()
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Backend tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+
+    available, reason = backend.availability()
+    if not available:
+        raise BackendUnavailable(f"Backend '{name}' tidak tersedia: {reason}")
+    return backend
+
+
+def list_backends():
+    """Daftar backend beserta status ketersediaannya."""
+    backends = []
+    for name, backend in BACKENDS.items():
+        available, reason = backend.availability()
+        backends.append({
+            "name": name,
+            "available": available,
+            "reason": reason,
+            "default": name == CLASSIFIER_BACKEND
+        })
+    return backends
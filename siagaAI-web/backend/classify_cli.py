@@ -0,0 +1,231 @@
+"""
+CLI Klasifikasi Batch Offline - Klasifikasi folder/arsip gambar ke JSONL
+
+Dokumentasi Bahasa Indonesia:
+- Menelusuri folder (rekursif) atau arsip tar (.tar, .tar.gz, .tgz)
+- Decode dan klasifikasi dijalankan di process pool, per chunk gambar
+  sehingga tiap worker memakai jalur batch tervektorisasi classifier
+- Hasil ditulis bertahap ke file JSONL (satu baris per gambar)
+- Bisa dilanjutkan (resume): setiap gambar yang selesai dicatat di file
+  checkpoint dan dilewati pada run berikutnya
+- Chunk yang gagal di worker (exception atau worker mati) ditulis sebagai
+  record error per file lalu run dilanjutkan; file tersebut tidak masuk
+  checkpoint sehingga dicoba lagi pada run berikutnya
+- Backend diperiksa di proses utama sebelum pool dibuat, sehingga backend
+  yang tidak dikenal/belum siap langsung dilaporkan dengan jelas
+- Melaporkan throughput (gambar/detik) secara berkala dan di akhir
+
+Usage:
+    python classify_cli.py ./foto_drone --output hasil.jsonl --workers 4
+    python classify_cli.py kiriman.tar.gz --output hasil.jsonl --backend ensemble
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import sys
+import json
+import time
+import tarfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+PROGRESS_INTERVAL_SECONDS = 5
+
+# Backend classifier milik proses worker (diisi oleh _init_worker)
+_worker_backend = None
+
+
+def iter_directory(folder):
+    """Yield (key, path) untuk setiap file gambar di folder (urut, rekursif)."""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, folder), path
+
+
+def iter_tar(archive_path):
+    """Yield (key, bytes) untuk setiap file gambar di arsip tar (berurutan)."""
+    with tarfile.open(archive_path, 'r:*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                f = archive.extractfile(member)
+                if f is not None:
+                    yield member.name, f.read()
+
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(backend_name):
+    """Initializer proses worker: siapkan backend dan bisukan log fitur."""
+    global _worker_backend
+    from classifier_backends import get_backend
+
+    # The classifier prints every feature vector; keep worker output quiet
+    sys.stdout = open(os.devnull, 'w')
+    _worker_backend = get_backend(backend_name)
+
+
+def classify_chunk(chunk):
+    """
+    Decode dan klasifikasi satu chunk gambar di proses worker.
+
+    Args:
+        chunk (list): (key, source) dengan source berupa path atau bytes
+
+    Returns:
+        list: Record hasil per gambar (key + hasil klasifikasi)
+    """
+    from disaster_classifier import decode_image_bytes
+
+    decoded = []
+    for key, source in chunk:
+        try:
+            if isinstance(source, bytes):
+                image = decode_image_bytes(source)
+            else:
+                with open(source, 'rb') as f:
+                    image = decode_image_bytes(f.read())
+        except OSError as e:
+            print(f"Error reading {key}: {e}")
+            image = None
+        decoded.append((key, image))
+
+    valid = [image for _, image in decoded if image is not None]
+    results = iter(_worker_backend.classify_images(valid))
+
+    records = []
+    for key, image in decoded:
+        if image is None:
+            records.append({"file": key, "success": False, "error": "Gambar tidak dapat dibaca"})
+        else:
+            records.append({"file": key, **next(results)})
+    return records
+
+
+def load_checkpoint(path):
+    """Baca daftar key yang sudah selesai dari file checkpoint."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def create_pool(workers, backend_name):
+    return ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker, initargs=(backend_name,))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi batch gambar bencana ke JSONL")
+    parser.add_argument('source', help="Folder gambar atau arsip tar")
+    parser.add_argument('--output', '-o', default='hasil_klasifikasi.jsonl', help="File output JSONL (ditambahkan)")
+    parser.add_argument('--checkpoint', help="File checkpoint (default: <output>.checkpoint)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Jumlah proses worker")
+    parser.add_argument('--chunk-size', type=int, default=8, help="Gambar per task worker")
+    parser.add_argument('--backend', default='rule', help="Backend classifier (rule/model/ensemble)")
+    args = parser.parse_args(argv)
+
+    from classifier_backends import BackendUnavailable, get_backend
+    try:
+        get_backend(args.backend)
+    except (ValueError, BackendUnavailable) as e:
+        print(f"Backend {args.backend} tidak bisa dipakai: {e}")
+        return 1
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    done = load_checkpoint(checkpoint_path)
+
+    if os.path.isdir(args.source):
+        items = iter_directory(args.source)
+    elif args.source.lower().endswith(TAR_EXTENSIONS):
+        items = iter_tar(args.source)
+    else:
+        print(f"Sumber tidak dikenali (bukan folder/arsip tar): {args.source}")
+        return 1
+
+    pending_items = ((key, source) for key, source in items if key not in done)
+    chunks = iter_chunks(pending_items, max(1, args.chunk_size))
+
+    print(f"Mulai klasifikasi {args.source} -> {args.output} ({args.workers} worker, backend {args.backend}, {len(done)} sudah selesai)")
+
+    processed = failed = 0
+    start = last_report = time.perf_counter()
+    max_in_flight = max(1, args.workers) * 2
+
+    pool = create_pool(args.workers, args.backend)
+    with open(args.output, 'a', encoding='utf-8') as output, \
+            open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+
+        # future -> (chunk keys, pool), so a failed chunk can still be reported per file
+        in_flight = {}
+        exhausted = False
+        while in_flight or not exhausted:
+            # Keep a bounded number of chunks queued so tar bytes don't pile up in memory
+            while not exhausted and len(in_flight) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    in_flight[pool.submit(classify_chunk, chunk)] = ([key for key, _ in chunk], pool)
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in finished:
+                keys, owner = in_flight.pop(future)
+                try:
+                    records = future.result()
+                    completed = True
+                except Exception as e:
+                    # A crashed worker breaks the whole pool; its other chunks fail here too
+                    broken = broken or (isinstance(e, BrokenProcessPool) and owner is pool)
+                    print(f"Error classifying chunk ({len(keys)} gambar, mulai {keys[0]}): {e}")
+                    records = [{"file": key, "success": False, "error": f"Chunk gagal: {e}"} for key in keys]
+                    completed = False
+
+                for record in records:
+                    output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    if not record.get("success"):
+                        failed += 1
+                output.flush()
+                # Checkpoint only after the results are on disk; failed chunks are retried next run
+                if completed:
+                    checkpoint.write(''.join(f"{record['file']}\n" for record in records))
+                    checkpoint.flush()
+                processed += len(records)
+
+            if broken:
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = create_pool(args.workers, args.backend)
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = now
+                print(f"  {processed} gambar, {processed / (now - start):.1f} gambar/detik")
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"Selesai: {processed} gambar ({failed} gagal) dalam {elapsed:.1f} detik, {rate:.1f} gambar/detik")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,17 @@ import cv2
 import math
 
 
+# Nama tampilan per kategori bencana (urutan = urutan skor)
+DISASTER_NAMES = {
+    "kebakaran": "Kebakaran",
+    "gunung_berapi": "Erupsi Gunung Berapi",
+    "gempa": "Gempa Bumi",
+    "tsunami": "Tsunami",
+    "banjir": "Banjir",
+    "tanah_longsor": "Tanah Longsor"
+}
+
+
 def decode_base64_image(image_data: str) -> np.ndarray:
     """Decode gambar dari format base64 ke array numpy."""
     try:
@@ -25,6 +36,15 @@ def decode_base64_image(image_data: str) -> np.ndarray:
             image_data = image_data.split(',')[1]
         
         image_bytes = base64.b64decode(image_data)
+        return decode_image_bytes(image_bytes)
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+
+def decode_image_bytes(image_bytes: bytes) -> np.ndarray:
+    """Decode bytes file gambar (JPEG/PNG/...) ke array numpy BGR 300x300."""
+    try:
         pil_image = Image.open(io.BytesIO(image_bytes))
         
         # Resize for faster processing
@@ -44,183 +64,168 @@ def analyze_hsv_colors(image: np.ndarray) -> dict:
     """
     Analisis warna menggunakan HSV color space - Extended version.
     """
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    h_channel = hsv[:, :, 0]  # Hue: 0-179
-    s_channel = hsv[:, :, 1]  # Saturation: 0-255
-    v_channel = hsv[:, :, 2]  # Value: 0-255
+    return analyze_hsv_colors_batch(image[np.newaxis])[0]
+
+
+def analyze_hsv_colors_batch(images: np.ndarray) -> list:
+    """
+    Analisis warna HSV untuk satu batch gambar (N, H, W, 3) sekaligus.
     
-    height, width = h_channel.shape
-    total_pixels = height * width
+    Semua piksel di seluruh batch dihitung dengan mask numpy, bukan loop
+    per piksel, sehingga hasilnya identik dengan analisis satu per satu.
+    """
+    n, height, width = images.shape[:3]
+    hsv = cv2.cvtColor(images.reshape(n * height, width, 3), cv2.COLOR_BGR2HSV)
+    hsv = hsv.reshape(n, height, width, 3)
+    h_channel = hsv[..., 0]  # Hue: 0-179
     
     # Normalize
-    s_norm = s_channel / 255.0
-    v_norm = v_channel / 255.0
-    
-    # Count colors
-    merah = oranye = hijau = biru = coklat = abu = putih = 0
-    merah_terang = oranye_intens = 0
-    
-    for i in range(height):
-        for j in range(width):
-            h = h_channel[i, j]
-            s = s_norm[i, j]
-            v = v_norm[i, j]
-            
-            # Skip very dark pixels
-            if v < 0.1:
-                continue
-            
-            # Red (Hue 0-20)
-            if h <= 20:
-                merah += 1
-                if s > 0.5 and v > 0.6:
-                    merah_terang += 1
-            
-            # Orange (Hue 20-40)
-            if 20 <= h <= 40:
-                oranye += 1
-                if s > 0.6 and v > 0.5:
-                    oranye_intens += 1
-            
-            # Green (Hue 35-85)
-            if 35 <= h <= 85:
-                hijau += 1
-            
-            # Blue (Hue 85-130)
-            if 85 <= h <= 130:
-                biru += 1
-            
-            # Brown (Hue 20-35, medium saturation)
-            if 20 <= h <= 35 and 0.2 < s < 0.6:
-                coklat += 1
-            
-            # Gray/Abu (low saturation)
-            if s < 0.3 and v > 0.3:
-                abu += 1
-            
-            # White (high value, low saturation)
-            if v > 0.8 and s < 0.2:
-                putih += 1
-    
-    effective_pixels = total_pixels * 0.85
-    
-    return {
-        "merah": round((merah / effective_pixels) * 100, 2),
-        "merah_terang": round((merah_terang / effective_pixels) * 100, 2),
-        "oranye": round((oranye / effective_pixels) * 100, 2),
-        "oranye_intens": round((oranye_intens / effective_pixels) * 100, 2),
-        "hijau": round((hijau / effective_pixels) * 100, 2),
-        "biru": round((biru / effective_pixels) * 100, 2),
-        "coklat": round((coklat / effective_pixels) * 100, 2),
-        "abu": round((abu / effective_pixels) * 100, 2),
-        "putih": round((putih / effective_pixels) * 100, 2),
-        "avg_saturation": round(np.mean(s_norm) * 100, 2),
-        "avg_value": round(np.mean(v_norm) * 100, 2)
+    s_norm = hsv[..., 1] / 255.0
+    v_norm = hsv[..., 2] / 255.0
+    
+    # Skip very dark pixels
+    bright = v_norm >= 0.1
+    
+    def count(mask):
+        return (mask & bright).sum(axis=(1, 2))
+    
+    red = h_channel <= 20
+    orange = (h_channel >= 20) & (h_channel <= 40)
+    
+    counts = {
+        "merah": count(red),
+        "merah_terang": count(red & (s_norm > 0.5) & (v_norm > 0.6)),
+        "oranye": count(orange),
+        "oranye_intens": count(orange & (s_norm > 0.6) & (v_norm > 0.5)),
+        "hijau": count((h_channel >= 35) & (h_channel <= 85)),
+        "biru": count((h_channel >= 85) & (h_channel <= 130)),
+        "coklat": count((h_channel >= 20) & (h_channel <= 35) & (s_norm > 0.2) & (s_norm < 0.6)),
+        "abu": count((s_norm < 0.3) & (v_norm > 0.3)),
+        "putih": count((v_norm > 0.8) & (s_norm < 0.2))
     }
+    avg_saturation = s_norm.mean(axis=(1, 2))
+    avg_value = v_norm.mean(axis=(1, 2))
+    
+    effective_pixels = height * width * 0.85
+    
+    results = []
+    for i in range(n):
+        result = {name: round((int(values[i]) / effective_pixels) * 100, 2) for name, values in counts.items()}
+        result["avg_saturation"] = round(avg_saturation[i] * 100, 2)
+        result["avg_value"] = round(avg_value[i] * 100, 2)
+        results.append(result)
+    return results
 
 
 def calculate_glcm_features(gray_image: np.ndarray) -> dict:
     """
     Ekstrak fitur tekstur menggunakan GLCM.
     """
+    return calculate_glcm_features_batch(gray_image[np.newaxis])[0]
+
+
+def calculate_glcm_features_batch(gray_images: np.ndarray) -> list:
+    """
+    Ekstrak fitur tekstur GLCM untuk batch gambar grayscale (N, H, W).
+    
+    Pasangan piksel horizontal dari semua gambar dihitung dengan satu
+    np.bincount; setiap gambar mendapat blok indeks GLCM sendiri.
+    """
     # Quantize to 8 levels
     levels = 8
-    gray_quantized = (gray_image / 256 * levels).astype(np.uint8)
+    n = gray_images.shape[0]
+    gray_quantized = (gray_images / 256 * levels).astype(np.intp)
     
     # Compute GLCM for horizontal adjacency
-    glcm = np.zeros((levels, levels), dtype=np.float64)
+    pairs = gray_quantized[:, :, :-1] * levels + gray_quantized[:, :, 1:]
+    pairs += (np.arange(n) * levels * levels)[:, np.newaxis, np.newaxis]
+    glcm = np.bincount(pairs.ravel(), minlength=n * levels * levels)
+    glcm = glcm.reshape(n, levels, levels).astype(np.float64)
     
-    height, width = gray_quantized.shape
-    for i in range(height):
-        for j in range(width - 1):
-            glcm[gray_quantized[i, j], gray_quantized[i, j + 1]] += 1
+    totals = glcm.sum(axis=(1, 2), keepdims=True)
+    glcm = np.divide(glcm, totals, out=glcm, where=totals > 0)
     
-    glcm = glcm / glcm.sum() if glcm.sum() > 0 else glcm
+    i, j = np.indices((levels, levels))
     
-    # Calculate features
     # 1. Contrast
-    contrast = 0
-    for i in range(levels):
-        for j in range(levels):
-            contrast += (i - j) ** 2 * glcm[i, j]
+    contrast = (glcm * ((i - j) ** 2)).sum(axis=(1, 2))
     
     # 2. Energy
-    energy = np.sum(glcm ** 2)
+    energy = (glcm ** 2).sum(axis=(1, 2))
     
     # 3. Homogeneity
-    homogeneity = 0
-    for i in range(levels):
-        for j in range(levels):
-            homogeneity += glcm[i, j] / (1 + abs(i - j))
+    homogeneity = (glcm / (1 + np.abs(i - j))).sum(axis=(1, 2))
     
     # 4. Entropy
-    entropy = 0
-    for i in range(levels):
-        for j in range(levels):
-            if glcm[i, j] > 0:
-                entropy -= glcm[i, j] * math.log2(glcm[i, j])
-    
-    return {
-        "contrast": round(contrast, 4),
-        "energy": round(energy, 4),
-        "homogeneity": round(homogeneity, 4),
-        "entropy": round(entropy, 4)
-    }
+    log_glcm = np.log2(glcm, out=np.zeros_like(glcm), where=glcm > 0)
+    entropy = -(glcm * log_glcm).sum(axis=(1, 2))
+    
+    return [{
+        "contrast": round(float(contrast[k]), 4),
+        "energy": round(float(energy[k]), 4),
+        "homogeneity": round(float(homogeneity[k]), 4),
+        "entropy": round(float(entropy[k]), 4)
+    } for k in range(n)]
 
 
 def analyze_edges_and_structure(image: np.ndarray, gray: np.ndarray) -> dict:
     """
     Edge detection dan analisis struktur.
     """
+    return analyze_edges_and_structure_batch(gray[np.newaxis])[0]
+
+
+def analyze_edges_and_structure_batch(gray_images: np.ndarray) -> list:
+    """
+    Edge detection dan analisis struktur untuk batch grayscale (N, H, W).
+    
+    Canny tetap dijalankan per gambar (OpenCV), tetapi analisis arah edge
+    memakai array tetangga yang digeser untuk seluruh batch.
+    """
     # Canny edge detection
-    edges = cv2.Canny(gray, 50, 150)
+    edges = np.stack([cv2.Canny(gray, 50, 150) for gray in gray_images]) > 0
     
-    height, width = edges.shape
+    n, height, width = edges.shape
     total_pixels = height * width
-    edge_pixels = np.sum(edges > 0)
-    edge_density = (edge_pixels / total_pixels) * 100
-    
-    # Analyze edge directions
-    horizontal_edges = 0
-    vertical_edges = 0
-    irregular_edges = 0
-    
-    for i in range(1, height - 1):
-        for j in range(1, width - 1):
-            if edges[i, j] > 0:
-                above = edges[i-1, j] > 0
-                below = edges[i+1, j] > 0
-                left = edges[i, j-1] > 0
-                right = edges[i, j+1] > 0
-                
-                if above or below:
-                    vertical_edges += 1
-                if left or right:
-                    horizontal_edges += 1
-                if (above and not below) or (not above and below):
-                    irregular_edges += 1
-    
-    total_dir_edges = horizontal_edges + vertical_edges
-    horizontal_ratio = horizontal_edges / max(total_dir_edges, 1)
-    vertical_ratio = vertical_edges / max(total_dir_edges, 1)
-    irregular_ratio = irregular_edges / max(edge_pixels, 1)
-    
-    # Detect building damage (many irregular edges)
-    building_damage = irregular_ratio > 0.3 and edge_density > 20
-    
-    # Detect slope pattern (diagonal edges)
-    # Simple slope detection via edge direction variance
-    slope_pattern = abs(horizontal_ratio - vertical_ratio) < 0.2 and edge_density > 15
-    
-    return {
-        "edge_density": round(edge_density, 2),
-        "horizontal_ratio": round(horizontal_ratio, 4),
-        "vertical_ratio": round(vertical_ratio, 4),
-        "irregular_ratio": round(irregular_ratio, 4),
-        "building_damage": building_damage,
-        "slope_pattern": slope_pattern,
-        "wave_pattern": horizontal_ratio > 0.55
-    }
+    edge_pixels = edges.sum(axis=(1, 2))
+    
+    # Analyze edge directions (interior pixels only)
+    center = edges[:, 1:-1, 1:-1]
+    above = edges[:, :-2, 1:-1]
+    below = edges[:, 2:, 1:-1]
+    left = edges[:, 1:-1, :-2]
+    right = edges[:, 1:-1, 2:]
+    
+    vertical_edges = (center & (above | below)).sum(axis=(1, 2))
+    horizontal_edges = (center & (left | right)).sum(axis=(1, 2))
+    irregular_edges = (center & (above ^ below)).sum(axis=(1, 2))
+    
+    results = []
+    for k in range(n):
+        edge_density = (int(edge_pixels[k]) / total_pixels) * 100
+        
+        total_dir_edges = int(horizontal_edges[k]) + int(vertical_edges[k])
+        horizontal_ratio = int(horizontal_edges[k]) / max(total_dir_edges, 1)
+        vertical_ratio = int(vertical_edges[k]) / max(total_dir_edges, 1)
+        irregular_ratio = int(irregular_edges[k]) / max(int(edge_pixels[k]), 1)
+        
+        # Detect building damage (many irregular edges)
+        building_damage = irregular_ratio > 0.3 and edge_density > 20
+        
+        # Detect slope pattern (diagonal edges)
+        # Simple slope detection via edge direction variance
+        slope_pattern = abs(horizontal_ratio - vertical_ratio) < 0.2 and edge_density > 15
+        
+        results.append({
+            "edge_density": round(edge_density, 2),
+            "horizontal_ratio": round(horizontal_ratio, 4),
+            "vertical_ratio": round(vertical_ratio, 4),
+            "irregular_ratio": round(irregular_ratio, 4),
+            "building_damage": building_damage,
+            "slope_pattern": slope_pattern,
+            "wave_pattern": horizontal_ratio > 0.55
+        })
+    return results
 
 
 def detect_lava(features: dict) -> dict:
@@ -333,32 +338,37 @@ def detect_horizon(image: np.ndarray) -> dict:
     Deteksi garis horizon - pemisah langit dan laut.
     """
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return detect_horizon_batch(gray[np.newaxis])[0]
+
+
+def detect_horizon_batch(gray_images: np.ndarray) -> list:
+    """
+    Deteksi garis horizon untuk batch grayscale (N, H, W).
     
-    height, width = gray.shape
+    Selisih antar baris dihitung sekali untuk seluruh batch; setiap baris
+    kandidat memakai selisih dengan baris di atas dan di bawahnya.
+    """
+    n, height, width = gray_images.shape
     
     # Look for horizontal lines at roughly 1/3 to 1/2 of image height
-    horizon_candidates = []
-    
-    for y in range(int(height * 0.3), int(height * 0.7)):
-        row = gray[y, :]
-        # Check contrast with row above and below
-        if y > 0 and y < height - 1:
-            above = gray[y-1, :]
-            below = gray[y+1, :]
-            
-            # Count significant transitions
-            transitions = np.sum(np.abs(row.astype(int) - above.astype(int)) > 30) + \
-                         np.sum(np.abs(row.astype(int) - below.astype(int)) > 30)
-            
-            if transitions > width * 0.5:
-                horizon_candidates.append(y)
-    
-    horizon_detected = len(horizon_candidates) > 0
+    y_start = max(int(height * 0.3), 1)
+    y_end = min(int(height * 0.7), height - 1)
     
-    return {
-        "horizon_detected": horizon_detected,
-        "horizon_line_count": len(horizon_candidates)
-    }
+    gray_int = gray_images.astype(np.int16)
+    # row_changes[:, k] = significant transitions between row k and row k+1
+    row_changes = (np.abs(gray_int[:, 1:] - gray_int[:, :-1]) > 30).sum(axis=2)
+    
+    if y_end > y_start:
+        rows = np.arange(y_start, y_end)
+        transitions = row_changes[:, rows - 1] + row_changes[:, rows]
+        candidate_counts = (transitions > width * 0.5).sum(axis=1)
+    else:
+        candidate_counts = np.zeros(n, dtype=np.intp)
+    
+    return [{
+        "horizon_detected": int(count) > 0,
+        "horizon_line_count": int(count)
+    } for count in candidate_counts]
 
 
 def detect_surface_flatness(texture: dict, edge: dict) -> dict:
@@ -396,18 +406,90 @@ def classify_disaster(image_data: str) -> dict:
             "error": "Gambar tidak dapat dibaca"
         }
     
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return classify_image(image)
+
+
+def classify_disaster_batch(image_data_list: list) -> list:
+    """
+    Klasifikasi banyak gambar base64 sekaligus.
     
-    # Step 1: HSV Color Analysis
-    features = analyze_hsv_colors(image)
-    print(f"Color Features: {features}")
+    Gambar yang gagal di-decode mendapat hasil error masing-masing;
+    sisanya diklasifikasikan sebagai satu batch tervektorisasi.
+    """
+    images = [decode_base64_image(image_data) for image_data in image_data_list]
+    valid = [image for image in images if image is not None]
+    valid_results = iter(classify_images(valid))
     
-    # Step 2: GLCM Texture Analysis
-    texture = calculate_glcm_features(gray)
-    print(f"Texture Features: {texture}")
+    return [
+        next(valid_results) if image is not None else {
+            "success": False,
+            "error": "Gambar tidak dapat dibaca"
+        }
+        for image in images
+    ]
+
+
+def classify_image(image: np.ndarray) -> dict:
+    """
+    Klasifikasi bencana untuk satu gambar BGR yang sudah di-decode.
+    """
+    return classify_images([image])[0]
+
+
+def classify_images(images: list) -> list:
+    """
+    Klasifikasi bencana untuk batch gambar BGR yang sudah di-decode.
+    """
+    return [build_classification_result(**rule_scores) for rule_scores in score_images(images)]
+
+
+def score_images(images: list) -> list:
+    """
+    Hitung skor rule-based untuk batch gambar BGR yang sudah di-decode.
+    
+    Gambar dikelompokkan berdasarkan ukuran, lalu fitur warna, tekstur,
+    edge dan horizon tiap kelompok diekstrak sekaligus dalam array numpy
+    (N, H, W). Hasil dikembalikan sesuai urutan input.
+    """
+    results = [None] * len(images)
+    
+    groups = {}
+    for index, image in enumerate(images):
+        groups.setdefault(image.shape, []).append(index)
+    
+    for indices in groups.values():
+        batch = np.stack([images[index] for index in indices])
+        n, height, width = batch.shape[:3]
+        gray_batch = cv2.cvtColor(batch.reshape(n * height, width, 3), cv2.COLOR_BGR2GRAY)
+        gray_batch = gray_batch.reshape(n, height, width)
+        
+        # Step 1-3: Color, texture, edge analysis for the whole batch
+        color_features = analyze_hsv_colors_batch(batch)
+        texture_features = calculate_glcm_features_batch(gray_batch)
+        edge_features = analyze_edges_and_structure_batch(gray_batch)
+        horizon_features = detect_horizon_batch(gray_batch)
+        
+        for k, index in enumerate(indices):
+            results[index] = compute_rule_scores(
+                images[index],
+                color_features[k],
+                texture_features[k],
+                edge_features[k],
+                horizon_features[k]
+            )
+    
+    return results
+
+
+def compute_rule_scores(image: np.ndarray, features: dict, texture: dict, edge: dict, horizon: dict) -> dict:
+    """
+    Hitung skor rule-based per kategori dari fitur yang sudah diekstrak.
     
-    # Step 3: Edge & Structure Analysis
-    edge = analyze_edges_and_structure(image, gray)
+    Returns:
+        dict: scores (0-1 per kategori), min_indicators, reasons, analisis_fitur
+    """
+    print(f"Color Features: {features}")
+    print(f"Texture Features: {texture}")
     print(f"Edge Features: {edge}")
     
     # Step 4: Specific Object Detection
@@ -415,7 +497,6 @@ def classify_disaster(image_data: str) -> dict:
     cone = detect_cone_shape(image)
     smoke = detect_smoke_advanced(features, texture, edge)
     foam = detect_foam(features, edge)
-    horizon = detect_horizon(image)
     flatness = detect_surface_flatness(texture, edge)
     
     print(f"Lava: {lava}, Cone: {cone}, Smoke: {smoke}")
@@ -600,21 +681,62 @@ def classify_disaster(image_data: str) -> dict:
         "tanah_longsor": round(score_tanah_longsor, 4)
     }
     
+    # Generate analysis reason
+    reasons = {
+        "kebakaran": f"Warna merah ({merah:.1f}%) dan oranye ({oranye:.1f}%) dominan dengan entropy tinggi ({entropy:.2f}) mengindikasikan kebakaran",
+        "gunung_berapi": f"Deteksi lava ({lava['lava_score']:.2f}) dan bentuk kerucut ({cone['cone_score']:.2f}) dengan indikator asap ({smoke['smoke_score']:.2f})",
+        "gempa": f"Kerusakan struktural ({'terdeteksi' if building_damage else 'tidak terdeteksi'}) dengan pola edge tidak beraturan ({irregular_edge*100:.1f}%)",
+        "tsunami": f"Pola gelombang ({'terdeteksi' if edge.get('wave_pattern') else 'tidak terdeteksi'}) dengan foam ({foam['foam_score']:.2f}) dan garis horizon ({'ada' if horizon['horizon_detected'] else 'tidak ada'})",
+        "banjir": f"Permukaan datar ({flatness['flatness_score']:.2f}) dengan homogenitas tinggi ({homogeneity:.2f}) dan warna coklat ({coklat:.1f}%)",
+        "tanah_longsor": f"Warna hijau ({hijau:.1f}%) dan coklat ({coklat:.1f}%) dengan kontras tinggi ({contrast:.2f}) mengindikasikan longsor"
+    }
+    
+    analisis_fitur = {
+        "warna_dominan": {
+            "merah": f"{merah}%",
+            "oranye": f"{oranye}%",
+            "hijau": f"{hijau}%",
+            "biru": f"{biru}%",
+            "coklat": f"{coklat}%",
+            "abu": f"{abu}%",
+            "putih": f"{features.get('putih', 0)}%"
+        },
+        "tekstur": {
+            "contrast": f"{contrast}",
+            "energy": f"{texture['energy']}",
+            "homogeneity": f"{homogeneity}",
+            "entropy": f"{entropy}"
+        },
+        "edge_density": f"{edge.get('edge_density', 0)}%",
+        "deteksi_lava": "Ya" if lava["lava_detected"] else "Tidak",
+        "deteksi_cone_shape": "Ya" if cone["cone_shape_detected"] else "Tidak",
+        "deteksi_asap": "Ya" if smoke["smoke_detected"] else "Tidak",
+        "deteksi_foam": "Ya" if foam["foam_detected"] else "Tidak",
+        "deteksi_horizon": "Ya" if horizon["horizon_detected"] else "Tidak",
+        "permukaan_air": "Datar" if flatness["surface_flat"] else "Tidak Datar"
+    }
+    
+    return {
+        "scores": scores,
+        "min_indicators": min_indicators,
+        "reasons": reasons,
+        "analisis_fitur": analisis_fitur
+    }
+
+
+def build_classification_result(scores: dict, reasons: dict, min_indicators: dict = None, analisis_fitur: dict = None) -> dict:
+    """
+    Susun hasil klasifikasi standar dari skor per kategori (0-1).
+    
+    Dipakai bersama oleh classifier rule-based dan backend model, sehingga
+    semua backend menghasilkan skema response yang sama. Jika
+    min_indicators None, syarat indikator minimum dianggap terpenuhi.
+    """
     # Get top 2 predictions
     sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
     top_2 = [item[0].replace("_", " ").title() for item in sorted_scores[:2]]
     top_score = sorted_scores[0][1]
     
-    # Map disaster names
-    disaster_names = {
-        "kebakaran": "Kebakaran",
-        "gunung_berapi": "Erupsi Gunung Berapi",
-        "gempa": "Gempa Bumi",
-        "tsunami": "Tsunami",
-        "banjir": "Banjir",
-        "tanah_longsor": "Tanah Longsor"
-    }
-    
     # Determine category with ULTRA-STRICT threshold
     # Only classify if confidence is VERY HIGH
     threshold = 0.65  # Much higher threshold
@@ -630,28 +752,18 @@ def classify_disaster(image_data: str) -> dict:
     
     # Must have minimum indicator for top category
     top_category = sorted_scores[0][0]
-    min_indicator_met = min_indicators.get(top_category, False)
+    min_indicator_met = True if min_indicators is None else min_indicators.get(top_category, False)
     
     # Also require reasonable scores for other categories not to be too close
     if top_score >= threshold and min_indicator_met:
         kategori = sorted_scores[0][0]
-        kategori_bencana = disaster_names.get(kategori, kategori.title())
+        kategori_bencana = DISASTER_NAMES.get(kategori, kategori.title())
         # Cap confidence based on how close other scores are
         confidence = round(min(top_score * 100, 95), 1)
     else:
         kategori_bencana = "Tidak Teridentifikasi"
         confidence = round(top_score * 100, 1)
     
-    # Generate analysis reason
-    reasons = {
-        "kebakaran": f"Warna merah ({merah:.1f}%) dan oranye ({oranye:.1f}%) dominan dengan entropy tinggi ({entropy:.2f}) mengindikasikan kebakaran",
-        "gunung_berapi": f"Deteksi lava ({lava['lava_score']:.2f}) dan bentuk kerucut ({cone['cone_score']:.2f}) dengan indikator asap ({smoke['smoke_score']:.2f})",
-        "gempa": f"Kerusakan struktural ({'terdeteksi' if building_damage else 'tidak terdeteksi'}) dengan pola edge tidak beraturan ({irregular_edge*100:.1f}%)",
-        "tsunami": f"Pola gelombang ({'terdeteksi' if edge.get('wave_pattern') else 'tidak terdeteksi'}) dengan foam ({foam['foam_score']:.2f}) dan garis horizon ({'ada' if horizon['horizon_detected'] else 'tidak ada'})",
-        "banjir": f"Permukaan datar ({flatness['flatness_score']:.2f}) dengan homogenitas tinggi ({homogeneity:.2f}) dan warna coklat ({coklat:.1f}%)",
-        "tanah_longsor": f"Warna hijau ({hijau:.1f}%) dan coklat ({coklat:.1f}%) dengan kontras tinggi ({contrast:.2f}) mengindikasikan longsor"
-    }
-    
     reason = reasons.get(sorted_scores[0][0], "Analisis tidak dapat menentukan jenis bencana")
     
     return {
@@ -660,30 +772,7 @@ def classify_disaster(image_data: str) -> dict:
         "confidence_score": f"{confidence}%",
         "top_2_kemungkinan": top_2,
         "skor_detail": {k: f"{v*100:.1f}%" for k, v in scores.items()},
-        "analisis_fitur": {
-            "warna_dominan": {
-                "merah": f"{merah}%",
-                "oranye": f"{oranye}%",
-                "hijau": f"{hijau}%",
-                "biru": f"{biru}%",
-                "coklat": f"{coklat}%",
-                "abu": f"{abu}%",
-                "putih": f"{features.get('putih', 0)}%"
-            },
-            "tekstur": {
-                "contrast": f"{contrast}",
-                "energy": f"{texture['energy']}",
-                "homogeneity": f"{homogeneity}",
-                "entropy": f"{entropy}"
-            },
-            "edge_density": f"{edge.get('edge_density', 0)}%",
-            "deteksi_lava": "Ya" if lava["lava_detected"] else "Tidak",
-            "deteksi_cone_shape": "Ya" if cone["cone_shape_detected"] else "Tidak",
-            "deteksi_asap": "Ya" if smoke["smoke_detected"] else "Tidak",
-            "deteksi_foam": "Ya" if foam["foam_detected"] else "Tidak",
-            "deteksi_horizon": "Ya" if horizon["horizon_detected"] else "Tidak",
-            "permukaan_air": "Datar" if flatness["surface_flat"] else "Tidak Datar"
-        },
+        "analisis_fitur": analisis_fitur or {},
         "reason": reason
     }
 
@@ -0,0 +1,277 @@
+"""
+Modul Peringatan Dini - Ingest RSS nowcast BMKG secara inkremental
+
+Dokumentasi Bahasa Indonesia:
+- RSS dibaca secara streaming dengan ET.iterparse: setiap <item> diproses
+  lalu dibuang dari memori, tanpa membangun seluruh pohon XML
+- Item dideduplikasi berdasarkan guid (atau link, atau judul+tanggal);
+  item yang sudah dikenal hanya ditandai masih aktif, tidak diparse ulang
+- Peringatan kedaluwarsa jika hilang dari feed atau lebih tua dari
+  EARLY_WARNING_MAX_AGE_HOURS
+- Daftar peringatan siap saji dibangun ulang hanya saat ada perubahan,
+  dan setiap perubahan menaikkan nomor version
+- WarningCityIndex mencocokkan teks peringatan ke kota sekali saja saat
+  ingest (satu regex gabungan nama kota, kabupaten dan provinsi), lalu
+  menyimpan index kota -> peringatan aktif
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import re
+import time
+import threading
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+EARLY_WARNING_MAX_AGE_HOURS = float(os.getenv('EARLY_WARNING_MAX_AGE_HOURS', '6'))
+
+ITEM_FIELDS = ('title', 'description', 'pubDate', 'link')
+
+
+def _local_name(tag):
+    """Nama tag tanpa namespace ('{ns}item' -> 'item')."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_rss_items(source):
+    """
+    Yield dict field teks dari setiap <item> RSS secara streaming.
+
+    Args:
+        source: Path atau file-like object berisi XML RSS
+
+    Notes:
+        - Elemen item dikosongkan setelah dibaca agar memori tetap kecil
+    """
+    for _, elem in ET.iterparse(source, events=('end',)):
+        if _local_name(elem.tag) != 'item':
+            continue
+        fields = {}
+        for child in elem:
+            fields[_local_name(child.tag)] = (child.text or '').strip()
+        elem.clear()
+        yield fields
+
+
+def warning_id(fields):
+    """Key deduplikasi: guid, lalu link, lalu judul+pubDate."""
+    return fields.get('guid') or fields.get('link') or f"{fields.get('title', '')}|{fields.get('pubDate', '')}"
+
+
+def parse_pub_date(value):
+    """pubDate RSS (RFC 822) -> epoch detik, None jika tidak bisa diparse."""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class EarlyWarningStore:
+    """
+    Daftar peringatan aktif yang diperbarui inkremental dari RSS nowcast.
+
+    Args:
+        max_age_hours (float): Umur maksimum peringatan sejak pubDate
+
+    Usage:
+        version = early_warnings.ingest_rss(response.raw)
+        snapshot = early_warnings.snapshot()  # {'version', 'warnings'}
+    """
+
+    def __init__(self, max_age_hours=EARLY_WARNING_MAX_AGE_HOURS):
+        self.max_age = max_age_hours * 3600
+        self._warnings = {}
+        self._version = 0
+        self._snapshot = []
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, fn):
+        """Daftarkan fn(added, removed) yang dipanggil setiap ada perubahan."""
+        self._listeners.append(fn)
+
+    def _expired(self, warning, now):
+        return now - (warning['published_at'] or warning['first_seen']) > self.max_age
+
+    def _commit(self, added, removed):
+        """Bangun ulang snapshot, naikkan version dan beri tahu listener (lock dipegang)."""
+        self._version += 1
+        # Newest first, matching the feed order clients expect
+        ordered = sorted(self._warnings.values(), key=lambda w: w['published_at'] or w['first_seen'], reverse=True)
+        self._snapshot = [{field: w[field] for field in ITEM_FIELDS + ('id',)} for w in ordered]
+        for fn in self._listeners:
+            fn(added, removed)
+
+    def ingest_rss(self, source):
+        """
+        Ingest satu salinan feed RSS.
+
+        Args:
+            source: Path atau file-like object XML RSS
+
+        Returns:
+            int: Version setelah ingest
+
+        Notes:
+            - Peringatan yang tidak lagi ada di feed dianggap sudah berakhir
+            - Jika XML rusak di tengah jalan, tidak ada yang dihapus
+        """
+        now = time.time()
+        seen = set()
+        new_items = []
+        with self._lock:
+            known = set(self._warnings)
+        for fields in iter_rss_items(source):
+            item_id = warning_id(fields)
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            if item_id not in known:
+                warning = {field: fields.get(field, '') for field in ITEM_FIELDS}
+                warning['id'] = item_id
+                warning['published_at'] = parse_pub_date(warning['pubDate'])
+                warning['first_seen'] = now
+                if not self._expired(warning, now):
+                    new_items.append(warning)
+
+        with self._lock:
+            removed = [self._warnings.pop(item_id) for item_id in list(self._warnings)
+                       if item_id not in seen or self._expired(self._warnings[item_id], now)]
+            for warning in new_items:
+                self._warnings[warning['id']] = warning
+            if new_items or removed:
+                self._commit(new_items, removed)
+            return self._version
+
+    def expire(self):
+        """Buang peringatan yang sudah melewati umur maksimum."""
+        now = time.time()
+        with self._lock:
+            removed = [self._warnings.pop(item_id) for item_id in list(self._warnings)
+                       if self._expired(self._warnings[item_id], now)]
+            if removed:
+                self._commit([], removed)
+
+    @property
+    def version(self):
+        return self._version
+
+    def export(self):
+        """Peringatan aktif (lengkap dengan waktu) dan version untuk checkpoint."""
+        with self._lock:
+            return {'version': self._version, 'warnings': list(self._warnings.values())}
+
+    def restore(self, data):
+        """
+        Muat hasil export() saat start; yang sudah kedaluwarsa dilewati.
+
+        Returns:
+            int: Jumlah peringatan yang dimuat
+        """
+        now = time.time()
+        with self._lock:
+            added = [w for w in data.get('warnings', [])
+                     if w['id'] not in self._warnings and not self._expired(w, now)]
+            for warning in added:
+                self._warnings[warning['id']] = warning
+            # Keep version monotonic across restarts so clients see a change, not a reset
+            self._version = max(self._version, int(data.get('version', 0)))
+            if added:
+                self._commit(added, [])
+            return len(added)
+
+    def snapshot(self):
+        """Daftar peringatan aktif siap saji beserta version-nya."""
+        self.expire()
+        with self._lock:
+            return {'version': self._version, 'warnings': self._snapshot}
+
+
+class WarningCityIndex:
+    """
+    Index kota -> peringatan aktif, dibangun saat peringatan di-ingest.
+
+    Args:
+        cities (list): INDONESIAN_CITIES (id, name, province)
+        aliases (dict): id kota -> nama lain / kabupaten sekitarnya
+
+    Usage:
+        index = WarningCityIndex(INDONESIAN_CITIES, CITY_REGION_ALIASES)
+        early_warnings.add_listener(index.update)
+        warnings = index.get('bandung')
+
+    Notes:
+        - Nama provinsi dipetakan ke semua kota di provinsi tersebut
+          (match='province'); nama kota/kabupaten ke kotanya (match='city')
+        - Pencocokan memakai batas kata dan tidak peka huruf besar/kecil
+    """
+
+    def __init__(self, cities, aliases=None):
+        # lowercased region name -> {city_id: 'city' | 'province'}
+        self._targets = {}
+        for city in cities:
+            for name in [city['name']] + list((aliases or {}).get(city['id'], ())):
+                self._targets.setdefault(name.lower(), {})[city['id']] = 'city'
+        for city in cities:
+            targets = self._targets.setdefault(city['province'].lower(), {})
+            targets.setdefault(city['id'], 'province')
+        # Longest names first so 'padang pariaman' wins over 'padang'
+        names = sorted(self._targets, key=len, reverse=True)
+        self.pattern = re.compile(r'\b(?:' + '|'.join(re.escape(name) for name in names) + r')\b', re.IGNORECASE)
+        self._by_city = {}
+        self._cities_of = {}
+        self._lists = {}
+        self._lock = threading.Lock()
+
+    def match(self, text):
+        """
+        Kota yang disebut dalam teks.
+
+        Returns:
+            dict: id kota -> 'city' atau 'province'
+        """
+        matched = {}
+        for name in self.pattern.findall(text or ''):
+            for city_id, level in self._targets[name.lower()].items():
+                if matched.get(city_id) != 'city':
+                    matched[city_id] = level
+        return matched
+
+    def update(self, added, removed):
+        """Listener EarlyWarningStore: cocokkan peringatan baru, lepas yang berakhir."""
+        with self._lock:
+            changed = set()
+            for warning in removed:
+                for city_id in self._cities_of.pop(warning['id'], {}):
+                    self._by_city[city_id].pop(warning['id'], None)
+                    changed.add(city_id)
+            for warning in added:
+                matched = self.match(f"{warning['title']} {warning['description']}")
+                self._cities_of[warning['id']] = matched
+                for city_id, level in matched.items():
+                    item = {field: warning[field] for field in ITEM_FIELDS + ('id',)}
+                    item['match'] = level
+                    item['_published'] = warning['published_at'] or warning['first_seen']
+                    self._by_city.setdefault(city_id, {})[warning['id']] = item
+                    changed.add(city_id)
+            for city_id in changed:
+                items = sorted(self._by_city[city_id].values(), key=lambda w: w['_published'], reverse=True)
+                self._lists[city_id] = [{k: v for k, v in w.items() if k != '_published'} for w in items]
+
+    def cities_for(self, warning_id):
+        """ID kota yang cocok dengan satu peringatan."""
+        with self._lock:
+            return list(self._cities_of.get(warning_id, ()))
+
+    def get(self, city_id):
+        """Peringatan aktif untuk satu kota (terbaru dulu), list kosong jika tidak ada."""
+        return self._lists.get(city_id, [])
+
+    def stats(self):
+        with self._lock:
+            return {city_id: len(items) for city_id, items in self._lists.items() if items}
+
+
+early_warnings = EarlyWarningStore()
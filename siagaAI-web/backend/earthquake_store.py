@@ -0,0 +1,301 @@
+"""
+Modul Riwayat Gempa - Log gempa append-only dengan query delta dan filter
+
+Dokumentasi Bahasa Indonesia:
+- Setiap gempa dari autogempa/gempadirasakan disimpan sekali saja,
+  dengan key DateTime BMKG + koordinat (dibulatkan 2 desimal)
+- Saat ingest, field dinormalisasi ke kolom NumPy bertipe: epoch (detik),
+  lat/lng, magnitude (float) dan kedalaman dalam km (float); teks
+  (lokasi, potensi, dirasakan, dll.) disimpan di list per kolom
+- Setiap gempa baru mendapat nomor urut (seq) yang terus naik; client
+  cukup mengirim cursor terakhir (since=) untuk mendapat gempa baru saja
+- query() memfilter magnitudo, kedalaman, rentang waktu dan radius dari
+  sebuah titik secara tervektorisasi; filter radius memakai GridIndex
+  sehingga hanya gempa di sekitar titik yang dihitung jaraknya
+- Log juga ditulis ke file JSONL (satu baris per gempa, string asli BMKG)
+  dan dimuat ulang saat start, sehingga riwayat dan cursor tetap sama
+  setelah restart
+
+Konfigurasi (environment):
+- EARTHQUAKE_STORE_PATH: file log (default data/earthquakes.jsonl di
+  folder backend; kosongkan untuk menonaktifkan persistensi)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from geo_utils import GridIndex, haversine_km
+
+EARTHQUAKE_STORE_PATH = os.getenv(
+    'EARTHQUAKE_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'earthquakes.jsonl')
+)
+
+# Field string yang disimpan apa adanya dari parser BMKG
+TEXT_FIELDS = ('datetime', 'date', 'time', 'depth', 'location', 'potential', 'felt', 'shakemap')
+
+# Field mentah yang ditulis ke log JSONL
+RAW_FIELDS = TEXT_FIELDS + ('magnitude', 'latitude', 'longitude')
+
+# Kolom bertipe: nama -> dtype
+NUMERIC_COLUMNS = {
+    'epoch': np.float64,
+    'lat': np.float64,
+    'lng': np.float64,
+    'magnitude': np.float32,
+    'depth_km': np.float32,
+}
+
+INITIAL_CAPACITY = 256
+
+NUMBER_PATTERN = re.compile(r'-?\d+(?:[.,]\d+)?')
+
+
+def parse_epoch(value):
+    """DateTime ISO BMKG -> epoch detik (NaN jika tidak bisa diparse)."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def parse_float(value):
+    """Angka pertama dalam nilai ('5.2', '10 km', '-7.12') -> float, NaN jika tidak ada."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_PATTERN.search(str(value or ''))
+    return float(match.group(0).replace(',', '.')) if match else math.nan
+
+
+def quake_key(quake):
+    """Key deduplikasi: DateTime BMKG + koordinat dibulatkan 2 desimal."""
+    lat = parse_float(quake.get('latitude'))
+    lng = parse_float(quake.get('longitude'))
+    return f"{quake.get('datetime', '')}|{lat:.2f}|{lng:.2f}"
+
+
+def _clean(value):
+    """NaN -> None agar aman di-serialize ke JSON."""
+    return None if math.isnan(value) else value
+
+
+class EarthquakeStore:
+    """
+    Log gempa append-only dan terdeduplikasi, disimpan per kolom.
+
+    Args:
+        path (str): File JSONL untuk persistensi (None/'' = hanya memori)
+
+    Usage:
+        new_events = earthquake_store.ingest(parsed_quakes)
+        events, cursor, has_more = earthquake_store.since(cursor, limit=100)
+        events = earthquake_store.query(min_magnitude=5, lat=-6.2, lng=106.8, radius_km=200)
+    """
+
+    def __init__(self, path=EARTHQUAKE_STORE_PATH):
+        self.path = path or None
+        self._keys = {}
+        self._size = 0
+        self._columns = {name: np.empty(INITIAL_CAPACITY, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        self._text = {field: [] for field in TEXT_FIELDS}
+        self._grid = GridIndex()
+        self._lock = threading.Lock()
+        if self.path:
+            self._load()
+
+    def __len__(self):
+        return self._size
+
+    def _append(self, key, quake):
+        if self._size == len(self._columns['epoch']):
+            for name, column in self._columns.items():
+                grown = np.empty(len(column) * 2, dtype=column.dtype)
+                grown[:self._size] = column[:self._size]
+                self._columns[name] = grown
+
+        row = self._size
+        values = {
+            'epoch': parse_epoch(quake.get('datetime')),
+            'lat': parse_float(quake.get('latitude')),
+            'lng': parse_float(quake.get('longitude')),
+            'magnitude': parse_float(quake.get('magnitude')),
+            'depth_km': parse_float(quake.get('depth')),
+        }
+        for name, value in values.items():
+            self._columns[name][row] = value
+        for field in TEXT_FIELDS:
+            self._text[field].append(str(quake.get(field, '') or ''))
+
+        self._keys[key] = row
+        self._grid.add(row, values['lat'], values['lng'])
+        self._size += 1
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        loaded = 0
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    quake = json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a truncated last line
+                    continue
+                key = quake_key(quake)
+                if key not in self._keys:
+                    self._append(key, quake)
+                    loaded += 1
+        print(f"Earthquake history loaded: {loaded} events from {self.path}")
+
+    def record(self, row):
+        """Satu gempa sebagai dict bertipe (seq mulai dari 1)."""
+        quake = {field: self._text[field][row] for field in TEXT_FIELDS}
+        epoch = float(self._columns['epoch'][row])
+        quake.update({
+            'seq': row + 1,
+            'epoch': _clean(epoch),
+            'latitude': _clean(float(self._columns['lat'][row])),
+            'longitude': _clean(float(self._columns['lng'][row])),
+            'magnitude': _clean(round(float(self._columns['magnitude'][row]), 2)),
+            'depth_km': _clean(round(float(self._columns['depth_km'][row]), 2)),
+        })
+        return quake
+
+    def ingest(self, quakes):
+        """
+        Tambahkan gempa yang belum pernah tersimpan.
+
+        Args:
+            quakes (list): Dict gempa hasil parser BMKG
+
+        Returns:
+            list: Gempa baru (dengan seq), kosong jika semuanya sudah ada
+        """
+        new_events = []
+        with self._lock:
+            lines = []
+            for quake in quakes:
+                if not quake or not quake.get('datetime'):
+                    continue
+                key = quake_key(quake)
+                if key in self._keys:
+                    continue
+                self._append(key, quake)
+                new_events.append(self.record(self._size - 1))
+                lines.append(json.dumps({field: quake.get(field, '') for field in RAW_FIELDS}, ensure_ascii=False))
+
+            if lines and self.path:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write('\n'.join(lines) + '\n')
+                except OSError as e:
+                    print(f"Error persisting earthquake history: {e}")
+
+        if new_events:
+            print(f"Earthquake history: {len(new_events)} new events (total {len(self)})")
+        return new_events
+
+    def since(self, cursor=0, limit=100):
+        """
+        Ambil gempa dengan seq > cursor, urut dari yang paling lama.
+
+        Returns:
+            tuple: (events, cursor terakhir, has_more)
+        """
+        with self._lock:
+            total = self._size
+            start = max(0, min(int(cursor), total))
+            end = min(total, start + max(1, limit))
+            events = [self.record(i) for i in range(start, end)]
+        return events, end if events else start, end < total
+
+    def query(self, min_magnitude=None, max_magnitude=None, min_depth=None, max_depth=None,
+              start=None, end=None, lat=None, lng=None, radius_km=None, sort='time', limit=100):
+        """
+        Cari gempa dengan filter bertipe.
+
+        Args:
+            min_magnitude, max_magnitude (float): Rentang magnitudo
+            min_depth, max_depth (float): Rentang kedalaman (km)
+            start, end (float): Rentang waktu (epoch detik)
+            lat, lng, radius_km (float): Hanya gempa dalam radius dari titik ini
+            sort (str): 'time' (terbaru dulu), 'magnitude' (terbesar dulu)
+                        atau 'distance' (terdekat dulu, butuh radius)
+            limit (int): Jumlah maksimum hasil
+
+        Returns:
+            tuple: (events, total cocok sebelum limit); jika radius dipakai,
+                   setiap event punya distance_km
+
+        Notes:
+            - Filter dihitung sebagai mask NumPy atas kolom (atau atas
+              kandidat dari GridIndex jika radius dipakai)
+            - Nilai NaN (data BMKG tidak lengkap) tidak lolos filter rentang
+        """
+        with self._lock:
+            size = self._size
+            use_radius = lat is not None and lng is not None and radius_km is not None
+
+            rows = None
+            if use_radius:
+                # The grid exports buffers of its row arrays; querying it under the lock keeps appends out
+                rows = self._grid.candidates(lat, lng, radius_km)
+            if rows is None:
+                rows = np.arange(size, dtype=np.int64)
+
+            columns = {name: column[rows] for name, column in self._columns.items()}
+            mask = np.ones(len(rows), dtype=bool)
+            for name, low, high in (('magnitude', min_magnitude, max_magnitude),
+                                    ('depth_km', min_depth, max_depth),
+                                    ('epoch', start, end)):
+                if low is not None:
+                    mask &= columns[name] >= low
+                if high is not None:
+                    mask &= columns[name] <= high
+
+            distances = None
+            if use_radius:
+                distances = haversine_km(lat, lng, columns['lat'], columns['lng'])
+                mask &= distances <= radius_km
+
+            rows = rows[mask]
+            if distances is not None:
+                distances = distances[mask]
+
+            if sort == 'distance' and distances is not None:
+                order = np.argsort(distances, kind='stable')
+            elif sort == 'magnitude':
+                order = np.argsort(-np.nan_to_num(columns['magnitude'][mask], nan=-np.inf), kind='stable')
+            else:
+                order = np.argsort(-np.nan_to_num(columns['epoch'][mask], nan=-np.inf), kind='stable')
+            order = order[:max(1, limit)]
+
+            events = []
+            for i in order:
+                event = self.record(int(rows[i]))
+                if distances is not None:
+                    event['distance_km'] = round(float(distances[i]), 1)
+                events.append(event)
+            return events, int(len(rows))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "events": self._size,
+                "cursor": self._size,
+                "indexed": len(self._grid),
+                "path": self.path
+            }
+
+
+earthquake_store = EarthquakeStore()
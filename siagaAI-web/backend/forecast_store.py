@@ -0,0 +1,321 @@
+"""
+Modul Prakiraan Cuaca - Deret waktu prakiraan BMKG per kota
+
+Dokumentasi Bahasa Indonesia:
+- Seluruh prakiraan BMKG (semua slot 3 jam, bukan hanya 8 pertama)
+  dinormalisasi sekali saat fetch ke array NumPy ringkas per kode adm4:
+  timestamp, suhu, kelembaban, kecepatan angin dan kode cuaca
+- Array berupa ring buffer berkapasitas tetap; update bersifat inkremental:
+  slot yang sudah lewat disimpan sebagai riwayat, slot mulai dari awal
+  prakiraan baru diganti dengan revisi terbaru dari BMKG
+- window() hanya memotong array (tanpa parse ulang) dan menghitung
+  ringkasan min/max serta tren suhu
+- bound(): deret kode yang tidak dipin (kode ad-hoc dari query koordinat)
+  dibatasi jumlahnya (LRU) dan tidak ikut di-export ke snapshot
+
+Konfigurasi (environment):
+- FORECAST_CAPACITY: jumlah slot per kota (default 96, ~12 hari slot 3 jam)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+FORECAST_CAPACITY = int(os.getenv('FORECAST_CAPACITY', '96'))
+
+# Kolom bertipe: nama -> (dtype, key BMKG)
+FORECAST_COLUMNS = {
+    'temperature': (np.float32, 't'),
+    'humidity': (np.float32, 'hu'),
+    'wind_speed': (np.float32, 'ws'),
+    'weather_code': (np.int16, 'weather'),
+}
+
+# Perubahan suhu (°C per jam) di bawah ini dianggap stabil
+TREND_THRESHOLD = 0.1
+
+
+def parse_slot_epoch(slot):
+    """Waktu slot prakiraan BMKG (datetime UTC) -> epoch detik, None jika tidak ada."""
+    value = slot.get('datetime') or slot.get('utc_datetime')
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def flatten_slots(cuaca):
+    """Data cuaca BMKG (list per hari berisi slot, atau list slot) -> list slot datar."""
+    slots = []
+    for item in cuaca or []:
+        if isinstance(item, list):
+            slots.extend(slot for slot in item if isinstance(slot, dict))
+        elif isinstance(item, dict):
+            slots.append(item)
+    return slots
+
+
+def _number(value, default=math.nan):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class ForecastSeries:
+    """Ring buffer prakiraan satu lokasi, urut waktu dari yang paling lama."""
+
+    def __init__(self, capacity=FORECAST_CAPACITY):
+        self.capacity = capacity
+        self.epoch = np.empty(capacity, dtype=np.float64)
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, (dtype, _) in FORECAST_COLUMNS.items()}
+        self.head = 0
+        self.size = 0
+
+    def _order(self):
+        """Indeks fisik slot dalam urutan waktu."""
+        return (self.head + np.arange(self.size)) % self.capacity
+
+    def merge(self, rows):
+        """
+        Gabungkan slot baru (urut waktu) ke buffer.
+
+        Args:
+            rows (list): Tuple (epoch, {kolom: nilai})
+
+        Notes:
+            - Slot lama dengan waktu >= slot baru pertama dibuang (revisi
+              prakiraan); slot lebih lama disimpan sebagai riwayat
+            - Jika buffer penuh, slot paling lama tertimpa
+        """
+        if not rows:
+            return
+        order = self._order()
+        keep = int(np.searchsorted(self.epoch[order], rows[0][0], side='left'))
+        self.size = keep
+        # Keep only the newest slots if the update alone overflows the buffer
+        for epoch, values in rows[-self.capacity:]:
+            if self.size == self.capacity:
+                self.head = (self.head + 1) % self.capacity
+                self.size -= 1
+            i = (self.head + self.size) % self.capacity
+            self.epoch[i] = epoch
+            for name, value in values.items():
+                self.columns[name][i] = value
+            self.size += 1
+
+    def window(self, start, end):
+        """Epoch dan kolom untuk slot start <= waktu <= end (sudah urut)."""
+        order = self._order()
+        epochs = self.epoch[order]
+        lo = int(np.searchsorted(epochs, start, side='left'))
+        hi = int(np.searchsorted(epochs, end, side='right'))
+        rows = order[lo:hi]
+        return self.epoch[rows], {name: column[rows] for name, column in self.columns.items()}
+
+
+def _stat(values, fn):
+    values = values[~np.isnan(values)]
+    return round(float(fn(values)), 1) if len(values) else None
+
+
+def _clean(value):
+    """Skalar NumPy -> float Python (dibulatkan), NaN -> None."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 1)
+
+
+def summarize(epochs, columns, descriptions):
+    """Ringkasan jendela prakiraan: min/max, tren suhu dan cuaca dominan."""
+    if len(epochs) == 0:
+        return None
+    temperature = columns['temperature']
+    summary = {
+        'temperature_min': _stat(temperature, np.min),
+        'temperature_max': _stat(temperature, np.max),
+        'humidity_min': _stat(columns['humidity'], np.min),
+        'humidity_max': _stat(columns['humidity'], np.max),
+        'wind_speed_max': _stat(columns['wind_speed'], np.max),
+        'temperature_trend': 'stabil',
+        'temperature_change_per_hour': 0.0
+    }
+
+    valid = ~np.isnan(temperature)
+    if valid.sum() >= 2:
+        hours = (epochs[valid] - epochs[valid][0]) / 3600.0
+        slope = float(np.polyfit(hours, temperature[valid].astype(np.float64), 1)[0])
+        summary['temperature_change_per_hour'] = round(slope, 2)
+        if slope > TREND_THRESHOLD:
+            summary['temperature_trend'] = 'naik'
+        elif slope < -TREND_THRESHOLD:
+            summary['temperature_trend'] = 'turun'
+
+    codes, counts = np.unique(columns['weather_code'], return_counts=True)
+    dominant = int(codes[np.argmax(counts)])
+    summary['dominant_weather_code'] = dominant
+    summary['dominant_weather_desc'] = descriptions.get(dominant, 'Unknown')
+    return summary
+
+
+class ForecastStore:
+    """
+    Deret waktu prakiraan BMKG per kode adm4.
+
+    Usage:
+        forecast_store.update(bmkg_code, cuaca_data)
+        forecast = forecast_store.window(bmkg_code, hours=24)
+    """
+
+    def __init__(self, capacity=FORECAST_CAPACITY):
+        self.capacity = capacity
+        self._series = {}
+        self._descriptions = {}
+        self._changes = 0
+        # (max_keys, pinned_fn) and the LRU of unpinned keys
+        self._bound = None
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bound(self, max_keys, pinned_fn):
+        """Batasi jumlah deret untuk key yang pinned_fn(key) bukan True (LRU)."""
+        with self._lock:
+            self._bound = (max(1, max_keys), pinned_fn)
+
+    @property
+    def changes(self):
+        """Penghitung yang naik setiap kali ada update."""
+        return self._changes
+
+    def update(self, key, cuaca):
+        """
+        Normalisasi data cuaca BMKG dan gabungkan ke deret lokasi key.
+
+        Args:
+            key (str): Kode adm4 BMKG
+            cuaca (list): Field 'cuaca' dari response BMKG
+
+        Returns:
+            int: Jumlah slot yang diterima
+        """
+        rows = []
+        descriptions = {}
+        for slot in flatten_slots(cuaca):
+            epoch = parse_slot_epoch(slot)
+            if epoch is None:
+                continue
+            values = {name: _number(slot.get(field)) for name, (_, field) in FORECAST_COLUMNS.items()}
+            values['weather_code'] = int(_number(slot.get('weather'), -1))
+            if slot.get('weather_desc'):
+                descriptions[values['weather_code']] = slot['weather_desc']
+            rows.append((epoch, values))
+        if not rows:
+            return 0
+        rows.sort(key=lambda row: row[0])
+
+        bound = self._bound
+        unpinned = bound is not None and not bound[1](key)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ForecastSeries(self.capacity)
+            series.merge(rows)
+            self._descriptions.update(descriptions)
+            self._changes += 1
+            if unpinned:
+                self._lru[key] = None
+                self._lru.move_to_end(key)
+                while len(self._lru) > bound[0]:
+                    evicted, _ = self._lru.popitem(last=False)
+                    self._series.pop(evicted, None)
+        return len(rows)
+
+    def window(self, key, hours=24, now=None):
+        """
+        Slot prakiraan dari sekarang sampai hours ke depan beserta ringkasan.
+
+        Args:
+            key (str): Kode adm4 BMKG
+            hours (float): Panjang jendela ke depan (jam)
+            now (float): Epoch acuan (default sekarang)
+
+        Returns:
+            dict: slots, summary (min/max suhu, kelembaban, angin, tren
+                  suhu, cuaca dominan); None jika belum ada data lokasi ini
+
+        Notes:
+            - Slot yang sedang berjalan (mulai <3 jam lalu) ikut disertakan
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            if key in self._lru:
+                self._lru.move_to_end(key)
+            epochs, columns = series.window(now - 3 * 3600, now + hours * 3600)
+            descriptions = dict(self._descriptions)
+
+        slots = []
+        for i in range(len(epochs)):
+            code = int(columns['weather_code'][i])
+            slots.append({
+                'datetime': datetime.fromtimestamp(float(epochs[i]), timezone.utc).isoformat(),
+                'epoch': float(epochs[i]),
+                'temperature': _clean(columns['temperature'][i]),
+                'humidity': _clean(columns['humidity'][i]),
+                'wind_speed': _clean(columns['wind_speed'][i]),
+                'weather_code': code,
+                'weather_desc': descriptions.get(code, 'Unknown')
+            })
+        return {'slots': slots, 'summary': summarize(epochs, columns, descriptions)}
+
+    def export(self):
+        """Isi deret yang dipin (dalam urutan waktu) untuk checkpoint snapshot."""
+        with self._lock:
+            data = {'descriptions': {str(code): desc for code, desc in self._descriptions.items()}, 'series': {}}
+            for key, series in self._series.items():
+                if key in self._lru:
+                    continue
+                order = series._order()
+                data['series'][key] = {
+                    'epoch': series.epoch[order].tolist(),
+                    **{name: [_clean(v) for v in column[order]] for name, column in series.columns.items()}
+                }
+            return data
+
+    def restore(self, data):
+        """Muat hasil export(); deret yang sudah berisi tidak ditimpa."""
+        restored = 0
+        with self._lock:
+            self._descriptions.update({int(code): desc for code, desc in data.get('descriptions', {}).items()})
+            for key, columns in data.get('series', {}).items():
+                if key in self._series:
+                    continue
+                series = self._series[key] = ForecastSeries(self.capacity)
+                rows = [(epoch, {name: math.nan if columns[name][i] is None else columns[name][i]
+                                 for name in FORECAST_COLUMNS})
+                        for i, epoch in enumerate(columns['epoch'])]
+                series.merge(rows)
+                restored += 1
+        return restored
+
+    def stats(self):
+        with self._lock:
+            return {"locations": len(self._series), "unpinned": len(self._lru), "capacity": self.capacity,
+                    "slots": sum(series.size for series in self._series.values())}
+
+
+forecast_store = ForecastStore()
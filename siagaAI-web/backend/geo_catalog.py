@@ -0,0 +1,127 @@
+"""
+Modul Katalog Geo - Kota, zona risiko dan titik evakuasi dengan index
+
+Dokumentasi Bahasa Indonesia:
+- Dibangun sekali saat start dari INDONESIAN_CITIES, RISK_ZONES dan
+  EVACUATION_POINTS; route dan chatbot tidak lagi men-scan list per request
+- Record tetap dict asli (langsung di-serialize ke JSON oleh route); semua
+  index hanya menyimpan referensi ke record yang sama dalam tuple, tanpa
+  salinan
+- Index zona hanya per kota, (kota, tipe) dan (kota, level risiko);
+  kombinasi lain (kota + tipe + level) memfilter tuple kecil per kota,
+  sehingga setiap zona hanya direferensikan tiga kali; titik evakuasi per
+  kota; kota per ID
+- Ringkasan per kota (jumlah zona per level dan tipe, jumlah dan total
+  kapasitas titik evakuasi) dihitung di awal
+- Index spasial: CircleIndex zona risiko dan PointIndex titik evakuasi
+  (geo_utils.py)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+from geo_utils import CircleIndex, PointIndex
+
+RISK_LEVELS = ('high', 'medium', 'low')
+
+
+class GeoCatalog:
+    """
+    Katalog data geo statis dengan lookup O(1).
+
+    Args:
+        cities (list): INDONESIAN_CITIES (kota pertama menjadi default)
+        risk_zones (list): RISK_ZONES (radius dalam meter)
+        evacuation_points (list): EVACUATION_POINTS
+
+    Usage:
+        catalog = GeoCatalog(INDONESIAN_CITIES, RISK_ZONES, EVACUATION_POINTS)
+        city = catalog.city('bandung')
+        zones = catalog.zones(city='bandung', type='flood', risk='high')
+        summary = catalog.summary('bandung')
+    """
+
+    def __init__(self, cities, risk_zones, evacuation_points):
+        self.cities = tuple(cities)
+        self.risk_zones = tuple(risk_zones)
+        self.evacuation_points = tuple(evacuation_points)
+        self.default_city = self.cities[0]
+        self._city_by_id = {city['id']: city for city in self.cities}
+
+        by_city, by_type, by_risk = {}, {}, {}
+        for zone in self.risk_zones:
+            by_city.setdefault(zone['city'], []).append(zone)
+            by_type.setdefault((zone['city'], zone['type']), []).append(zone)
+            by_risk.setdefault((zone['city'], zone['risk']), []).append(zone)
+        self._zones_by_city = {key: tuple(items) for key, items in by_city.items()}
+        self._zones_by_type = {key: tuple(items) for key, items in by_type.items()}
+        self._zones_by_risk = {key: tuple(items) for key, items in by_risk.items()}
+
+        shelters = {}
+        for point in self.evacuation_points:
+            shelters.setdefault(point['city'], []).append(point)
+        self._shelters = {city_id: tuple(items) for city_id, items in shelters.items()}
+
+        self._summaries = {
+            city_id: self._summarize(city_id)
+            for city_id in self._city_by_id.keys() | {z['city'] for z in self.risk_zones} | self._shelters.keys()
+        }
+
+        self.zone_index = CircleIndex([z['lat'] for z in self.risk_zones], [z['lng'] for z in self.risk_zones],
+                                      [z.get('radius', 0) / 1000.0 for z in self.risk_zones])
+        self.shelter_index = PointIndex([p['lat'] for p in self.evacuation_points],
+                                        [p['lng'] for p in self.evacuation_points])
+
+    def _summarize(self, city_id):
+        zones = self._zones_by_city.get(city_id, ())
+        shelters = self._shelters.get(city_id, ())
+        by_type = {}
+        for zone in zones:
+            by_type[zone['type']] = by_type.get(zone['type'], 0) + 1
+        return {
+            'risk_zones': len(zones),
+            **{f'{level}_risk': len(self._zones_by_risk.get((city_id, level), ())) for level in RISK_LEVELS},
+            'zones_by_type': by_type,
+            'evacuation_points': len(shelters),
+            'evacuation_capacity': sum(p.get('capacity', 0) for p in shelters)
+        }
+
+    def city(self, city_id, default=None):
+        """Record kota berdasarkan ID, atau default jika tidak dikenal."""
+        return self._city_by_id.get(city_id, default)
+
+    def zones(self, city=None, type=None, risk=None):
+        """Zona risiko yang cocok dengan semua filter yang diisi (tuple, urutan asli)."""
+        if city is None:
+            zones = self.risk_zones
+        elif type is not None:
+            zones, type = self._zones_by_type.get((city, type), ()), None
+        elif risk is not None:
+            zones, risk = self._zones_by_risk.get((city, risk), ()), None
+        else:
+            return self._zones_by_city.get(city, ())
+        if type is None and risk is None:
+            return zones
+        return tuple(zone for zone in zones
+                     if (type is None or zone['type'] == type) and (risk is None or zone['risk'] == risk))
+
+    def shelters(self, city=None):
+        """Titik evakuasi sebuah kota, atau semua jika city None."""
+        if city is None:
+            return self.evacuation_points
+        return self._shelters.get(city, ())
+
+    def summary(self, city_id):
+        """Ringkasan jumlah zona dan titik evakuasi sebuah kota."""
+        return self._summaries.get(city_id) or self._summarize(city_id)
+
+    def summaries(self):
+        """Ringkasan semua kota di katalog kota: {city_id: summary}."""
+        return {city['id']: self._summaries[city['id']] for city in self.cities}
+
+    def counts(self):
+        return {
+            'cities': len(self.cities),
+            'risk_zones': len(self.risk_zones),
+            'evacuation_points': len(self.evacuation_points)
+        }
@@ -0,0 +1,271 @@
+"""
+Modul Utilitas Geo - Jarak haversine tervektorisasi dan grid index
+
+Dokumentasi Bahasa Indonesia:
+- haversine_km menghitung jarak (km) untuk satu atau banyak titik
+  sekaligus dengan NumPy (broadcasting), tanpa loop Python
+- GridIndex membagi bumi menjadi sel lat/lng berukuran tetap; query
+  radius hanya memeriksa sel yang bisa berada dalam radius, lalu jarak
+  tepat dihitung dengan haversine pada kandidat saja
+- Index bersifat append-only (cocok untuk log gempa yang terus bertambah)
+- CircleIndex memakai grid yang sama untuk lingkaran (zona risiko):
+  titik di dalam lingkaran atau dalam jarak tertentu dari tepinya
+- PointIndex mencari k titik terdekat (mis. titik evakuasi), untuk satu
+  titik atau banyak titik query sekaligus dengan matriks jarak NumPy
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import math
+from array import array
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Panjang satu derajat lintang (km)
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Jarak lingkaran besar (km) antara titik-titik, mendukung array NumPy.
+
+    Args:
+        lat1, lng1: Derajat, skalar atau array
+        lat2, lng2: Derajat, skalar atau array (di-broadcast terhadap lat1/lng1)
+
+    Returns:
+        float atau np.ndarray: Jarak dalam km
+    """
+    lat1 = np.radians(lat1)
+    lat2 = np.radians(lat2)
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lng2) - np.asarray(lng1))
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    """
+    Spatial index grid lat/lng untuk query radius.
+
+    Args:
+        cell_deg (float): Ukuran sel dalam derajat (default 1.0, ~111 km)
+
+    Usage:
+        index = GridIndex()
+        index.add(0, -6.2, 106.8)
+        rows = index.candidates(-6.2, 106.8, radius_km=50)
+    """
+
+    def __init__(self, cell_deg=1.0):
+        self.cell_deg = float(cell_deg)
+        self._lng_cells = int(math.ceil(360.0 / self.cell_deg))
+        self._cells = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lng):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor((lng + 180.0) / self.cell_deg)) % self._lng_cells)
+
+    def add(self, row, lat, lng):
+        """Daftarkan baris row pada koordinat (lat, lng); NaN diabaikan."""
+        if math.isnan(lat) or math.isnan(lng):
+            return
+        cell = self._cell(lat, lng)
+        rows = self._cells.get(cell)
+        if rows is None:
+            rows = self._cells[cell] = array('q')
+        rows.append(row)
+        self._size += 1
+
+    def candidates(self, lat, lng, radius_km):
+        """
+        Baris yang mungkin berada dalam radius dari (lat, lng).
+
+        Returns:
+            np.ndarray: Indeks baris (belum difilter jarak tepat), atau None
+                        jika radius terlalu besar sehingga scan penuh lebih murah
+        """
+        dlat = radius_km / KM_PER_DEG_LAT
+        lat_min, lat_max = lat - dlat, lat + dlat
+        # Longitude degrees shrink with latitude; size the window for the widest row
+        max_abs_lat = min(89.9, max(abs(lat_min), abs(lat_max)))
+        dlng = dlat / math.cos(math.radians(max_abs_lat))
+        if dlng >= 180.0 or lat_min <= -90.0 or lat_max >= 90.0:
+            return None
+
+        row_min, _ = self._cell(lat_min, lng)
+        row_max, _ = self._cell(lat_max, lng)
+        col_start = int(math.floor((lng - dlng + 180.0) / self.cell_deg))
+        col_end = int(math.floor((lng + dlng + 180.0) / self.cell_deg))
+
+        parts = []
+        for row in range(row_min, row_max + 1):
+            for col in range(col_start, col_end + 1):
+                rows = self._cells.get((row, col % self._lng_cells))
+                if rows:
+                    parts.append(np.frombuffer(rows, dtype=np.int64))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+
+class CircleIndex:
+    """
+    Spatial index lingkaran (pusat + radius) untuk query "lingkaran mana
+    yang memuat / dekat dengan titik ini".
+
+    Args:
+        lats, lngs: Pusat lingkaran (derajat)
+        radii_km: Radius lingkaran (km)
+        cell_deg (float): Ukuran sel grid pusat lingkaran (default 0.1, ~11 km)
+
+    Usage:
+        index = CircleIndex(lats, lngs, radii_km)
+        rows, center_km, edge_km = index.query(-6.2, 106.8, radius_km=2)
+
+    Notes:
+        - Lingkaran kecil (radius <= satu sel) disimpan di GridIndex; query
+          hanya memeriksa sel dalam radius + radius lingkaran kecil terbesar
+        - Lingkaran besar (jarang) diperiksa langsung setiap query, sehingga
+          satu zona raksasa tidak memperlebar pencarian untuk semua zona lain
+    """
+
+    def __init__(self, lats, lngs, radii_km, cell_deg=0.1):
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.lng = np.asarray(lngs, dtype=np.float64)
+        self.radius_km = np.asarray(radii_km, dtype=np.float64)
+        small = self.radius_km <= cell_deg * KM_PER_DEG_LAT
+        self._large = np.flatnonzero(~small)
+        self._max_small_km = float(self.radius_km[small].max()) if small.any() else 0.0
+        self._grid = GridIndex(cell_deg)
+        for row in np.flatnonzero(small).tolist():
+            self._grid.add(row, float(self.lat[row]), float(self.lng[row]))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def query(self, lat, lng, radius_km=0.0):
+        """
+        Lingkaran yang tepinya berjarak <= radius_km dari (lat, lng).
+
+        Returns:
+            tuple: (rows, center_km, edge_km) urut dari tepi terdekat;
+                   edge_km <= 0 berarti titik berada di dalam lingkaran
+        """
+        rows = self._grid.candidates(lat, lng, radius_km + self._max_small_km)
+        if rows is None:
+            rows = np.arange(len(self.lat))
+        elif len(self._large):
+            rows = np.concatenate([rows, self._large])
+        center_km = haversine_km(lat, lng, self.lat[rows], self.lng[rows])
+        edge_km = center_km - self.radius_km[rows]
+        keep = np.flatnonzero(edge_km <= radius_km)
+        keep = keep[np.argsort(edge_km[keep], kind='stable')]
+        return rows[keep], center_km[keep], edge_km[keep]
+
+
+class PointIndex:
+    """
+    Spatial index titik untuk query k tetangga terdekat, satu titik atau
+    banyak titik sekaligus.
+
+    Args:
+        lats, lngs: Koordinat titik (derajat)
+        cell_deg (float): Ukuran sel grid (default 0.1, ~11 km)
+
+    Usage:
+        index = PointIndex(lats, lngs)
+        rows, distances_km = index.nearest(-6.2, 106.8, k=5)
+        results = index.nearest_many([-6.2, -7.25], [106.8, 112.75], k=3)
+    """
+
+    # nearest_many menghitung matriks jarak penuh jika jumlah sel matriks
+    # (titik query x titik index) tidak lebih dari ini
+    MATRIX_LIMIT = 2_000_000
+
+    def __init__(self, lats, lngs, cell_deg=0.1):
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.lng = np.asarray(lngs, dtype=np.float64)
+        self.cell_km = cell_deg * KM_PER_DEG_LAT
+        self._grid = GridIndex(cell_deg)
+        for row in range(len(self.lat)):
+            self._grid.add(row, float(self.lat[row]), float(self.lng[row]))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def nearest(self, lat, lng, k=1, max_km=None):
+        """
+        k titik terdekat dari (lat, lng).
+
+        Returns:
+            tuple: (rows, distances_km) urut dari yang terdekat; bisa kurang
+                   dari k jika titik di index (atau dalam max_km) lebih sedikit
+
+        Notes:
+            - Radius pencarian dimulai dari satu sel dan digandakan sampai
+              ada k titik di dalamnya; semua titik dalam radius pasti ada di
+              kandidat grid, sehingga k terdekat di dalamnya adalah k
+              terdekat secara global
+            - Jika jendela pencarian sudah lebih banyak sel daripada jumlah
+              titik (index jarang), semua titik langsung dihitung
+        """
+        k = min(k, len(self._grid))
+        limit = math.inf if max_km is None else max_km
+        radius = min(self.cell_km, limit)
+        while True:
+            # Past the point where the window has more cells than the index has points, a scan is cheaper
+            window_cells = (2.0 * radius / self.cell_km + 1.0) ** 2
+            rows = self._grid.candidates(lat, lng, radius) if window_cells <= len(self.lat) else None
+            if rows is None:
+                rows = np.arange(len(self.lat))
+                radius = limit
+            distances = haversine_km(lat, lng, self.lat[rows], self.lng[rows])
+            within = np.flatnonzero(distances <= radius)
+            if len(within) >= k or radius >= limit:
+                break
+            radius = min(radius * 2.0, limit)
+        within = within[np.argsort(distances[within], kind='stable')[:k]]
+        return rows[within], distances[within]
+
+    def nearest_many(self, lats, lngs, k=1, max_km=None):
+        """
+        k titik terdekat untuk banyak titik query.
+
+        Returns:
+            list: (rows, distances_km) per titik query, urutan sama dengan input
+
+        Notes:
+            - Untuk index kecil, jarak semua pasangan dihitung sekaligus
+              (satu matriks haversine) dan k terkecil dipilih dengan
+              argpartition; index besar memakai nearest() per titik
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        k = min(k, len(self.lat))
+        if k == 0 or len(lats) * len(self.lat) > self.MATRIX_LIMIT:
+            return [self.nearest(float(lat), float(lng), k, max_km) for lat, lng in zip(lats, lngs)]
+
+        matrix = haversine_km(lats[:, None], lngs[:, None], self.lat[None, :], self.lng[None, :])
+        if k < len(self.lat):
+            top = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(self.lat)), (len(lats), k))
+        top_distances = np.take_along_axis(matrix, top, axis=1)
+        order = np.argsort(top_distances, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+
+        results = []
+        for rows, distances in zip(top, top_distances):
+            if max_km is not None:
+                keep = distances <= max_km
+                rows, distances = rows[keep], distances[keep]
+            results.append((rows, distances))
+        return results
@@ -0,0 +1,30 @@
+"""
+Konfigurasi Gunicorn - Menjalankan SiagaAI backend dengan gunicorn
+
+Dokumentasi Bahasa Indonesia:
+- Layanan background (checkpoint BMKG dan scheduler ingest) tidak lagi
+  dinyalakan saat app.py di-import; hook post_fork di sini menyalakannya
+  di setiap worker yang melayani request
+- Dengan beberapa worker, setiap worker menjalankan scheduler sendiri;
+  pakai GUNICORN_WORKERS=1 (dengan thread) agar BMKG hanya di-poll sekali
+
+- Dipakai oleh Procfile (deploy Railway); python app.py hanya untuk
+  development dengan debug reloader
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+
+def post_fork(server, worker):
+    from app import start_background_services
+    start_background_services()
@@ -0,0 +1,274 @@
+"""
+Modul HTTP Client - Koneksi keluar bersama ke BMKG dan HuggingFace
+
+Dokumentasi Bahasa Indonesia:
+- Satu requests.Session dengan connection pool per host dan keep-alive,
+  sehingga fetch berikutnya ke host yang sama tidak mengulang handshake
+  TCP/TLS
+- Timeout connect dan read dipisah: host yang tidak bisa dihubungi
+  gagal cepat, response yang lambat tetap ditunggu
+- Retry dengan exponential backoff + jitter untuk error koneksi, timeout
+  dan status sementara (429/5xx); header Retry-After dihormati
+- Conditional GET: ETag/Last-Modified tiap URL disimpan bersama hasil
+  parse terakhir; jika server menjawab 304, hasil lama dipakai lagi tanpa
+  download dan parse ulang
+- Metrik per host: jumlah request, error, retry, 304, dan latensi
+  (rata-rata, p50, p95, maks)
+
+Konfigurasi (environment):
+- HTTP_CONNECT_TIMEOUT (3.05), HTTP_READ_TIMEOUT (10) dalam detik
+- HTTP_MAX_RETRIES (2), HTTP_BACKOFF_BASE (0.5), HTTP_BACKOFF_MAX (8)
+- HTTP_POOL_HOSTS (10), HTTP_POOL_MAXSIZE (20)
+- HTTP_VALIDATOR_MAX_URLS (512): jumlah URL yang validator-nya disimpan
+  (LRU); URL lama dibuang dan cukup di-download penuh lagi
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '8'))
+HTTP_POOL_HOSTS = int(os.getenv('HTTP_POOL_HOSTS', '10'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+HTTP_VALIDATOR_MAX_URLS = int(os.getenv('HTTP_VALIDATOR_MAX_URLS', '512'))
+
+# Status yang dianggap sementara dan layak dicoba lagi
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Metode yang aman diulang tanpa diminta eksplisit
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LATENCY_SAMPLES = 200
+
+
+class HostMetrics:
+    """Statistik request ke satu host, dengan sampel latensi terakhir."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_status = None
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, elapsed_ms, status=None, error=False):
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+        if error:
+            self.errors += 1
+        else:
+            self.last_status = status
+
+    def to_dict(self):
+        samples = sorted(self.samples)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "last_status": self.last_status
+        }
+
+
+class HTTPClient:
+    """
+    Client HTTP bersama dengan pool koneksi, retry/backoff, dan metrik per host.
+
+    Usage:
+        response = http_client.get(url, headers=BMKG_HEADERS)
+        response = http_client.post(url, data=body, timeout=(3.05, 30), retries=1)
+
+    Notes:
+        - timeout boleh angka (dipakai untuk read) atau tuple (connect, read)
+        - retries default HTTP_MAX_RETRIES untuk GET/HEAD/OPTIONS dan 0
+          untuk metode lain; POST yang aman diulang harus meminta eksplisit
+        - Jika semua percobaan gagal karena error koneksi, exception
+          terakhir dilempar; jika karena status, response terakhir
+          dikembalikan
+    """
+
+    def __init__(self, max_retries=HTTP_MAX_RETRIES, backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX,
+                 pool_hosts=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        # Retries are handled here (with metrics), not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._metrics = {}
+        # url -> (etag, last_modified, parsed value), least recently used first
+        self._validators = OrderedDict()
+        self.max_validators = HTTP_VALIDATOR_MAX_URLS
+        self._lock = threading.Lock()
+
+    def _host_metrics(self, host):
+        with self._lock:
+            metrics = self._metrics.get(host)
+            if metrics is None:
+                metrics = self._metrics[host] = HostMetrics()
+            return metrics
+
+    def _backoff(self, attempt, response=None):
+        """Jeda sebelum percobaan berikutnya: Retry-After atau full jitter."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """
+        Kirim request dengan retry dan catat metrik host.
+
+        Args:
+            method (str): Metode HTTP
+            url (str): URL tujuan
+            timeout (float/tuple): Timeout read atau (connect, read)
+            retries (int): Jumlah percobaan ulang (default sesuai metode)
+            **kwargs: Diteruskan ke requests.Session.request
+
+        Returns:
+            requests.Response: Response terakhir
+        """
+        method = method.upper()
+        if timeout is None:
+            timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        elif not isinstance(timeout, tuple):
+            timeout = (min(HTTP_CONNECT_TIMEOUT, timeout), timeout)
+        if retries is None:
+            retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+
+        metrics = self._host_metrics(urlparse(url).netloc)
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    metrics.record(elapsed_ms, error=True)
+                if attempt >= retries:
+                    raise
+                response = None
+            else:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    metrics.record(elapsed_ms, status=response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+
+            with self._lock:
+                metrics.retries += 1
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                # Hand the connection back to the pool (stream=True leaves the body unread)
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_conditional(self, url, parse_fn, headers=None, **kwargs):
+        """
+        GET dengan If-None-Match/If-Modified-Since dan cache hasil parse.
+
+        Args:
+            url (str): URL tujuan
+            parse_fn: Fungsi yang menerima response 200 dan mengembalikan
+                      hasil parse (None jika data tidak valid)
+            headers (dict): Header tambahan
+            **kwargs: Diteruskan ke get()
+
+        Returns:
+            Hasil parse_fn, hasil parse sebelumnya jika server menjawab 304,
+            atau None jika status lain (4xx)
+
+        Raises:
+            requests.HTTPError: Jika server masih menjawab 5xx setelah retry
+                                (gangguan server, bukan data yang tidak valid)
+
+        Notes:
+            - Validator hanya disimpan jika parse berhasil, sehingga 304
+              selalu punya hasil yang bisa dipakai ulang
+            - Dengan stream=True, parse_fn membaca body langsung dari
+              response.raw
+        """
+        with self._lock:
+            cached = self._validators.get(url)
+            if cached is not None:
+                self._validators.move_to_end(url)
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+
+        response = self.get(url, headers=request_headers, **kwargs)
+        # With stream=True the connection only returns to the pool once closed
+        with response:
+            if response.status_code == 304 and cached is not None:
+                metrics = self._host_metrics(urlparse(url).netloc)
+                with self._lock:
+                    metrics.not_modified += 1
+                return cached[2]
+            if response.status_code >= 500:
+                response.raise_for_status()
+            if response.status_code != 200:
+                return None
+
+            value = parse_fn(response)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if value is not None and (etag or last_modified):
+            with self._lock:
+                self._validators[url] = (etag, last_modified, value)
+                self._validators.move_to_end(url)
+                while len(self._validators) > self.max_validators:
+                    self._validators.popitem(last=False)
+        return value
+
+    def stats(self):
+        """Metrik per host."""
+        with self._lock:
+            return {host: metrics.to_dict() for host, metrics in self._metrics.items()}
+
+
+http_client = HTTPClient()
@@ -0,0 +1,277 @@
+"""
+Modul Job Asinkron - Penilaian kerusakan gambar di background
+
+Dokumentasi Bahasa Indonesia:
+- Client mengirim gambar dan langsung menerima job_id (HTTP 202)
+- Klasifikasi dijalankan oleh thread pool terpisah dari thread request
+- Hasil bisa diambil (poll), ditunggu (long-poll), atau di-stream via
+  Server-Sent Events (SSE)
+- State job disimpan di memori dengan batas jumlah dan waktu kedaluwarsa
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, jsonify, Response
+
+# Konfigurasi job store (bisa diatur lewat environment)
+JOB_MAX_ENTRIES = int(os.getenv('JOB_MAX_ENTRIES', '500'))
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '600'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+
+# Batas waktu tunggu long-poll dan interval heartbeat SSE
+LONG_POLL_MAX_SECONDS = 30
+SSE_HEARTBEAT_SECONDS = 15
+
+JOB_FINISHED_STATUSES = ('done', 'failed')
+
+
+class JobStoreFull(Exception):
+    """Dilempar ketika store penuh oleh job yang belum selesai."""
+
+
+class JobStore:
+    """
+    Penyimpanan state job di memori yang dibatasi jumlah dan umurnya.
+
+    Notes:
+        - Job yang sudah kedaluwarsa (lebih tua dari ttl) dibuang otomatis
+        - Jika penuh, job selesai yang paling lama dibuang lebih dulu
+        - Job yang masih berjalan tidak pernah dibuang; jika semua slot
+          berisi job aktif, create() melempar JobStoreFull
+        - Perubahan status membangunkan semua thread yang sedang menunggu
+    """
+
+    def __init__(self, max_entries=JOB_MAX_ENTRIES, ttl=JOB_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._cond = threading.Condition()
+
+    def _purge_expired(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if now - job['updated_at'] > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _evict_one_finished(self):
+        for job_id, job in self._jobs.items():
+            if job['status'] in JOB_FINISHED_STATUSES:
+                del self._jobs[job_id]
+                return True
+        return False
+
+    def create(self):
+        """Membuat job baru berstatus 'queued' dan mengembalikan salinannya."""
+        now = time.time()
+        with self._cond:
+            self._purge_expired(now)
+            if len(self._jobs) >= self.max_entries and not self._evict_one_finished():
+                raise JobStoreFull()
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'created_at': now,
+                'updated_at': now,
+                'result': None,
+                'error': None
+            }
+            self._jobs[job['id']] = job
+            return dict(job)
+
+    def update(self, job_id, **fields):
+        """Memperbarui field job dan membangunkan semua penunggu."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job['updated_at'] = time.time()
+            self._cond.notify_all()
+
+    def get(self, job_id):
+        """Mengambil salinan job, atau None jika tidak ada/kedaluwarsa."""
+        with self._cond:
+            self._purge_expired(time.time())
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout, last_status=None):
+        """
+        Menunggu sampai status job berubah dari last_status atau selesai.
+
+        Args:
+            job_id (str): ID job
+            timeout (float): Batas waktu tunggu dalam detik
+            last_status (str): Status terakhir yang sudah diketahui pemanggil;
+                               None berarti tunggu sampai job selesai
+
+        Returns:
+            dict: Salinan job terbaru, atau None jika job tidak ada
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return None
+                if job['status'] in JOB_FINISHED_STATUSES:
+                    return dict(job)
+                if last_status is not None and job['status'] != last_status:
+                    return dict(job)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return dict(job)
+                self._cond.wait(remaining)
+
+
+job_store = JobStore()
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='assess-job')
+
+
+def _run_job(job_id, assess_fn, image_data):
+    """Menjalankan penilaian kerusakan untuk satu job di thread worker."""
+    job_store.update(job_id, status='running')
+    try:
+        result = assess_fn(image_data)
+        job_store.update(job_id, status='done', result=result)
+    except Exception as e:
+        print(f"Error running assessment job {job_id}: {e}")
+        job_store.update(job_id, status='failed', error=str(e))
+
+
+def _job_payload(job):
+    """Format job untuk response JSON."""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'result': job['result'],
+        'error': job['error']
+    }
+
+
+def register_job_routes(app, assess_fn):
+    """
+    Mendaftarkan route-route job asinkron penilaian kerusakan.
+
+    Endpoint yang didaftarkan:
+        - POST /api/assess-damage/jobs - Kirim gambar, dapatkan job_id
+        - GET /api/assess-damage/jobs/<job_id> - Ambil status/hasil (long-poll dengan ?wait=detik)
+        - GET /api/assess-damage/jobs/<job_id>/stream - Stream status via SSE
+
+    Args:
+        app: Instance aplikasi Flask
+        assess_fn: Fungsi penilaian kerusakan, menerima image_data (str base64)
+                   dan mengembalikan dict hasil
+    """
+
+    @app.route('/api/assess-damage/jobs', methods=['POST'])
+    def submit_assessment_job():
+        """
+        Mengirim gambar untuk dinilai secara asinkron.
+
+        Request Body:
+            JSON dengan field:
+            - image (str): Data gambar dalam format base64
+
+        Returns:
+            JSON (202): job_id, status, status_url, stream_url
+            JSON (503): Jika antrian job penuh
+        """
+        data = request.get_json(silent=True) or {}
+        image_data = data.get('image', '')
+
+        if not image_data:
+            return jsonify({
+                "success": False,
+                "error": "No image provided"
+            }), 400
+
+        try:
+            job = job_store.create()
+        except JobStoreFull:
+            return jsonify({
+                "success": False,
+                "error": "Antrian penilaian penuh, coba lagi nanti"
+            }), 503
+
+        job_executor.submit(_run_job, job['id'], assess_fn, image_data)
+
+        return jsonify({
+            "success": True,
+            "job_id": job['id'],
+            "status": job['status'],
+            "status_url": f"/api/assess-damage/jobs/{job['id']}",
+            "stream_url": f"/api/assess-damage/jobs/{job['id']}/stream"
+        }), 202
+
+    @app.route('/api/assess-damage/jobs/<job_id>', methods=['GET'])
+    def get_assessment_job(job_id):
+        """
+        Mengambil status dan hasil job.
+
+        Query Parameters:
+            wait (float): Opsional, tunggu hingga N detik sampai job selesai
+                          (maksimum 30 detik)
+
+        Returns:
+            JSON: Status job beserta result/error jika sudah selesai
+            JSON (404): Jika job tidak ditemukan atau sudah kedaluwarsa
+        """
+        try:
+            wait = float(request.args.get('wait', 0))
+        except ValueError:
+            wait = 0
+        wait = max(0.0, min(wait, LONG_POLL_MAX_SECONDS))
+
+        job = job_store.wait(job_id, wait) if wait > 0 else job_store.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job tidak ditemukan"}), 404
+
+        return jsonify(_job_payload(job))
+
+    @app.route('/api/assess-damage/jobs/<job_id>/stream', methods=['GET'])
+    def stream_assessment_job(job_id):
+        """
+        Stream perubahan status job menggunakan Server-Sent Events.
+
+        Returns:
+            text/event-stream: Event 'status' setiap kali status berubah,
+                               diakhiri event 'done' atau 'failed'
+
+        Notes:
+            - Mengirim komentar heartbeat agar koneksi tidak diputus proxy
+        """
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job tidak ditemukan"}), 404
+
+        def generate(job):
+            last_status = None
+            while job is not None:
+                if job['status'] != last_status:
+                    last_status = job['status']
+                    event = last_status if last_status in JOB_FINISHED_STATUSES else 'status'
+                    yield f"event: {event}\ndata: {json.dumps(_job_payload(job))}\n\n"
+                    if last_status in JOB_FINISHED_STATUSES:
+                        return
+                else:
+                    yield ": heartbeat\n\n"
+                job = job_store.wait(job_id, SSE_HEARTBEAT_SECONDS, last_status=last_status)
+
+        return Response(generate(job), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
+    print("Job routes registered: /api/assess-damage/jobs, /api/assess-damage/jobs/<id>, /api/assess-damage/jobs/<id>/stream")
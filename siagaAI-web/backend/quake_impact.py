@@ -0,0 +1,169 @@
+"""
+Modul Dampak Gempa - Kota, zona risiko dan titik evakuasi terdampak
+
+Dokumentasi Bahasa Indonesia:
+- Dihitung sekali saat gempa baru masuk (ingest), lalu disimpan per
+  gempa sehingga /api/earthquake dan chatbot cukup satu lookup dict
+- Jarak dari episentrum ke semua kota dihitung sekaligus dengan haversine
+  tervektorisasi; zona risiko dan titik evakuasi diambil dari index
+  spasial geo_catalog (zone_index, shelter_index) sehingga hanya kandidat
+  dalam radius dirasakan yang dihitung
+- Radius dampak diperkirakan dari magnitudo; kedalaman diperhitungkan
+  lewat jarak hiposenter (sqrt(jarak_permukaan^2 + kedalaman^2))
+
+Perkiraan radius (kasar, untuk peringatan awal, bukan shakemap resmi):
+- kuat (guncangan kuat, potensi kerusakan): 10^(0.5*M - 1.5) km
+  (M5 ~22 km, M6 ~71 km, M7 ~224 km)
+- dirasakan: 10^(0.5*M - 0.8) km (M5 ~50 km, M6 ~158 km, M7 ~500 km)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from geo_utils import haversine_km
+from earthquake_store import parse_float, quake_key
+
+# Jumlah hasil dampak yang disimpan (gempa lama dibuang lebih dulu)
+MAX_IMPACTS = 1000
+
+# Titik evakuasi terdekat yang disertakan per gempa
+MAX_EVACUATION_POINTS = 10
+
+
+def impact_radii(magnitude):
+    """(radius_kuat_km, radius_dirasakan_km) dari magnitudo; (0, 0) jika tidak diketahui."""
+    if magnitude is None or math.isnan(magnitude):
+        return 0.0, 0.0
+    return 10 ** (0.5 * magnitude - 1.5), 10 ** (0.5 * magnitude - 0.8)
+
+
+class _Points:
+    """Koordinat entitas statis sebagai array NumPy, plus record aslinya."""
+
+    def __init__(self, records):
+        self.records = list(records)
+        self.lat = np.array([r['lat'] for r in self.records], dtype=np.float64)
+        self.lng = np.array([r['lng'] for r in self.records], dtype=np.float64)
+
+
+class QuakeImpactIndex:
+    """
+    Hitung dan simpan entitas terdampak per gempa.
+
+    Args:
+        catalog (GeoCatalog): Katalog kota, zona risiko dan titik evakuasi
+                              beserta index spasialnya (geo_catalog.py)
+
+    Usage:
+        impacts = QuakeImpactIndex(geo_catalog)
+        impacts.ingest(new_events)
+        impact = impacts.get(quake)
+    """
+
+    def __init__(self, catalog, max_impacts=MAX_IMPACTS):
+        self.cities = _Points(catalog.cities)
+        self.catalog = catalog
+        self.max_impacts = max_impacts
+        self._impacts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compute(self, quake):
+        """
+        Hitung dampak satu gempa.
+
+        Args:
+            quake (dict): Gempa (format parser BMKG atau record earthquake_store)
+
+        Returns:
+            dict: Radius dampak dan daftar kota, zona risiko, titik evakuasi
+                  terdampak (urut dari yang terdekat), atau None jika
+                  koordinat tidak valid
+        """
+        lat = parse_float(quake.get('latitude'))
+        lng = parse_float(quake.get('longitude'))
+        if math.isnan(lat) or math.isnan(lng):
+            return None
+        magnitude = parse_float(quake.get('magnitude'))
+        depth = quake.get('depth_km')
+        depth = parse_float(quake.get('depth')) if depth is None else float(depth)
+        depth = 0.0 if math.isnan(depth) else depth
+        strong_radius, felt_radius = impact_radii(magnitude)
+
+        # Surface distance at which the hypocentral distance reaches the felt radius
+        surface_radius = math.sqrt(max(felt_radius ** 2 - depth ** 2, 0.0))
+
+        def affected(records, rows, surface, fields, limit=None):
+            rows = np.asarray(rows, dtype=np.int64)
+            surface = np.maximum(surface, 0.0)
+            hypo = np.sqrt(surface ** 2 + depth ** 2)
+            keep = np.flatnonzero(hypo <= felt_radius)
+            # Nearest first, ties in catalog order
+            keep = keep[np.lexsort((rows[keep], hypo[keep]))]
+            if limit is not None:
+                keep = keep[:limit]
+            result = []
+            for i in keep:
+                record = records[rows[i]]
+                item = {field: record.get(field) for field in fields}
+                item['distance_km'] = round(float(surface[i]), 1)
+                item['intensity'] = 'kuat' if hypo[i] <= strong_radius else 'dirasakan'
+                result.append(item)
+            return result
+
+        city_rows = np.arange(len(self.cities.records))
+        city_surface = haversine_km(lat, lng, self.cities.lat, self.cities.lng)
+        if felt_radius > depth:
+            zone_rows, _, zone_edge = self.catalog.zone_index.query(lat, lng, surface_radius)
+            shelter_rows, shelter_surface = self.catalog.shelter_index.nearest(
+                lat, lng, MAX_EVACUATION_POINTS, surface_radius)
+        else:
+            zone_rows, zone_edge = np.empty(0, dtype=np.int64), np.empty(0)
+            shelter_rows, shelter_surface = np.empty(0, dtype=np.int64), np.empty(0)
+
+        return {
+            'event_key': quake_key(quake),
+            'magnitude': None if math.isnan(magnitude) else magnitude,
+            'depth_km': depth,
+            'strong_radius_km': round(strong_radius, 1),
+            'felt_radius_km': round(felt_radius, 1),
+            'cities': affected(self.cities.records, city_rows, city_surface, ('id', 'name', 'province')),
+            'risk_zones': affected(self.catalog.risk_zones, zone_rows, zone_edge, ('name', 'city', 'type', 'risk')),
+            'evacuation_points': affected(self.catalog.evacuation_points, shelter_rows, shelter_surface,
+                                          ('name', 'city', 'type', 'capacity'), limit=MAX_EVACUATION_POINTS),
+            'computed_at': datetime.now().isoformat()
+        }
+
+    def ingest(self, quakes):
+        """Hitung dan simpan dampak untuk gempa-gempa baru."""
+        for quake in quakes:
+            impact = self.compute(quake)
+            if impact is None:
+                continue
+            with self._lock:
+                self._impacts[impact['event_key']] = impact
+                while len(self._impacts) > self.max_impacts:
+                    self._impacts.popitem(last=False)
+
+    def get(self, quake):
+        """
+        Dampak tersimpan untuk gempa ini (satu lookup dict).
+
+        Notes:
+            - Gempa yang belum pernah di-ingest (mis. sudah ada di riwayat
+              sebelum restart) dihitung sekali lalu disimpan
+        """
+        key = quake_key(quake)
+        with self._lock:
+            impact = self._impacts.get(key)
+        if impact is None:
+            self.ingest([quake])
+            with self._lock:
+                impact = self._impacts.get(key)
+        return impact
@@ -0,0 +1,170 @@
+"""
+Modul Prioritas Refresh - Interval refresh cuaca adaptif per lokasi
+
+Dokumentasi Bahasa Indonesia:
+- Popularitas: setiap request cuaca/prakiraan dicatat per kode adm4
+  sebagai penghitung yang meluruh (half-life REFRESH_POPULARITY_HALF_LIFE),
+  sehingga lonjakan request menaikkan prioritas lalu turun perlahan
+- Bahaya: lokasi yang baru terdampak gempa (ditandai sementara) atau
+  sedang punya peringatan dini aktif dianggap kritis
+- Zona risiko tinggi statis (RISK_ZONES) memberi bobot kecil tetap
+- Skor = log2(1 + popularitas) + bobot bahaya + bobot statis;
+  interval = interval dasar / (1 + skor), dibatasi minimum; lokasi tanpa
+  request dan tanpa bahaya di-back off sampai interval maksimum, tetapi
+  baru setelah satu half-life penuh tanpa request (dihitung sejak request
+  terakhir atau sejak proses start), sehingga lokasi tidak langsung
+  dianggap dingin saat startup
+- Setiap record() memanggil on_record(key) (jika diset) agar scheduler bisa
+  memajukan refresh lokasi yang interval-nya baru saja memendek
+- Skor yang sama dipakai scheduler untuk mengurutkan job saat budget
+  request ke BMKG sedang habis
+
+Konfigurasi (environment):
+- BMKG_REFRESH_WEATHER_MIN: interval tercepat lokasi panas (default 300)
+- BMKG_REFRESH_WEATHER_MAX: interval lokasi dingin (default 3600)
+- REFRESH_POPULARITY_HALF_LIFE: half-life popularitas, detik (default 900)
+- QUAKE_HAZARD_SECONDS: lama lokasi dianggap kritis setelah gempa yang
+  dirasakan di sana (default 10800)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import math
+import time
+import threading
+from datetime import datetime
+
+from bmkg_scheduler import REFRESH_INTERVALS
+
+BMKG_REFRESH_WEATHER_MIN = int(os.getenv('BMKG_REFRESH_WEATHER_MIN', '300'))
+BMKG_REFRESH_WEATHER_MAX = int(os.getenv('BMKG_REFRESH_WEATHER_MAX', '3600'))
+REFRESH_POPULARITY_HALF_LIFE = float(os.getenv('REFRESH_POPULARITY_HALF_LIFE', '900'))
+QUAKE_HAZARD_SECONDS = int(os.getenv('QUAKE_HAZARD_SECONDS', '10800'))
+
+# Bobot skor
+HAZARD_WEIGHT = 3.0
+MAX_STATIC_WEIGHT = 0.5
+
+# Prioritas job feed global (gempa, peringatan dini): selalu didahulukan
+FEED_PRIORITY = 10.0
+
+# Popularitas di bawah ini dianggap lokasi dingin (di-back off)
+COLD_SCORE = 0.05
+
+
+class RefreshPriority:
+    """
+    Skor prioritas dan interval refresh per key (kode adm4).
+
+    Args:
+        base_interval (int): Interval normal (REFRESH_INTERVALS['weather'])
+        min_interval (int): Interval tercepat
+        max_interval (int): Interval lokasi dingin
+        half_life (float): Half-life popularitas (detik)
+
+    Usage:
+        refresh_priority.record(bmkg_code)
+        refresh_priority.mark_hazard(bmkg_code, 3 * 3600, 'gempa M5.6')
+        interval = refresh_priority.interval(bmkg_code)
+    """
+
+    def __init__(self, base_interval, min_interval=BMKG_REFRESH_WEATHER_MIN,
+                 max_interval=BMKG_REFRESH_WEATHER_MAX, half_life=REFRESH_POPULARITY_HALF_LIFE):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.half_life = max(half_life, 1.0)
+        self.decay = math.log(2) / self.half_life
+        self.hazard_fn = None
+        self.on_record = None
+        self._started = time.time()
+        self._popularity = {}
+        self._hazards = {}
+        self._static = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, key, now):
+        value, updated = self._popularity.get(key, (0.0, now))
+        return value * math.exp(-self.decay * (now - updated))
+
+    def record(self, key, count=1):
+        """Catat request untuk key."""
+        now = time.time()
+        with self._lock:
+            self._popularity[key] = (self._decayed(key, now) + count, now)
+        if self.on_record is not None:
+            self.on_record(key)
+
+    def mark_hazard(self, key, seconds, reason):
+        """
+        Tandai key kritis selama seconds detik.
+
+        Returns:
+            bool: True jika key sebelumnya belum kritis (perlu refresh segera)
+        """
+        now = time.time()
+        with self._lock:
+            current = self._hazards.get(key)
+            is_new = current is None or current[0] <= now
+            until = max(now + seconds, current[0] if current else 0)
+            self._hazards[key] = (until, reason)
+            return is_new
+
+    def set_static(self, key, weight):
+        """Bobot tetap (mis. dari jumlah zona risiko tinggi), dibatasi MAX_STATIC_WEIGHT."""
+        with self._lock:
+            self._static[key] = min(weight, MAX_STATIC_WEIGHT)
+
+    def hazard(self, key, now=None):
+        """Alasan key sedang kritis, atau None."""
+        now = now or time.time()
+        with self._lock:
+            marked = self._hazards.get(key)
+        if marked and marked[0] > now:
+            return marked[1]
+        if self.hazard_fn is not None:
+            return self.hazard_fn(key)
+        return None
+
+    def score(self, key):
+        now = time.time()
+        with self._lock:
+            popularity = self._decayed(key, now)
+            static = self._static.get(key, 0.0)
+        hazard = HAZARD_WEIGHT if self.hazard(key, now) else 0.0
+        return math.log2(1.0 + popularity) + hazard + static
+
+    def interval(self, key):
+        """Interval refresh saat ini untuk key (detik)."""
+        now = time.time()
+        with self._lock:
+            popularity = self._decayed(key, now)
+            last_request = self._popularity.get(key, (0.0, self._started))[1]
+        score = self.score(key)
+        if popularity < COLD_SCORE and score < HAZARD_WEIGHT and now - last_request >= self.half_life:
+            # Nobody asked for a full half-life and nothing is happening there
+            return self.max_interval
+        return max(self.min_interval, int(self.base_interval / (1.0 + score)))
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            keys = set(self._popularity) | set(self._static) | {k for k, (until, _) in self._hazards.items() if until > now}
+        result = {}
+        for key in sorted(keys):
+            with self._lock:
+                popularity = self._decayed(key, now)
+                marked = self._hazards.get(key)
+            result[key] = {
+                "popularity": round(popularity, 2),
+                "hazard": self.hazard(key, now),
+                "hazard_until": datetime.fromtimestamp(marked[0]).isoformat() if marked and marked[0] > now else None,
+                "score": round(self.score(key), 2),
+                "interval": self.interval(key)
+            }
+        return result
+
+
+refresh_priority = RefreshPriority(REFRESH_INTERVALS['weather'])
@@ -0,0 +1,337 @@
+"""
+Modul Shared-Memory Ring - Serah-terima gambar ke proses classifier
+
+Dokumentasi Bahasa Indonesia:
+- Satu blok shared memory dibagi menjadi slot berukuran tetap
+  (default 300x300x3 uint8, sama dengan hasil decode_base64_image)
+- Thread web menulis frame BGR ke slot kosong, lalu hanya mengirim
+  indeks slot ke proses worker lewat pipe (bukan array/base64)
+- Proses worker membaca slot sebagai view numpy tanpa copy dan hanya
+  mengembalikan hasil klasifikasi yang ringkas
+- Slot dikembalikan ke daftar kosong setelah hasil diterima; jika ring
+  penuh, penulis menunggu sampai timeout lalu mendapat RingFull
+  (backpressure)
+- Setiap worker punya antrean task sendiri sehingga pool tahu task mana
+  yang dipegang worker mana; worker yang mati (atau macet melewati batas
+  waktu hasil) dihentikan, task-nya digagalkan, slot-nya dikembalikan dan
+  worker baru dijalankan
+
+Konfigurasi (environment):
+- CLASSIFIER_PROCESSES: jumlah proses worker (0 = nonaktif)
+- CLASSIFIER_SHM_SLOTS: jumlah slot frame di ring (default 64)
+- CLASSIFIER_SHM_TIMEOUT: batas tunggu slot kosong, detik (default 2)
+- CLASSIFIER_RESULT_TIMEOUT: batas tunggu hasil satu task, detik
+  (default 30); worker yang melewatinya dianggap macet
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import os
+import time
+import queue
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+# Ukuran frame standar hasil decode_base64_image (BGR)
+FRAME_SHAPE = (300, 300, 3)
+
+CLASSIFIER_PROCESSES = int(os.getenv('CLASSIFIER_PROCESSES', '0'))
+CLASSIFIER_SHM_SLOTS = int(os.getenv('CLASSIFIER_SHM_SLOTS', '64'))
+CLASSIFIER_SHM_TIMEOUT = float(os.getenv('CLASSIFIER_SHM_TIMEOUT', '2'))
+CLASSIFIER_RESULT_TIMEOUT = float(os.getenv('CLASSIFIER_RESULT_TIMEOUT', '30'))
+
+# How often the result collector wakes up to check worker health (seconds)
+WORKER_CHECK_INTERVAL = 0.5
+
+
+class RingFull(Exception):
+    """Dilempar ketika tidak ada slot kosong sampai batas waktu tunggu."""
+
+
+class WorkerLost(RuntimeError):
+    """Dilempar ke task yang dipegang worker yang mati atau dihentikan."""
+
+
+class SharedFrameRing:
+    """
+    Ring slot frame berukuran tetap di atas satu blok SharedMemory.
+
+    Args:
+        slots (int): Jumlah slot
+        frame_shape (tuple): Bentuk satu frame (H, W, C), dtype uint8
+        name (str): Nama blok shared memory yang sudah ada (untuk attach);
+                    None berarti membuat blok baru
+    """
+
+    def __init__(self, slots, frame_shape=FRAME_SHAPE, name=None):
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        frame_bytes = int(np.prod(self.frame_shape))
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def close(self):
+        """Lepas view dan tutup mapping; pemilik juga menghapus bloknya."""
+        self.frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _worker_main(shm_name, slots, frame_shape, task_queue, result_queue):
+    """
+    Loop proses worker: baca slot dari shared memory, klasifikasi, kirim hasil.
+
+    Pesan task: (task_id, backend_name, slot_indices); None = berhenti.
+    Pesan hasil: (task_id, results, error).
+    """
+    from classifier_backends import get_backend
+
+    ring = SharedFrameRing(slots, frame_shape, name=shm_name)
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            task_id, backend_name, slot_indices = task
+            try:
+                # Zero-copy views into the shared block
+                images = [ring.frames[i] for i in slot_indices]
+                results = get_backend(backend_name).classify_images(images)
+                result_queue.put((task_id, results, None))
+            except Exception as e:
+                result_queue.put((task_id, None, str(e)))
+    finally:
+        ring.close()
+
+
+class ProcessClassifierPool:
+    """
+    Pool proses classifier yang menerima gambar lewat SharedFrameRing.
+
+    Args:
+        num_workers (int): Jumlah proses worker
+        slots (int): Jumlah slot frame di ring
+        acquire_timeout (float): Batas tunggu slot kosong (detik)
+        result_timeout (float): Batas tunggu hasil satu task (detik)
+
+    Usage:
+        pool = ProcessClassifierPool(num_workers=2, slots=64)
+        results = pool.classify_images(images, 'rule')
+    """
+
+    def __init__(self, num_workers, slots=CLASSIFIER_SHM_SLOTS, acquire_timeout=CLASSIFIER_SHM_TIMEOUT,
+                 frame_shape=FRAME_SHAPE, result_timeout=CLASSIFIER_RESULT_TIMEOUT):
+        self.acquire_timeout = acquire_timeout
+        self.result_timeout = result_timeout
+        self.ring = SharedFrameRing(slots, frame_shape)
+        # Each worker can hold a full chunk without starving the others
+        self.chunk_size = max(1, slots // max(1, num_workers))
+
+        self._free_slots = queue.Queue()
+        for i in range(slots):
+            self._free_slots.put(i)
+
+        # Fork avoids re-importing app.py in the children
+        methods = mp.get_all_start_methods()
+        self._ctx = mp.get_context('fork' if 'fork' in methods else 'spawn')
+        self._result_queue = self._ctx.Queue()
+        self._workers = [None] * num_workers
+        self._task_queues = [None] * num_workers
+        self._restarts = 0
+        self._closed = False
+
+        # task_id -> (future, slot_indices, worker index, deadline)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        for i in range(num_workers):
+            self._start_worker(i)
+        self._dispatcher = threading.Thread(target=self._collect_results, name='classifier-results', daemon=True)
+        self._dispatcher.start()
+        print(f"Classifier process pool started: {num_workers} workers, {slots} shared-memory slots")
+
+    def _acquire_slots(self, count):
+        acquired = []
+        try:
+            for _ in range(count):
+                acquired.append(self._free_slots.get(timeout=self.acquire_timeout))
+        except queue.Empty:
+            self._release_slots(acquired)
+            raise RingFull(f"Semua {self.ring.slots} slot classifier sedang dipakai")
+        return acquired
+
+    def _release_slots(self, slot_indices):
+        for i in slot_indices:
+            self._free_slots.put(i)
+
+    def _start_worker(self, index):
+        # A fresh task queue: whatever the old worker left unread was failed with it
+        task_queue = self._ctx.Queue()
+        worker = self._ctx.Process(
+            target=_worker_main,
+            args=(self.ring.name, self.ring.slots, self.ring.frame_shape, task_queue, self._result_queue),
+            name=f'classifier-worker-{index}',
+            daemon=True
+        )
+        worker.start()
+        self._task_queues[index] = task_queue
+        self._workers[index] = worker
+
+    def _pick_worker(self):
+        """Worker hidup dengan task tertunda paling sedikit (pemanggil memegang _pending_lock)."""
+        load = [0] * len(self._workers)
+        for _, _, index, _ in self._pending.values():
+            load[index] += 1
+        alive = [i for i, worker in enumerate(self._workers) if worker.is_alive()] or range(len(self._workers))
+        return min(alive, key=load.__getitem__)
+
+    def submit(self, images, backend_name='rule'):
+        """
+        Tulis gambar ke slot kosong dan kirim task ke worker.
+
+        Returns:
+            Future: Berisi list hasil klasifikasi sesuai urutan images
+
+        Raises:
+            RingFull: Jika slot kosong tidak tersedia sampai acquire_timeout
+            ValueError: Jika ukuran gambar tidak sama dengan ukuran slot
+        """
+        for image in images:
+            if image.shape != self.ring.frame_shape:
+                raise ValueError(f"Ukuran gambar {image.shape} tidak sesuai slot {self.ring.frame_shape}")
+
+        slot_indices = self._acquire_slots(len(images))
+        for slot, image in zip(slot_indices, images):
+            np.copyto(self.ring.frames[slot], image)
+
+        future = Future()
+        task_id = next(self._task_ids)
+        with self._pending_lock:
+            index = self._pick_worker()
+            self._pending[task_id] = (future, slot_indices, index, time.monotonic() + self.result_timeout)
+            task_queue = self._task_queues[index]
+        task_queue.put((task_id, backend_name, slot_indices))
+        return future
+
+    def classify_images(self, images, backend_name='rule'):
+        """
+        Versi sinkron submit(): tunggu dan kembalikan list hasil.
+
+        Raises:
+            RingFull: Jika slot kosong tidak tersedia sampai acquire_timeout
+            TimeoutError: Jika hasil tidak datang dalam result_timeout
+            WorkerLost: Jika worker yang memegang task mati
+
+        Notes:
+            - Batch dipecah per chunk_size gambar, sehingga batch yang lebih
+              besar dari ring tetap bisa diproses saat slot dikembalikan
+        """
+        futures = [
+            self.submit(images[i:i + self.chunk_size], backend_name)
+            for i in range(0, len(images), self.chunk_size)
+        ]
+        deadline = time.monotonic() + self.result_timeout
+        try:
+            return [
+                result
+                for future in futures
+                for result in future.result(timeout=max(0.0, deadline - time.monotonic()))
+            ]
+        except FutureTimeout:
+            raise TimeoutError(f"Classifier tidak menjawab dalam {self.result_timeout:g} detik")
+
+    def _collect_results(self):
+        while not self._closed:
+            try:
+                task_id, results, error = self._result_queue.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+            with self._pending_lock:
+                future, slot_indices, _, _ = self._pending.pop(task_id, (None, [], None, None))
+            # Slots are reusable as soon as the worker has answered
+            self._release_slots(slot_indices)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(results)
+            self._check_workers()
+
+    def _check_workers(self):
+        """
+        Tangani worker yang mati atau macet.
+
+        Notes:
+            - Worker yang memegang task melewati deadline dihentikan paksa;
+              ia mungkin masih membaca slot, jadi slot baru aman dipakai
+              ulang setelah prosesnya benar-benar berhenti
+            - Task worker yang mati digagalkan dengan WorkerLost, slot-nya
+              dikembalikan, lalu worker baru dijalankan di posisi yang sama
+        """
+        now = time.monotonic()
+        with self._pending_lock:
+            stuck = {index for _, _, index, deadline in self._pending.values() if deadline < now}
+        for index, worker in enumerate(self._workers):
+            if self._closed:
+                return
+            if worker.is_alive():
+                if index not in stuck:
+                    continue
+                print(f"Classifier worker {worker.name} exceeded {self.result_timeout:g}s, terminating")
+                worker.terminate()
+            worker.join(timeout=5)
+            if worker.is_alive():
+                continue
+            with self._pending_lock:
+                lost = [task_id for task_id, entry in self._pending.items() if entry[2] == index]
+                entries = [self._pending.pop(task_id) for task_id in lost]
+                self._restarts += 1
+                self._start_worker(index)
+            for future, slot_indices, _, _ in entries:
+                self._release_slots(slot_indices)
+                future.set_exception(WorkerLost(f"Worker classifier berhenti (exit code {worker.exitcode})"))
+            print(f"Classifier worker {worker.name} exited with code {worker.exitcode}; "
+                  f"failed {len(entries)} task(s) and restarted it")
+
+    def stats(self):
+        """Statistik pool: worker hidup, slot kosong, task tertunda."""
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "workers": len(self._workers),
+            "workers_alive": sum(1 for worker in self._workers if worker.is_alive()),
+            "worker_restarts": self._restarts,
+            "slots": self.ring.slots,
+            "chunk_size": self.chunk_size,
+            "free_slots": self._free_slots.qsize(),
+            "pending_tasks": pending
+        }
+
+    def close(self):
+        """Hentikan worker dan hapus blok shared memory."""
+        self._closed = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+        self._dispatcher.join(timeout=WORKER_CHECK_INTERVAL * 2)
+        self.ring.close()
@@ -0,0 +1,92 @@
+"""
+Modul Single-Flight - Menggabungkan fetch upstream yang bersamaan
+
+Dokumentasi Bahasa Indonesia:
+- Jika banyak thread meminta key yang sama (mis. URL BMKG yang sama)
+  pada saat bersamaan, hanya satu fetch yang benar-benar dijalankan
+- Thread lain menunggu dan menerima hasil yang sama, atau exception
+  yang sama jika fetch gagal
+- Tidak ada cache: setelah fetch selesai, pemanggilan berikutnya
+  menjalankan fetch baru (cache tetap urusan bmkg_cache)
+
+Author: SiagaAI Team
+Version: 1.0.0
+"""
+
+import threading
+
+
+class _Call:
+    """Satu fetch yang sedang berjalan dan hasilnya."""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Single-flight per key.
+
+    Usage:
+        data = flights.do(url, lambda: http_client.get_conditional(url, parse))
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key, fn):
+        """
+        Jalankan fn() untuk key, atau tunggu fetch yang sedang berjalan.
+
+        Returns:
+            Hasil fn() (dibagi ke semua pemanggil yang bersamaan)
+
+        Raises:
+            Exception: Exception dari fn(), diterima semua pemanggil
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self._shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self._executed += 1
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """Jumlah fetch yang dijalankan, pemanggil yang ikut menunggu, dan yang sedang berjalan."""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "shared": self._shared,
+                "in_flight": len(self._calls)
+            }
+
+
+flights = SingleFlight()